@@ -0,0 +1,204 @@
+"""asyncio scraping engine, an alternative backend to scrape_detail_page / extract_open_data.
+
+Year archive pages and the detail pages they list are fetched concurrently with a cap
+on in-flight requests. Parsing is left to the functions in scrape.py so both backends
+produce the same records.
+
+Every coroutine here can be cancelled; cancelling scrape_async() cancels all of the
+requests it has in flight and closes the session it opened.
+"""
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from datetime import date
+
+import aiohttp
+
+import metrics
+from draw_calendar import FIRST_DRAW
+from scrape import (
+    DETAIL_URL,
+    HEADERS,
+    YEAR_URL,
+    extract_all_lottery_data,
+    page_kind,
+    parse_year_page,
+    resolve_url,
+)
+
+REQUEST_TIMEOUT = 30  # seconds per request
+
+
+def backoff_delay(attempt, base=1.0, cap=30.0):
+    """Exponential backoff with full jitter for a 0-based retry attempt"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def make_async_session(concurrency=8):
+    """Create an aiohttp session with room for `concurrency` keep-alive connections"""
+    return aiohttp.ClientSession(
+        headers=HEADERS,
+        connector=aiohttp.TCPConnector(limit=concurrency),
+        timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+    )
+
+
+@asynccontextmanager
+async def session_scope(session, concurrency):
+    """Use the caller's session, or open (and later close) one of our own"""
+    if session is not None:
+        yield session
+        return
+    async with make_async_session(concurrency) as own_session:
+        yield own_session
+
+
+async def fetch_page(session, semaphore, url, max_retries=3, cache=None):
+    """Fetch the html at a site url, retrying non-200 responses with backoff.
+
+    With a cache, settled pages are served from disk and other cached pages are
+    revalidated with a conditional request. Returns None for a 404 or when every
+    attempt failed.
+    """
+    page = page_kind(url)
+    headers = {}
+    if cache:
+        if cache.is_settled(url):
+            html = cache.get_text(url)
+            if html is not None:
+                metrics.inc("cache_hits_total", page=page, result="settled")
+                metrics.event("fetch", url=url, page=page, status="cached")
+                return html
+        headers = cache.validators(url)
+
+    for attempt in range(max_retries):
+        if attempt:
+            metrics.inc("retries_total", page=page)
+        try:
+            async with semaphore:
+                start = time.perf_counter()
+                async with session.get(resolve_url(url), headers=headers) as response:
+                    content = await response.read()
+                    seconds = time.perf_counter() - start
+                    metrics.observe("fetch_seconds", seconds, page=page)
+                    metrics.observe("response_bytes", len(content), page=page)
+                    metrics.inc("http_responses_total", page=page, status=response.status)
+                    metrics.event("fetch", url=url, page=page, status=response.status,
+                                  seconds=round(seconds, 4), bytes=len(content))
+
+                    if response.status == 304 and cache and url in cache:
+                        metrics.inc("cache_hits_total", page=page, result="revalidated")
+                        cache.revalidated(url)
+                        html = cache.get_text(url)
+                        if html is not None:
+                            return html
+                        headers = {}
+                        continue
+                    if response.status == 200:
+                        encoding = response.get_encoding()
+                        if cache:
+                            cache.store(url, content, encoding,
+                                        response.headers.get("ETag"), response.headers.get("Last-Modified"))
+                        return content.decode(encoding, errors="replace")
+                    if response.status == 404:
+                        print(f"No results found at {url}")
+                        return None
+                    print(f"Got status code {response.status} for {url}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Attempt {attempt + 1} failed for {url}: {e}")
+            metrics.event("error", url=url, attempt=attempt + 1, error=str(e) or type(e).__name__)
+
+        # Back off outside the semaphore so a waiting retry doesn't hold a request slot
+        if attempt + 1 < max_retries:
+            await asyncio.sleep(backoff_delay(attempt))
+
+    print(f"Failed to fetch {url} after {max_retries} attempts")
+    metrics.inc("scrape_failures_total", page=page)
+    return None
+
+
+def timed_parse(section, parse, html):
+    with metrics.timed("parse_seconds", section=section):
+        return parse(html)
+
+
+async def extract_open_data_async(session, semaphore, year, max_retries=3, cache=None):
+    """Extract all lottery draw dates for a given year"""
+    html = await fetch_page(session, semaphore, YEAR_URL.format(year=year), max_retries, cache)
+    if html is None:
+        return []
+    dates = await asyncio.to_thread(timed_parse, "year_page", parse_year_page, html)
+    print(f"Found {len(dates)} dates for year {year}")
+    return dates
+
+
+async def scrape_detail_page_async(session, semaphore, date, max_retries=3, cache=None):
+    """Scrape the detail page for a specific date, same record shape as scrape_detail_page"""
+    url = DETAIL_URL.format(date=date)
+    html = await fetch_page(session, semaphore, url, max_retries, cache)
+    if html is None:
+        return None
+
+    # Parsing is CPU bound; keep it off the event loop
+    data = await asyncio.to_thread(timed_parse, "page", extract_all_lottery_data, html)
+    if not data:
+        print(f"Failed to scrape {date}")
+        return None
+    data['date'] = date
+    data['url'] = url
+    return data
+
+
+async def get_all_dates_async(start_year=FIRST_DRAW.year, end_year=None, concurrency=8, session=None, cache=None):
+    """Get all lottery dates from start_year to end_year (default: this year), fetching the years concurrently"""
+    end_year = end_year or date.today().year
+    semaphore = asyncio.Semaphore(concurrency)
+    async with session_scope(session, concurrency) as session:
+        year_dates = await asyncio.gather(*(
+            extract_open_data_async(session, semaphore, year, cache=cache)
+            for year in range(start_year, end_year + 1)
+        ))
+    return [date for dates in year_dates for date in dates]
+
+
+async def scrape_dates_async(dates, concurrency=8, session=None, cache=None):
+    """Scrape the detail pages for dates concurrently, returning results in the order of dates"""
+    semaphore = asyncio.Semaphore(concurrency)
+    async with session_scope(session, concurrency) as session:
+        results = await asyncio.gather(*(
+            scrape_detail_page_async(session, semaphore, date, cache=cache) for date in dates
+        ))
+    return [result for result in results if result]
+
+
+async def scrape_async(start_year=FIRST_DRAW.year, end_year=None, skip_dates=(), concurrency=8, session=None,
+                       cache=None):
+    """Fetch the year archives and every draw they list that isn't in skip_dates.
+
+    A year's detail pages are requested as soon as its archive page is parsed, while the
+    other archive pages are still in flight. Returns (all_dates, results), both in the
+    same order as the sequential get_all_dates() / scrape_dates() pair.
+    """
+    end_year = end_year or date.today().year
+    semaphore = asyncio.Semaphore(concurrency)
+    skip_dates = set(skip_dates)
+
+    async with session_scope(session, concurrency) as session:
+        async def scrape_year(year):
+            dates = await extract_open_data_async(session, semaphore, year, cache=cache)
+            new_dates = [d for d in dates if d not in skip_dates]
+            results = await asyncio.gather(*(
+                scrape_detail_page_async(session, semaphore, date, cache=cache) for date in new_dates
+            ))
+            return dates, results
+
+        async with asyncio.TaskGroup() as group:
+            tasks = [group.create_task(scrape_year(year)) for year in range(start_year, end_year + 1)]
+
+    all_dates, all_results = [], []
+    for task in tasks:
+        dates, results = task.result()
+        all_dates.extend(dates)
+        all_results.extend(result for result in results if result)
+    return all_dates, all_results
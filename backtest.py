@@ -0,0 +1,199 @@
+"""Walk-forward backtest of ticket strategies over the real draw history.
+
+The history is replayed draw by draw. Before each draw a strategy sees only the draws
+before it: number frequencies over its window (or all of history) and gaps since each
+number was last drawn, kept current by FrequencyStats as every draw is appended. Its
+tickets are then scored against the actual draw and its prize breakdown. Before
+2019-05-14 the draws were 7 of 49, so tickets for those draws only use 1-49.
+
+    python backtest.py --strategies hot cold overdue random --windows 0 10 25 50 --tickets 5
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from columnar import COLUMNAR_DIR, load_columnar
+from draw_stats import FIFTY_BALL_START, NUMBERS, DrawMatrix, FrequencyStats
+from simulate import TICKET_PRICE_CENTS, cold_strategy, hot_strategy, random_strategy, top_strategy
+from ticket_eval import MAX_MILLION_CENTS, NO_PRIZE, TIER_LABELS, TIER_OF, DrawHistory, popcount, ticket_masks
+
+# name -> (ticket generator from simulate.py, statistic it ranks on, whether it uses a window)
+STRATEGIES = {
+    "hot": (hot_strategy, "counts", True),
+    "cold": (cold_strategy, "counts", True),
+    "top": (top_strategy, "counts", True),
+    "overdue": (top_strategy, "gaps", False),
+    "random": (random_strategy, "counts", False),
+}
+
+
+def strategy_configs(strategies, windows):
+    """(strategy, window) pairs to run; window 0 means all draws seen so far"""
+    configs = []
+    for name in strategies:
+        uses_window = STRATEGIES[name][2]
+        for window in (windows if uses_window else [0]):
+            configs.append((name, window))
+    return configs
+
+
+def statistic(stats, name, window):
+    if name == "gaps":
+        return stats.gaps()
+    return stats.window_counts[window] if window else stats.counts
+
+
+def replay(tables, configs, tickets, warmup, seed, config_ids):
+    """Replay the history for a group of configs; returns one result dict per config"""
+    history = DrawHistory(tables)
+    draws = tables["draws"]
+    full = DrawMatrix(draws["date"], draws["balls"], draws["bonus"])
+
+    # Max Millions set masks per draw, as offsets into masks sorted by draw
+    mm_order = np.argsort(history.mm_draws, kind="stable")
+    mm_masks = history.mm_masks[mm_order]
+    mm_bounds = np.searchsorted(history.mm_draws[mm_order], np.arange(len(history) + 1))
+
+    windows = sorted({window for _, window in configs if window})
+    matrix = DrawMatrix(full.dates[:warmup], full.balls[:warmup], full.bonus[:warmup])
+    stats = FrequencyStats(matrix, windows=windows)
+    rngs = [np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(i,))) for i in config_ids]
+    totals = [{"tiers": np.zeros(NO_PRIZE + 1, dtype=np.int64), "matched": 0, "payout_cents": 0,
+               "free_plays": 0, "max_millions": 0} for _ in configs]
+
+    fifty_ball = full.dates >= np.datetime64(FIFTY_BALL_START, "D")
+    for i in range(warmup, len(full)):
+        draw_mask, bonus_mask = history.masks[i], history.bonus_masks[i]
+        draw_mm = mm_masks[mm_bounds[i]:mm_bounds[i + 1]]
+        pool = NUMBERS if fifty_ball[i] else NUMBERS - 1
+        for (name, window), rng, total in zip(configs, rngs, totals):
+            generate, stat_name, _ = STRATEGIES[name]
+            masks = ticket_masks(generate(tickets, rng, statistic(stats, stat_name, window), pool))
+            matched = popcount(masks & draw_mask)
+            won = history.tier_map[i, TIER_OF[matched, ((masks & bonus_mask) != 0).view(np.uint8)]]
+            mm_hits = np.isin(masks, draw_mm).sum()
+            total["tiers"] += np.bincount(won, minlength=NO_PRIZE + 1)
+            total["matched"] += int(matched.sum())
+            total["payout_cents"] += int(history.prize_cents[i, won].sum()) + int(mm_hits) * MAX_MILLION_CENTS
+            total["free_plays"] += int(history.free_play[i, won].sum())
+            total["max_millions"] += int(mm_hits)
+        stats.append(full.dates[i], full.balls[i], full.bonus[i])
+
+    steps = len(full) - warmup
+    return [summarize(name, window, steps, tickets, total) for (name, window), total in zip(configs, totals)]
+
+
+def replay_group(args):
+    return replay(*args)
+
+
+def summarize(name, window, steps, tickets, total):
+    plays = steps * tickets
+    cost = plays * TICKET_PRICE_CENTS
+    tiers = total["tiers"]
+    return {
+        "strategy": name,
+        "window": window,
+        "draws": steps,
+        "tickets": plays,
+        "tiers": dict(zip(TIER_LABELS, tiers.tolist())),
+        "hit_rate": float(tiers[:NO_PRIZE].sum() / plays) if plays else 0.0,
+        "average_matched": total["matched"] / plays if plays else 0.0,
+        "payout_cents": total["payout_cents"],
+        "free_plays": total["free_plays"],
+        "max_millions": total["max_millions"],
+        "cost_cents": cost,
+        # Free plays count as a ticket's worth towards the return
+        "return": (total["payout_cents"] + total["free_plays"] * TICKET_PRICE_CENTS) / cost if cost else 0.0,
+    }
+
+
+def backtest(tables, configs, tickets=5, warmup=50, seed=0, workers=1):
+    """Run every (strategy, window) config; results come back in config order.
+
+    Each config draws its random numbers from its own stream, so results don't depend
+    on how the configs are split across workers.
+    """
+    if len(tables["draws"]["date"]) <= warmup:
+        raise ValueError(f"need more than {warmup} draws to backtest")
+    groups = [list(range(len(configs)))[i::workers] for i in range(min(workers, len(configs)))]
+    jobs = [(tables, [configs[i] for i in ids], tickets, warmup, seed, ids) for ids in groups]
+
+    if len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=len(jobs)) as executor:
+            group_results = list(executor.map(replay_group, jobs))
+    else:
+        group_results = [replay_group(job) for job in jobs]
+
+    results = [None] * len(configs)
+    for ids, group in zip(groups, group_results):
+        for i, result in zip(ids, group):
+            results[i] = result
+    return results
+
+
+def print_table(results):
+    print(f"{'Strategy':<10} {'Window':>6} {'Draws':>6} {'Tickets':>8} {'Hit rate':>9} "
+          f"{'Avg match':>9} {'Cash won':>12} {'Return':>7}  Best tier")
+    for r in sorted(results, key=lambda r: -r["return"]):
+        won = [label for label in TIER_LABELS[:NO_PRIZE] if r["tiers"][label]]
+        best = "Max Millions" if r["max_millions"] else (won[0] if won else "-")
+        window = r["window"] or "all"
+        print(f"{r['strategy']:<10} {window:>6} {r['draws']:>6} {r['tickets']:>8} {r['hit_rate']:>9.2%} "
+              f"{r['average_matched']:>9.3f} {'$' + format(r['payout_cents'] / 100, ',.2f'):>12} "
+              f"{r['return']:>7.1%}  {best}")
+
+
+def restrict(tables, since):
+    """Tables keeping only the draws on or after since, with row references renumbered"""
+    keep = tables["draws"]["date"] >= np.datetime64(since, "D")
+    new_row = np.cumsum(keep) - 1
+    restricted = {"draws": {column: values[keep] for column, values in tables["draws"].items()}}
+    for name in ("prize_tiers", "max_millions"):
+        table = tables[name]
+        rows = keep[table["draw"]]
+        restricted[name] = {column: (values if column == "tier_names" else values[rows])
+                            for column, values in table.items()}
+        restricted[name]["draw"] = new_row[table["draw"][rows]].astype(np.int32)
+    return restricted
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of ticket strategies")
+    parser.add_argument("--strategies", nargs="+", default=list(STRATEGIES), choices=list(STRATEGIES))
+    parser.add_argument("--windows", nargs="+", type=int, default=[0, 10, 25, 50, 100],
+                        help="trailing windows in draws for the frequency strategies (0 = all history)")
+    parser.add_argument("--tickets", type=int, default=5, help="tickets per strategy per draw")
+    parser.add_argument("--warmup", type=int, default=50, help="draws seen before the first scored draw")
+    parser.add_argument("--since", default=None, help="ignore draws before this date (YYYY-MM-DD)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--columnar-dir", default=COLUMNAR_DIR)
+    parser.add_argument("--json", default=None, help="also write the results to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    tables = load_columnar(args.columnar_dir)
+    if args.since:
+        tables = restrict(tables, args.since)
+
+    configs = strategy_configs(args.strategies, [w for w in args.windows if w >= 0])
+    start = time.perf_counter()
+    results = backtest(tables, configs, args.tickets, args.warmup, args.seed, args.workers)
+    elapsed = time.perf_counter() - start
+
+    print_table(results)
+    print(f"\nBacktested {len(configs)} strategies in {elapsed:.2f}s")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
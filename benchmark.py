@@ -0,0 +1,355 @@
+"""Offline benchmarks for the parsing, formatting, statistics, scoring and heatmap code.
+
+Parsing runs over a fixture corpus of saved year and detail pages in bench_pages/, which
+`capture` copies out of the scraper's html cache. Everything else runs on synthetic
+datasets built from lottery_results_final.json scaled 1x to 100x: the history is repeated
+with each copy shifted past the previous one, so dates stay unique and in order.
+
+Every benchmark reports its median time over the repeats, a throughput and the peak memory
+traced by tracemalloc. Results are written to benchmark_results.json and compared with
+benchmark_baseline.json when it exists; anything slower or larger than the baseline by more
+than --threshold is flagged and the run exits with status 1.
+
+    python benchmark.py capture --pages 50          # build the corpus after a scrape
+    python benchmark.py --scales 1 10 100
+    python benchmark.py --only format stats --save-baseline
+"""
+import argparse
+import contextlib
+import gzip
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from formatter import JSON_FILE
+from html_cache import CACHE_DIR, DETAIL_PAGE, YEAR_PAGE, HtmlCache
+
+CORPUS_DIR = "bench_pages"
+RESULTS_FILE = "benchmark_results.json"
+BASELINE_FILE = "benchmark_baseline.json"
+
+SCALES = [1, 10, 100]
+REPEATS = 3
+TICKETS = 2000
+# Allowed slowdown (or memory growth) over the baseline before a result is flagged
+THRESHOLD = 0.25
+
+BENCHMARKS = ["parse", "format", "stats", "tickets", "heatmap"]
+
+
+def page_date(url):
+    return datetime.strptime(DETAIL_PAGE.search(url).group(1), "%m-%d-%Y")
+
+
+def capture_corpus(cache, corpus_dir=CORPUS_DIR, pages=50):
+    """Copy every cached year page and pages detail pages spread over the years into corpus_dir.
+
+    Pages are stored gzipped with a fixed header, so capturing the same pages again gives
+    identical files.
+    """
+    details = sorted((url for url in cache.urls() if DETAIL_PAGE.search(url)), key=page_date)
+    if len(details) > pages:
+        details = [details[round(i * (len(details) - 1) / max(pages - 1, 1))] for i in range(pages)]
+    years = sorted(url for url in cache.urls() if YEAR_PAGE.search(url))
+
+    os.makedirs(corpus_dir, exist_ok=True)
+    for name in os.listdir(corpus_dir):
+        if name.endswith(".html.gz"):
+            os.remove(os.path.join(corpus_dir, name))
+
+    manifest = []
+    for kind, urls in (("year", years), ("detail", details)):
+        for url in urls:
+            html = cache.get_text(url)
+            if html is None:
+                continue
+            name = url.rstrip("/").rsplit("/", 1)[-1] + ".html.gz"
+            with open(os.path.join(corpus_dir, name), "wb") as f:
+                with gzip.GzipFile(filename="", mode="wb", fileobj=f, mtime=0) as gz:
+                    gz.write(html.encode("utf-8"))
+            manifest.append({"url": url, "kind": kind, "file": name})
+
+    with open(os.path.join(corpus_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+    print(f"Saved {sum(e['kind'] == 'year' for e in manifest)} year and "
+          f"{sum(e['kind'] == 'detail' for e in manifest)} detail pages to {corpus_dir}/")
+    return manifest
+
+
+def load_corpus(corpus_dir=CORPUS_DIR):
+    """{"year": [html], "detail": [html]} from the corpus, or None when it hasn't been captured"""
+    manifest_path = os.path.join(corpus_dir, "manifest.json")
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, "r") as f:
+        manifest = json.load(f)
+    corpus = {"year": [], "detail": []}
+    for entry in manifest:
+        with gzip.open(os.path.join(corpus_dir, entry["file"]), "rb") as f:
+            corpus[entry["kind"]].append(f.read().decode("utf-8"))
+    return corpus
+
+
+def scaled_records(records, scale):
+    """The records repeated scale times, each copy dated after the one before.
+
+    Copies are shifted by whole weeks so every draw keeps its weekday.
+    """
+    first = datetime.strptime(records[0]["date"], "%m-%d-%Y")
+    last = max(datetime.strptime(r["date"], "%m-%d-%Y") for r in records)
+    span = timedelta(weeks=(last - first).days // 7 + 1)
+    scaled = []
+    for copy in range(scale):
+        for record in records:
+            date = record["date"]
+            if copy:
+                date = (datetime.strptime(date, "%m-%d-%Y") + copy * span).strftime("%m-%d-%Y")
+            scaled.append(dict(record, date=date, url=record.get("url", "").replace(record["date"], date)))
+    return scaled
+
+
+def measure(func, repeats=REPEATS):
+    """(median seconds, fastest seconds, peak traced bytes) of func().
+
+    The first call runs under tracemalloc for the memory peak and doubles as a warm-up;
+    the timed calls run without it.
+    """
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), min(times), peak
+
+
+def quietly(func):
+    """func with its printed output discarded"""
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return func()
+    return run
+
+
+def record(results, name, scale, items, unit, measured):
+    seconds, fastest, peak = measured
+    key = f"{name}@{scale}x" if scale else name
+    results[key] = {
+        "benchmark": name,
+        "scale": scale,
+        "items": items,
+        "seconds": seconds,
+        "min_seconds": fastest,
+        "rate": items / seconds if seconds else None,
+        "unit": unit,
+        "peak_bytes": peak,
+    }
+    rate = f"{items / seconds:,.1f} {unit}" if seconds else "-"
+    print(f"  {key:<22} {seconds * 1000:10.1f} ms  {rate:>24}  peak {peak / 1e6:8.1f} MB")
+
+
+def bench_parse(results, corpus, repeats):
+    import metrics
+    from scrape import extract_all_lottery_data, extract_all_lottery_data_fast, parse_year_page
+
+    def run_all(parse, pages):
+        def run():
+            for html in pages:
+                parse(html)
+            # The parsers record timings into the metrics registry; don't let it grow
+            metrics.reset()
+        return run
+
+    details, years = corpus["detail"], corpus["year"]
+    if details:
+        record(results, "parse_reference", None, len(details), "pages/s",
+               measure(quietly(run_all(extract_all_lottery_data, details)), repeats))
+        record(results, "parse_fast", None, len(details), "pages/s",
+               measure(quietly(run_all(extract_all_lottery_data_fast, details)), repeats))
+    if years:
+        record(results, "parse_year", None, len(years), "pages/s",
+               measure(quietly(run_all(parse_year_page, years)), repeats))
+
+
+def bench_dataset(results, records, scale, work_dir, selected, repeats, tickets):
+    """format, stats and tickets on the dataset scaled by scale"""
+    from formatter import format_lottery_data
+
+    json_file = os.path.join(work_dir, f"results_{scale}x.json")
+    csv_file = os.path.join(work_dir, f"results_{scale}x.csv")
+    columnar_dir = os.path.join(work_dir, f"columnar_{scale}x")
+    scaled = scaled_records(records, scale)
+    with open(json_file, "w") as f:
+        json.dump(scaled, f)
+    draws = len(scaled)
+    del scaled
+
+    format_run = quietly(lambda: format_lottery_data(json_file, csv_file, columnar_dir))
+    if "format" in selected:
+        record(results, "format", scale, draws, "records/s", measure(format_run, repeats))
+    else:
+        # The other benchmarks read its CSV and typed dataset
+        format_run()
+
+    if "stats" in selected:
+        from recommender import analyze_lottery_statistics
+        record(results, "stats", scale, draws, "draws/s",
+               measure(lambda: analyze_lottery_statistics(csv_file), repeats))
+
+    if "tickets" in selected:
+        from ticket_eval import DrawHistory, evaluate, random_tickets
+        history = DrawHistory.from_columnar(columnar_dir)
+        picks = random_tickets(tickets, seed=0)
+        record(results, "tickets", scale, tickets * len(history), "ticket-draws/s",
+               measure(lambda: evaluate(picks, history), repeats))
+
+
+def bench_heatmap(results, work_dir, repeats, preset):
+    from heatmap import HeatmapRenderer
+    from recommender import analyze_lottery_statistics
+
+    freq_data = analyze_lottery_statistics()
+    renderer = HeatmapRenderer(preset)
+    path = os.path.join(work_dir, "heatmap.jpg")
+    record(results, f"heatmap_{preset}", None, 1, "images/s",
+           measure(lambda: renderer.render(freq_data, path), repeats))
+
+
+def environment():
+    import numpy as np
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def run_benchmarks(selected=BENCHMARKS, scales=SCALES, repeats=REPEATS, tickets=TICKETS,
+                   corpus_dir=CORPUS_DIR, json_file=JSON_FILE, preset="standard"):
+    """Run the selected benchmarks; returns {"environment": ..., "results": {key: result}}"""
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="lotto_bench_") as work_dir:
+        if "parse" in selected:
+            corpus = load_corpus(corpus_dir)
+            if corpus is None:
+                print(f"No page corpus in {corpus_dir}/, skipping parse (run: python benchmark.py capture)")
+            else:
+                print(f"parse: {len(corpus['detail'])} detail and {len(corpus['year'])} year pages")
+                bench_parse(results, corpus, repeats)
+
+        if set(selected) & {"format", "stats", "tickets"}:
+            with open(json_file, "r") as f:
+                records = json.load(f)
+            for scale in scales:
+                print(f"dataset {scale}x: {len(records) * scale:,} draws")
+                bench_dataset(results, records, scale, work_dir, selected, repeats, tickets)
+
+        if "heatmap" in selected:
+            print("heatmap:")
+            bench_heatmap(results, work_dir, repeats, preset)
+
+    return {"environment": environment(), "results": results}
+
+
+def compare(report, baseline, threshold=THRESHOLD):
+    """Rows (key, metric, baseline, current, ratio, flagged) for the benchmarks in both runs"""
+    rows = []
+    for key, result in report["results"].items():
+        before = baseline["results"].get(key)
+        if not before:
+            continue
+        for metric in ("seconds", "peak_bytes"):
+            if before[metric]:
+                ratio = result[metric] / before[metric]
+                rows.append((key, metric, before[metric], result[metric], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def print_comparison(rows, threshold):
+    print(f"\n{'Benchmark':<22} {'Metric':<11} {'Baseline':>12} {'Current':>12} {'Change':>8}")
+    for key, metric, before, after, ratio, flagged in rows:
+        if metric == "seconds":
+            before, after = f"{before * 1000:.1f} ms", f"{after * 1000:.1f} ms"
+        else:
+            before, after = f"{before / 1e6:.1f} MB", f"{after / 1e6:.1f} MB"
+        print(f"{key:<22} {metric:<11} {before:>12} {after:>12} {ratio - 1:>+8.1%}"
+              + ("  REGRESSION" if flagged else ""))
+    flagged = sum(row[5] for row in rows)
+    print(f"\n{flagged} regression(s) beyond {threshold:.0%}" if flagged else
+          f"\nNo regressions beyond {threshold:.0%}")
+
+
+def save_json(data, path):
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks with baseline comparison")
+    parser.add_argument("command", nargs="?", default="run", choices=["run", "capture"])
+    parser.add_argument("--only", nargs="+", default=BENCHMARKS, choices=BENCHMARKS)
+    parser.add_argument("--scales", nargs="+", type=int, default=SCALES,
+                        help="dataset sizes as multiples of the real history")
+    parser.add_argument("--repeats", type=int, default=REPEATS, help="timed runs per benchmark")
+    parser.add_argument("--tickets", type=int, default=TICKETS, help="tickets scored per draw history")
+    parser.add_argument("--preset", default="standard", help="heatmap preset (see heatmap.py)")
+    parser.add_argument("--json", default=JSON_FILE, help="results JSON the datasets are scaled from")
+    parser.add_argument("--corpus", default=CORPUS_DIR, help="directory of saved pages")
+    parser.add_argument("--output", default=RESULTS_FILE)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help=f"flag results this fraction worse than the baseline (default: {THRESHOLD})")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="html cache read by capture")
+    parser.add_argument("--pages", type=int, default=50, help="detail pages saved by capture")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "capture":
+        capture_corpus(HtmlCache(args.cache_dir), args.corpus, args.pages)
+        return
+
+    report = run_benchmarks(args.only, args.scales, args.repeats, args.tickets, args.corpus, args.json,
+                            args.preset)
+    save_json(report, args.output)
+    print(f"\nWrote {len(report['results'])} results to {args.output}")
+
+    if args.save_baseline:
+        save_json(report, args.baseline)
+        print(f"Saved as the baseline in {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, "r") as f:
+            rows = compare(report, json.load(f), args.threshold)
+        print_comparison(rows, args.threshold)
+        if any(row[5] for row in rows):
+            sys.exit(1)
+    else:
+        print(f"No baseline at {args.baseline}; save one with --save-baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Typed columnar copy of the results for analysis.
+
+lottery_results.csv keeps every value as display text; this dataset stores the same
+draws as typed NumPy columns so analytical loads are a few array reads:
+
+    draws.npz         one row per draw: date (datetime64[D]), balls (uint8, n x 7), bonus,
+                      jackpot / total sales in cents, tickets sold, total winners,
+                      winning ratio and sales difference (percent), Max Millions counts
+    prize_tiers.npz   one row per draw and prize tier: draw (row in draws), tier (index
+                      into tier_names), prize / fund in cents, winners, carried_over, free_play
+    max_millions.npz  one row per Max Millions number set: draw, numbers (uint8, m x 7)
+    provinces.npz     one row per draw and region: draw, province (index into
+                      province_names), winners, amount won in cents
+
+Missing integers are -1 and missing floats NaN, except bonus: it is 0 for a draw without
+a bonus number, since no ball is 0. load_columnar() reads all four tables unless asked for
+fewer. When pyarrow is installed the same tables are also written as Parquet files.
+"""
+import os
+
+import numpy as np
+
+from normalize import PROVINCES, TIER_NAMES
+from records import Draw
+
+COLUMNAR_DIR = "lottery_columnar"
+TABLES = ("draws", "prize_tiers", "max_millions", "provinces")
+
+
+def or_missing(value, missing=-1):
+    return missing if value is None else value
+
+
+class ColumnarBuilder:
+    """Collects typed columns from scraped records, one record at a time"""
+
+    def __init__(self):
+        self.tier_names = list(TIER_NAMES)
+        self.province_names = list(PROVINCES)
+        self.draws = {name: [] for name in (
+            "date", "balls", "bonus", "jackpot_cents", "total_sales_cents", "tickets_sold",
+            "total_winners", "winning_ratio", "sales_difference", "max_millions_count",
+            "max_millions_next_draw",
+        )}
+        self.tiers = {name: [] for name in (
+            "draw", "tier", "prize_cents", "winners", "prize_fund_cents", "carried_over", "free_play",
+        )}
+        self.max_millions = {"draw": [], "numbers": []}
+        self.provinces = {"draw": [], "province": [], "winners": [], "amount_cents": []}
+        self.skipped = 0
+
+    def tier_code(self, match_type):
+        if match_type not in self.tier_names:
+            self.tier_names.append(match_type)
+        return self.tier_names.index(match_type)
+
+    def province_code(self, province):
+        if province not in self.province_names:
+            self.province_names.append(province)
+        return self.province_names.index(province)
+
+    def add(self, record):
+        """Add one draw; records without seven valid balls are counted as skipped"""
+        draw = Draw.from_record(record)
+        if draw is None:
+            self.skipped += 1
+            return False
+        self.add_draw(draw)
+        return True
+
+    def add_draw(self, draw):
+        """Add one records.Draw"""
+        row = len(self.draws["date"])
+        self.draws["date"].append(draw.date.isoformat())
+        self.draws["balls"].append(draw.balls)
+        self.draws["bonus"].append(or_missing(draw.bonus, 0))
+        self.draws["jackpot_cents"].append(or_missing(draw.jackpot_cents))
+        self.draws["total_sales_cents"].append(or_missing(draw.total_sales_cents))
+        self.draws["tickets_sold"].append(or_missing(draw.tickets_sold))
+        self.draws["total_winners"].append(or_missing(draw.total_winners))
+        self.draws["winning_ratio"].append(or_missing(draw.winning_ratio, np.nan))
+        self.draws["sales_difference"].append(or_missing(draw.sales_difference, np.nan))
+        self.draws["max_millions_count"].append(or_missing(draw.max_millions_count))
+        self.draws["max_millions_next_draw"].append(or_missing(draw.max_millions_next_draw))
+
+        for tier in draw.tiers:
+            self.tiers["draw"].append(row)
+            self.tiers["tier"].append(self.tier_code(tier.name))
+            self.tiers["prize_cents"].append(or_missing(tier.prize_cents))
+            self.tiers["winners"].append(or_missing(tier.winners))
+            self.tiers["prize_fund_cents"].append(or_missing(tier.fund_cents))
+            self.tiers["carried_over"].append(tier.carried_over)
+            self.tiers["free_play"].append(tier.free_play)
+
+        for numbers in draw.max_millions:
+            self.max_millions["draw"].append(row)
+            self.max_millions["numbers"].append(numbers)
+
+        for province in draw.provinces:
+            self.provinces["draw"].append(row)
+            self.provinces["province"].append(self.province_code(province.name))
+            self.provinces["winners"].append(or_missing(province.winners))
+            self.provinces["amount_cents"].append(or_missing(province.amount_cents))
+
+    def tables(self):
+        """The collected columns as {table: {column: ndarray}}"""
+        draws = self.draws
+        tiers = self.tiers
+        return {
+            "draws": {
+                "date": np.array(draws["date"], dtype="datetime64[D]"),
+                "balls": np.array(draws["balls"], dtype=np.uint8).reshape(-1, 7),
+                "bonus": np.array(draws["bonus"], dtype=np.uint8),
+                "jackpot_cents": np.array(draws["jackpot_cents"], dtype=np.int64),
+                "total_sales_cents": np.array(draws["total_sales_cents"], dtype=np.int64),
+                "tickets_sold": np.array(draws["tickets_sold"], dtype=np.int64),
+                "total_winners": np.array(draws["total_winners"], dtype=np.int64),
+                "winning_ratio": np.array(draws["winning_ratio"], dtype=np.float64),
+                "sales_difference": np.array(draws["sales_difference"], dtype=np.float64),
+                "max_millions_count": np.array(draws["max_millions_count"], dtype=np.int16),
+                "max_millions_next_draw": np.array(draws["max_millions_next_draw"], dtype=np.int16),
+            },
+            "prize_tiers": {
+                "draw": np.array(tiers["draw"], dtype=np.int32),
+                "tier": np.array(tiers["tier"], dtype=np.uint8),
+                "prize_cents": np.array(tiers["prize_cents"], dtype=np.int64),
+                "winners": np.array(tiers["winners"], dtype=np.int64),
+                "prize_fund_cents": np.array(tiers["prize_fund_cents"], dtype=np.int64),
+                "carried_over": np.array(tiers["carried_over"], dtype=bool),
+                "free_play": np.array(tiers["free_play"], dtype=bool),
+                "tier_names": np.array(self.tier_names),
+            },
+            "max_millions": {
+                "draw": np.array(self.max_millions["draw"], dtype=np.int32),
+                "numbers": np.array(self.max_millions["numbers"], dtype=np.uint8).reshape(-1, 7),
+            },
+            "provinces": {
+                "draw": np.array(self.provinces["draw"], dtype=np.int32),
+                "province": np.array(self.provinces["province"], dtype=np.uint8),
+                "winners": np.array(self.provinces["winners"], dtype=np.int64),
+                "amount_cents": np.array(self.provinces["amount_cents"], dtype=np.int64),
+                "province_names": np.array(self.province_names),
+            },
+        }
+
+
+def write_parquet(tables, directory):
+    """Write the tables as Parquet too, when pyarrow is available"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        return False
+
+    for name, columns in tables.items():
+        columns = dict(columns)
+        columns.pop("tier_names", None)
+        columns.pop("province_names", None)
+        # Parquet columns are flat: split the fixed-width number matrices into one column each
+        for key in ("balls", "numbers"):
+            if key in columns:
+                matrix = columns.pop(key)
+                for i in range(matrix.shape[1]):
+                    columns[f"{key}_{i + 1}"] = matrix[:, i]
+        pq.write_table(pa.table(columns), os.path.join(directory, f"{name}.parquet"))
+    return True
+
+
+def export_columnar(records, directory=COLUMNAR_DIR):
+    """Build the typed dataset from an iterable of records and write it to directory"""
+    builder = ColumnarBuilder()
+    for record in records:
+        builder.add(record)
+    save_columnar(builder, directory)
+    return builder
+
+
+def save_columnar(builder, directory=COLUMNAR_DIR):
+    os.makedirs(directory, exist_ok=True)
+    tables = builder.tables()
+    for name, columns in tables.items():
+        # Write then rename so readers never load a half-written table
+        tmp_path = os.path.join(directory, f"{name}.tmp.npz")
+        np.savez(tmp_path, **columns)
+        os.replace(tmp_path, os.path.join(directory, f"{name}.npz"))
+    write_parquet(tables, directory)
+    print(f"Wrote typed dataset for {len(tables['draws']['date'])} draws to {directory}/"
+          + (f" (skipped {builder.skipped})" if builder.skipped else ""))
+
+
+def load_columnar(directory=COLUMNAR_DIR, tables=TABLES):
+    """Load the typed dataset as {table: {column: ndarray}}"""
+    loaded = {}
+    for name in tables:
+        with np.load(os.path.join(directory, f"{name}.npz")) as data:
+            loaded[name] = {column: data[column] for column in data.files}
+    return loaded
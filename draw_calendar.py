@@ -0,0 +1,168 @@
+"""The Lotto Max draw schedule and the calendar of known draw dates.
+
+Draws were held on Fridays from the first draw on 2009-09-25, and on Tuesdays and Fridays
+from 2019-05-14. DrawCalendar keeps the known draw dates sorted, with an index by date.
+From the last known date it works out which draws should have happened since, so the
+scraper can request those detail pages directly instead of crawling every year archive.
+
+    calendar = DrawCalendar.load("lottery_dates.json")
+    calendar.last, calendar.next_draw()
+    calendar.expected_after()    # scheduled draws after the last known one, up to yesterday
+
+    python draw_calendar.py
+"""
+import argparse
+import json
+from datetime import date as Date, timedelta
+
+DATES_FILE = "lottery_dates.json"
+
+TUESDAY, FRIDAY = 1, 4
+
+# (first day, draw weekdays) of each schedule, oldest first
+SCHEDULE = [
+    (Date(2009, 9, 25), (FRIDAY,)),
+    (Date(2019, 5, 14), (TUESDAY, FRIDAY)),
+]
+FIRST_DRAW = SCHEDULE[0][0]
+
+ONE_DAY = timedelta(days=1)
+
+
+def parse_date(text):
+    """Date of an MM-DD-YYYY string"""
+    return Date(int(text[6:10]), int(text[0:2]), int(text[3:5]))
+
+
+def site_date(day):
+    return day.strftime("%m-%d-%Y")
+
+
+def draw_weekdays(day):
+    """Weekdays (Monday = 0) with a draw under the schedule in effect on day"""
+    for start, weekdays in reversed(SCHEDULE):
+        if day >= start:
+            return weekdays
+    return ()
+
+
+def is_draw_day(day):
+    return day.weekday() in draw_weekdays(day)
+
+
+def next_draw_after(day):
+    """The first scheduled draw day after day"""
+    day = max(day + ONE_DAY, FIRST_DRAW)
+    # Every schedule draws at least once a week
+    while not is_draw_day(day):
+        day += ONE_DAY
+    return day
+
+
+def scheduled_between(start, end):
+    """Scheduled draw days with start <= day < end"""
+    days = []
+    day = next_draw_after(start - ONE_DAY)
+    while day < end:
+        days.append(day)
+        day = next_draw_after(day)
+    return days
+
+
+def archive_order(days):
+    """Site dates by year, newest first within a year, as the year archive pages list them"""
+    return [site_date(day) for day in sorted(days, key=lambda day: (day.year, -day.toordinal()))]
+
+
+class DrawCalendar:
+    """Known draw dates, sorted, with their positions by date"""
+
+    def __init__(self, dates=()):
+        self.days = []
+        self.position = {}
+        self.add(dates)
+
+    @classmethod
+    def load(cls, dates_file=DATES_FILE):
+        """Calendar of a dates file (MM-DD-YYYY strings in any order); empty when it doesn't exist"""
+        try:
+            with open(dates_file, "r") as f:
+                return cls(json.load(f))
+        except FileNotFoundError:
+            return cls()
+
+    def add(self, dates):
+        """Add dates (MM-DD-YYYY strings or dates); returns how many were new"""
+        new = {parse_date(d) if isinstance(d, str) else d for d in dates}
+        new.difference_update(self.position)
+        if new:
+            self.days = sorted(self.days + list(new))
+            self.position = {day: i for i, day in enumerate(self.days)}
+        return len(new)
+
+    def __len__(self):
+        return len(self.days)
+
+    def __contains__(self, day):
+        return (parse_date(day) if isinstance(day, str) else day) in self.position
+
+    def index(self, day):
+        """Position of a known draw date, oldest first"""
+        return self.position[parse_date(day) if isinstance(day, str) else day]
+
+    @property
+    def first(self):
+        return self.days[0] if self.days else None
+
+    @property
+    def last(self):
+        return self.days[-1] if self.days else None
+
+    def next_draw(self, after=None):
+        """The first scheduled draw after `after` (default: the last known draw)"""
+        after = after or self.last
+        return next_draw_after(after) if after else FIRST_DRAW
+
+    def expected_after(self, until=None):
+        """Site dates of the scheduled draws after the last known one and before until.
+
+        until defaults to today: today's draw can't have results until late in the evening.
+        """
+        start = self.next_draw() if self.days else FIRST_DRAW
+        return [site_date(day) for day in scheduled_between(start, until or Date.today())]
+
+    def missing(self):
+        """Scheduled draws between the first and last known ones that aren't known"""
+        if not self.days:
+            return []
+        return [site_date(day) for day in scheduled_between(self.first, self.last) if day not in self.position]
+
+    def unscheduled(self):
+        """Known draws that aren't on the schedule"""
+        return [site_date(day) for day in self.days if not is_draw_day(day)]
+
+    def site_dates(self):
+        return archive_order(self.days)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show the draw calendar")
+    parser.add_argument("--dates", default=DATES_FILE, help=f"draw dates file (default: {DATES_FILE})")
+    args = parser.parse_args(argv)
+
+    calendar = DrawCalendar.load(args.dates)
+    if not calendar:
+        print(f"No draw dates in {args.dates}")
+    else:
+        print(f"{len(calendar)} draws from {site_date(calendar.first)} to {site_date(calendar.last)}")
+    print(f"Next draw: {calendar.next_draw().strftime('%A, %B %d %Y')}")
+    expected = calendar.expected_after()
+    print(f"Expected since the last known draw: {len(expected)}"
+          + (f" ({', '.join(expected[:10])}{' ...' if len(expected) > 10 else ''})" if expected else ""))
+    for label, dates in (("Missing scheduled draws", calendar.missing()), ("Unscheduled draws", calendar.unscheduled())):
+        if dates:
+            print(f"{label}: {', '.join(dates)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""Vectorized draw history and incremental number statistics.
+
+DrawMatrix keeps the draws as a compact (draws x 7) uint8 array with the bonus ball and
+draw date alongside, always in chronological order. FrequencyStats computes number
+frequencies, gaps since each number was last drawn, trailing-window counts and the bonus
+distribution from it with array operations, and catches up incrementally when draws
+are appended instead of recounting the history. CooccurrenceIndex does the same for
+pairs and triples of numbers drawn together.
+"""
+import csv
+from collections import Counter
+from itertools import combinations
+
+import numpy as np
+
+NUMBERS = 50
+BALLS = 7
+
+# Start of the RNG era the recommendations are based on
+RNG_ERA_START = "2019-07-01"
+
+# First draw with 50 numbers (1-49 before), and of the Tuesday draws
+FIFTY_BALL_START = "2019-05-14"
+
+
+def to_day(date):
+    """MM-DD-YYYY (site format) or YYYY-MM-DD -> numpy datetime64[D]"""
+    if isinstance(date, str) and len(date) == 10 and date[2] == "-":
+        month, day, year = date.split("-")
+        date = f"{year}-{month}-{day}"
+    return np.datetime64(date, "D")
+
+
+class DrawMatrix:
+    """Chronological draw history backed by growable NumPy arrays"""
+
+    def __init__(self, dates, balls, bonus):
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        balls = np.asarray(balls, dtype=np.uint8).reshape(-1, BALLS)
+        bonus = np.asarray(bonus, dtype=np.uint8)
+        order = np.argsort(dates, kind="stable")
+        self.n = len(dates)
+        self._dates = dates[order]
+        self._balls = balls[order]
+        self._bonus = bonus[order]
+        # Cumulative counts, grown geometrically like the draws; rows 0..prefix_n are filled
+        self._prefix = None
+        self._prefix_n = 0
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from (date, seven balls, bonus) tuples"""
+        dates, balls, bonus = [], [], []
+        for date, numbers, bonus_number in rows:
+            dates.append(to_day(date))
+            balls.append(numbers)
+            bonus.append(bonus_number or 0)
+        return cls(np.array(dates, dtype="datetime64[D]"), np.array(balls, dtype=np.uint8).reshape(-1, BALLS), bonus)
+
+    @classmethod
+    def from_csv(cls, csv_file="lottery_results.csv"):
+        """Build from lottery_results.csv, reading only the date and ball columns"""
+        def rows():
+            with open(csv_file, "r", newline="") as f:
+                for row in csv.DictReader(f):
+                    try:
+                        numbers = [int(row[f"Main Numbers {i}"]) for i in range(1, BALLS + 1)]
+                    except (TypeError, ValueError):
+                        continue
+                    bonus = row.get("Bonus Number") or "0"
+                    yield row["Date"], numbers, int(bonus) if bonus.isdigit() else 0
+        return cls.from_rows(rows())
+
+    @classmethod
+    def from_draws(cls, draws):
+        """Build from records.Draw objects"""
+        return cls.from_rows((draw.date, draw.balls, draw.bonus) for draw in draws)
+
+    @classmethod
+    def from_columnar(cls, directory="lottery_columnar"):
+        """Build from the typed dataset written by the formatter"""
+        from columnar import load_columnar
+        draws = load_columnar(directory, tables=("draws",))["draws"]
+        return cls(draws["date"], draws["balls"], draws["bonus"])
+
+    @property
+    def dates(self):
+        return self._dates[:self.n]
+
+    @property
+    def balls(self):
+        return self._balls[:self.n]
+
+    @property
+    def bonus(self):
+        return self._bonus[:self.n]
+
+    def __len__(self):
+        return self.n
+
+    def append(self, date, numbers, bonus=0):
+        """Add the newest draw; storage grows geometrically so appends are amortized O(1)"""
+        date = to_day(date)
+        if self.n and date < self._dates[self.n - 1]:
+            raise ValueError(f"draw {date} is older than the latest draw {self._dates[self.n - 1]}")
+        if self.n == len(self._dates):
+            capacity = max(16, 2 * self.n)
+            self._dates = np.resize(self._dates, capacity)
+            self._balls = np.resize(self._balls, (capacity, BALLS))
+            self._bonus = np.resize(self._bonus, capacity)
+        self._dates[self.n] = date
+        self._balls[self.n] = numbers
+        self._bonus[self.n] = bonus or 0
+        self.n += 1
+
+    def hits(self, start=0, stop=None):
+        """(draws x 51) 0/1 matrix: hits[i, k] is 1 when number k was drawn in draw i"""
+        balls = self.balls[start:stop]
+        hits = np.zeros((len(balls), NUMBERS + 1), dtype=np.uint8)
+        hits[np.arange(len(balls))[:, None], balls] = 1
+        return hits
+
+    def prefix_counts(self):
+        """(draws + 1) x 51 cumulative counts: prefix[j] - prefix[i] counts draws i..j-1.
+
+        Extended incrementally when draws have been appended since the last call.
+        """
+        done = self._prefix_n
+        if self._prefix is None or len(self._prefix) <= self.n:
+            capacity = max(self.n + 1, 2 * (0 if self._prefix is None else len(self._prefix)), 17)
+            grown = np.zeros((capacity, NUMBERS + 1), dtype=np.int32)
+            if self._prefix is not None:
+                grown[:done + 1] = self._prefix[:done + 1]
+            self._prefix = grown
+        if done < self.n:
+            new = self._prefix[done + 1:self.n + 1]
+            np.cumsum(self.hits(done, self.n), axis=0, dtype=np.int32, out=new)
+            new += self._prefix[done]
+            self._prefix_n = self.n
+        return self._prefix[:self.n + 1]
+
+    def index_of(self, date):
+        """Index of the first draw on or after date"""
+        return int(np.searchsorted(self.dates, to_day(date), side="left"))
+
+    def between(self, start=None, end=None):
+        """Copy holding only the draws with start <= date < end"""
+        lo = self.index_of(start) if start is not None else 0
+        hi = self.index_of(end) if end is not None else self.n
+        return DrawMatrix(self.dates[lo:hi], self.balls[lo:hi], self.bonus[lo:hi])
+
+    def since(self, start):
+        return self.between(start=start)
+
+    def rolling_counts(self, window):
+        """(draws x 51): how often each number came up in the `window` draws ending at each draw"""
+        prefix = self.prefix_counts()
+        lagged = np.vstack([np.zeros((window, NUMBERS + 1), dtype=np.int32), prefix])[:len(prefix)]
+        return (prefix - lagged)[1:]
+
+
+class FrequencyStats:
+    """Number statistics over a DrawMatrix, kept current as draws are appended to it"""
+
+    def __init__(self, matrix, windows=(10, 25, 50)):
+        self.matrix = matrix
+        self.windows = tuple(windows)
+        self.n = 0
+        self.counts = np.zeros(NUMBERS + 1, dtype=np.int64)
+        self.bonus_counts = np.zeros(NUMBERS + 1, dtype=np.int64)
+        self.last_seen = np.full(NUMBERS + 1, -1, dtype=np.int64)
+        self.window_counts = {w: np.zeros(NUMBERS + 1, dtype=np.int64) for w in self.windows}
+        self.refresh()
+
+    def refresh(self):
+        """Fold in every draw appended to the matrix since the last refresh"""
+        old_n, new_n = self.n, self.matrix.n
+        if new_n == old_n:
+            return
+        balls = self.matrix.balls
+        block = balls[old_n:new_n]
+
+        self.counts += np.bincount(block.ravel(), minlength=NUMBERS + 1)
+        self.bonus_counts += np.bincount(self.matrix.bonus[old_n:new_n], minlength=NUMBERS + 1)
+
+        # Keep the latest draw index each number appeared in
+        rows = np.repeat(np.arange(old_n, new_n), block.shape[1])
+        np.maximum.at(self.last_seen, block.ravel(), rows)
+
+        # Trailing windows: add the new draws that fall inside, drop the ones that slid out
+        for w, counts in self.window_counts.items():
+            old_start, new_start = max(0, old_n - w), max(0, new_n - w)
+            counts += np.bincount(balls[max(old_n, new_start):new_n].ravel(), minlength=NUMBERS + 1)
+            counts -= np.bincount(balls[old_start:min(old_n, new_start)].ravel(), minlength=NUMBERS + 1)
+        self.n = new_n
+
+    def append(self, date, numbers, bonus=0):
+        """Append a draw to the matrix and update the statistics"""
+        self.matrix.append(date, numbers, bonus)
+        self.refresh()
+
+    def gaps(self):
+        """Draws since each number last came up (the full draw count if it never has)"""
+        return np.where(self.last_seen >= 0, self.n - 1 - self.last_seen, self.n)
+
+    def counter(self):
+        """Number frequencies as a Counter, like the original pandas/Counter analysis"""
+        return Counter({int(k): int(self.counts[k]) for k in np.nonzero(self.counts)[0]})
+
+    def top(self, k=7):
+        """The k most frequent numbers, most frequent first (ties go to the lower number)"""
+        order = np.lexsort((np.arange(NUMBERS + 1), -self.counts))
+        return [int(n) for n in order if n != 0][:k]
+
+
+# Every (a, b) with 1 <= a < b <= 50 gets a slot; PAIR_SLOT[a, b] is its column
+PAIRS = np.array([(a, b) for a in range(1, NUMBERS + 1) for b in range(a + 1, NUMBERS + 1)], dtype=np.uint8)
+PAIR_SLOT = np.full((NUMBERS + 1, NUMBERS + 1), -1, dtype=np.int32)
+PAIR_SLOT[PAIRS[:, 0], PAIRS[:, 1]] = np.arange(len(PAIRS))
+
+# Positions within a sorted draw that form its 21 pairs and 35 triples
+DRAW_PAIRS = np.array(list(combinations(range(BALLS), 2)))
+DRAW_TRIPLES = np.array(list(combinations(range(BALLS), 3)))
+
+
+def triple_key(a, b, c):
+    """Integer id of a sorted triple a < b < c"""
+    base = NUMBERS + 1
+    return (a.astype(np.int32) * base + b) * base + c
+
+
+def triple_from_key(key):
+    base = NUMBERS + 1
+    return int(key // (base * base)), int(key // base % base), int(key % base)
+
+
+class CooccurrenceIndex:
+    """Pair and triple co-occurrence counts over the draw history, queryable by date window.
+
+    Pairs are kept as cumulative counts per draw ((draws + 1) x 1225), so the 50x50 pair
+    matrix of any window is one row difference. Triples are sparse: each draw keeps the
+    ids of its 35 triples and a window's counts come from the slice of those rows.
+    """
+
+    def __init__(self, dates=None, pair_prefix=None, triples=None):
+        self.dates = np.asarray(dates if dates is not None else [], dtype="datetime64[D]")
+        if pair_prefix is None:
+            pair_prefix = np.zeros((1, len(PAIRS)), dtype=np.int32)
+        # Both tables have spare rows past the indexed draws, so updates fill them in place
+        self._pair_prefix = np.asarray(pair_prefix, dtype=np.int32)
+        self._triples = np.asarray(triples if triples is not None else np.empty((0, len(DRAW_TRIPLES))),
+                                   dtype=np.int32)
+
+    @property
+    def pair_prefix(self):
+        return self._pair_prefix[:len(self.dates) + 1]
+
+    @property
+    def triples(self):
+        return self._triples[:len(self.dates)]
+
+    def _reserve(self, n):
+        """Make room for n indexed draws, doubling the tables when they run out"""
+        done = len(self.dates)
+        if len(self._pair_prefix) <= n:
+            grown = np.zeros((max(n + 1, 2 * len(self._pair_prefix), 17), len(PAIRS)), dtype=np.int32)
+            grown[:done + 1] = self._pair_prefix[:done + 1]
+            self._pair_prefix = grown
+        if len(self._triples) < n:
+            grown = np.zeros((max(n, 2 * len(self._triples), 16), len(DRAW_TRIPLES)), dtype=np.int32)
+            grown[:done] = self._triples[:done]
+            self._triples = grown
+
+    @classmethod
+    def from_matrix(cls, matrix):
+        index = cls()
+        index.update(matrix)
+        return index
+
+    def __len__(self):
+        return len(self.dates)
+
+    def update(self, matrix):
+        """Index the draws of matrix that are newer than the ones indexed so far.
+
+        Rebuilds from scratch when the indexed history no longer matches the matrix.
+        Returns the number of draws added.
+        """
+        n = len(self.dates)
+        if n > matrix.n or not np.array_equal(self.dates, matrix.dates[:n]):
+            self.__init__()
+            n = 0
+        if n == matrix.n:
+            return 0
+
+        balls = np.sort(matrix.balls[n:], axis=1)
+        slots = PAIR_SLOT[balls[:, DRAW_PAIRS[:, 0]], balls[:, DRAW_PAIRS[:, 1]]]
+        hits = np.zeros((len(balls), len(PAIRS)), dtype=np.int32)
+        hits[np.arange(len(balls))[:, None], slots] = 1
+
+        self._reserve(matrix.n)
+        new = self._pair_prefix[n + 1:matrix.n + 1]
+        np.cumsum(hits, axis=0, dtype=np.int32, out=new)
+        new += self._pair_prefix[n]
+        self._triples[n:matrix.n] = triple_key(
+            balls[:, DRAW_TRIPLES[:, 0]], balls[:, DRAW_TRIPLES[:, 1]], balls[:, DRAW_TRIPLES[:, 2]])
+        self.dates = np.concatenate([self.dates, matrix.dates[n:]])
+        return matrix.n - n
+
+    def window(self, start=None, end=None, last=None):
+        """Draw index range [lo, hi) for start <= date < end, or the last `last` draws"""
+        hi = len(self.dates) if end is None else int(np.searchsorted(self.dates, to_day(end)))
+        lo = 0 if start is None else int(np.searchsorted(self.dates, to_day(start)))
+        if last is not None:
+            lo = max(lo, hi - last)
+        return lo, hi
+
+    def pair_counts(self, start=None, end=None, last=None):
+        """Symmetric 51 x 51 matrix of how often each pair was drawn together in the window"""
+        lo, hi = self.window(start, end, last)
+        counts = self.pair_prefix[hi] - self.pair_prefix[lo]
+        matrix = np.zeros((NUMBERS + 1, NUMBERS + 1), dtype=np.int32)
+        matrix[PAIRS[:, 0], PAIRS[:, 1]] = counts
+        matrix[PAIRS[:, 1], PAIRS[:, 0]] = counts
+        return matrix
+
+    def top_pairs(self, k=10, start=None, end=None, last=None):
+        """[((a, b), count)] for the k most frequent pairs in the window"""
+        lo, hi = self.window(start, end, last)
+        counts = self.pair_prefix[hi] - self.pair_prefix[lo]
+        order = np.lexsort((np.arange(len(counts)), -counts))[:k]
+        return [((int(PAIRS[i, 0]), int(PAIRS[i, 1])), int(counts[i])) for i in order]
+
+    def triple_counts(self, start=None, end=None, last=None):
+        """(triple ids, counts) of every triple drawn in the window"""
+        lo, hi = self.window(start, end, last)
+        return np.unique(self.triples[lo:hi], return_counts=True)
+
+    def top_triples(self, k=10, start=None, end=None, last=None):
+        keys, counts = self.triple_counts(start, end, last)
+        order = np.lexsort((keys, -counts))[:k]
+        return [(triple_from_key(keys[i]), int(counts[i])) for i in order]
+
+    def ticket(self, numbers, start=None, end=None, last=None):
+        """Co-occurrence counts of every pair and triple within one ticket's numbers"""
+        numbers = sorted(int(n) for n in numbers)
+        lo, hi = self.window(start, end, last)
+        pair_counts = self.pair_prefix[hi] - self.pair_prefix[lo]
+        window_triples = self.triples[lo:hi]
+
+        pairs = {pair: int(pair_counts[PAIR_SLOT[pair]]) for pair in combinations(numbers, 2)}
+        triples = {}
+        for triple in combinations(numbers, 3):
+            key = triple_key(*(np.int32(n) for n in triple))
+            triples[triple] = int(np.count_nonzero(window_triples == key))
+        return {"pairs": pairs, "triples": triples}
+
+    def save(self, path):
+        np.savez(path, dates=self.dates, pair_prefix=self.pair_prefix, triples=self.triples)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["dates"], data["pair_prefix"], data["triples"])
@@ -1,79 +1,164 @@
+import argparse
 import json
 import csv
+import os
 from datetime import datetime
 
-def format_lottery_data(json_file):
-    # Read JSON file
+from columnar import COLUMNAR_DIR, TABLES, ColumnarBuilder, export_columnar, save_columnar
+from results_store import STORE_PATH, ResultsStore
+
+JSON_FILE = 'lottery_results_final.json'
+CSV_FILE = 'lottery_results.csv'
+
+
+def main_number(i):
+    # Same defaults as indexing main_numbers with a padded list: a missing key gives '',
+    # a short list raises and the draw is skipped
+    padding = [''] * (i + 1)
+    return lambda data, main_draw, statistics, max_millions: main_draw.get('main_numbers', padding)[i]
+
+
+def main_draw_field(key):
+    return lambda data, main_draw, statistics, max_millions: main_draw.get(key, '')
+
+
+def stat(title, default='N/A'):
+    return lambda data, main_draw, statistics, max_millions: statistics.get(title, {}).get('main_stat', default)
+
+
+def max_millions_numbers(data, main_draw, statistics, max_millions):
+    results = max_millions.get('results', [])
+    return '|'.join([','.join(result['numbers']) for result in results]) if results else ''
+
+
+# (CSV header, extractor) for every column, in order. Extractors get the record and its
+# main_draw / statistics / max_millions sub-dicts, which are looked up once per draw.
+COLUMNS = [
+    ('Date', lambda data, main_draw, statistics, max_millions: data.get('date', '')),
+    ('Draw Date', main_draw_field('draw_date')),
+    *[(f'Main Numbers {i + 1}', main_number(i)) for i in range(7)],
+    ('Bonus Number', main_draw_field('bonus_number')),
+    ('Jackpot', main_draw_field('jackpot')),
+    ('Prize Breakdown', lambda data, main_draw, statistics, max_millions: json.dumps(data.get('prize_breakdown', []))),
+    ('Total Sales', stat('Total Sales')),
+    ('Tickets Sold', stat('Tickets Sold')),
+    ('Total Winners', stat('Total Winners')),
+    ('Winning Ratio', stat('Winning Ratio')),
+    ('Sales Difference', stat('Sales Difference (From previous draw)')),
+    ('Millions Count', lambda data, main_draw, statistics, max_millions: max_millions.get('count', '0')),
+    ('Max Millions Numbers', max_millions_numbers),
+    ('Max Millions Next Draw', stat('Max Millions for the next draw:', '0')),
+]
+
+CSV_HEADER = [header for header, _ in COLUMNS]
+ROW_EXTRACTORS = [extract for _, extract in COLUMNS]
+
+
+def build_row(data):
+    """CSV row for one scraped draw record"""
+    main_draw = data.get('main_draw', {})
+    statistics = data.get('statistics', {})
+    max_millions = data.get('max_millions', {})
+    return [extract(data, main_draw, statistics, max_millions) for extract in ROW_EXTRACTORS]
+
+
+def iter_json_records(json_file, chunk_size=1 << 16):
+    """Yield the records of a JSON array file one at a time, reading it in chunks"""
+    decoder = json.JSONDecoder()
     with open(json_file, 'r') as f:
-        data_list = json.load(f)
-    
-    print(f"Total records in JSON: {len(data_list)}")
+        buffer = f.read(chunk_size).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError(f"{json_file} does not contain a JSON array")
+        pos = 1
+        eof = False
+
+        while True:
+            # Skip whitespace and the comma between records
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == ']':
+                return
+
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # The next record runs past the buffer: drop what's consumed and read on
+                more = f.read(chunk_size)
+                eof = not more
+                buffer = buffer[pos:] + more
+                pos = 0
+                continue
+
+            yield record
+            pos = end
+
+
+def iter_store_records(store_path=STORE_PATH, after_date=None):
+    """Yield stored records in order, optionally only those stored after after_date.
+
+    Returns None instead of an iterator when after_date isn't in the store.
+    """
+    store = ResultsStore(store_path)
+    after_seq = 0
+    if after_date is not None:
+        after_seq = store.seq_of(after_date)
+        if after_seq is None:
+            store.close()
+            return None
+
+    def records():
+        with store:
+            yield from store.records(after_seq)
+
+    return records()
+
+
+def last_csv_date(csv_file):
+    """Date column of the last row of csv_file, read from the end of the file"""
+    with open(csv_file, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        block = 4096
+        while True:
+            start = max(0, size - block)
+            f.seek(start)
+            tail = f.read(size - start)
+            lines = tail.rstrip(b'\r\n').splitlines()
+            if len(lines) > 1 or start == 0:
+                break
+            block *= 2
+    if not lines:
+        return None
+    row = next(csv.reader([lines[-1].decode()]))
+    if not row or row[0] == CSV_HEADER[0]:
+        return None
+    return row[0]
+
+
+def feed(records, builder):
+    """Pass records through unchanged, adding each one to the typed dataset builder"""
+    for record in records:
+        if builder is not None:
+            builder.add(record)
+        yield record
+
+
+def write_rows(records, csv_file=CSV_FILE, append=False):
+    """Stream records into csv_file, one row at a time; returns (processed, skipped)"""
     processed = 0
     skipped = []
-    
-    # Create single CSV file
-    with open('lottery_results.csv', 'w', newline='') as f:
+
+    with open(csv_file, 'a' if append else 'w', newline='') as f:
         writer = csv.writer(f)
-        
-        # Write header
-        writer.writerow([
-            'Date',
-            'Draw Date',
-            'Main Numbers 1',
-            'Main Numbers 2',
-            'Main Numbers 3',
-            'Main Numbers 4',
-            'Main Numbers 5',
-            'Main Numbers 6',
-            'Main Numbers 7',
-            'Bonus Number',
-            'Jackpot',
-            'Prize Breakdown',
-            'Total Sales',
-            'Tickets Sold',
-            'Total Winners',
-            'Winning Ratio',
-            'Sales Difference',
-            'Millions Count',
-            'Max Millions Numbers',
-            'Max Millions Next Draw',  
-        ])
-        
+        if not append:
+            writer.writerow(CSV_HEADER)
+
         # Write each result as a row
-        for index, data in enumerate(data_list):
+        for index, data in enumerate(records):
             try:
-                # Format max millions numbers
-                max_millions_numbers = '|'.join([
-                    ','.join(result['numbers']) 
-                    for result in data.get('max_millions', {}).get('results', [])
-                ]) if data.get('max_millions', {}).get('results') else ''
-                
-                # Get statistics with default values
-                statistics = data.get('statistics', {})
-                
-                main_row = [
-                    data.get('date', ''),                                         # Date
-                    data.get('main_draw', {}).get('draw_date', ''),              # Draw Date
-                    data.get('main_draw', {}).get('main_numbers', [''])[0],      # Main Numbers 1
-                    data.get('main_draw', {}).get('main_numbers', ['', ''])[1],  # Main Numbers 2
-                    data.get('main_draw', {}).get('main_numbers', ['', '', ''])[2],  # Main Numbers 3
-                    data.get('main_draw', {}).get('main_numbers', ['', '', '', ''])[3],  # Main Numbers 4
-                    data.get('main_draw', {}).get('main_numbers', ['', '', '', '', ''])[4],  # Main Numbers 5
-                    data.get('main_draw', {}).get('main_numbers', ['', '', '', '', '', ''])[5],  # Main Numbers 6
-                    data.get('main_draw', {}).get('main_numbers', [''] * 7)[6],  # Main Numbers 7
-                    data.get('main_draw', {}).get('bonus_number', ''),           # Bonus Number
-                    data.get('main_draw', {}).get('jackpot', ''),               # Jackpot
-                    json.dumps(data.get('prize_breakdown', [])),                 # Prize Breakdown
-                    statistics.get('Total Sales', {}).get('main_stat', 'N/A'),   # Total Sales
-                    statistics.get('Tickets Sold', {}).get('main_stat', 'N/A'),  # Tickets Sold
-                    statistics.get('Total Winners', {}).get('main_stat', 'N/A'), # Total Winners
-                    statistics.get('Winning Ratio', {}).get('main_stat', 'N/A'), # Winning Ratio
-                    statistics.get('Sales Difference (From previous draw)', {}).get('main_stat', 'N/A'),  # Sales Difference
-                    data.get('max_millions', {}).get('count', '0'),             # Millions Count
-                    max_millions_numbers,                                        # Max Millions Numbers
-                    statistics.get('Max Millions for the next draw:', {}).get('main_stat', '0')  # Max Millions Next Draw
-                ]
-                writer.writerow(main_row)
+                writer.writerow(build_row(data))
                 processed += 1
             except Exception as e:
                 skipped.append({
@@ -81,7 +166,11 @@ def format_lottery_data(json_file):
                     'date': data.get('date', 'Unknown'),
                     'error': str(e)
                 })
-    
+
+    return processed, skipped
+
+
+def print_summary(processed, skipped):
     print(f"\nProcessing Summary:")
     print(f"Total processed: {processed}")
     print(f"Total skipped: {len(skipped)}")
@@ -90,5 +179,76 @@ def format_lottery_data(json_file):
         for entry in skipped:
             print(f"Index {entry['index']}, Date: {entry['date']}, Error: {entry['error']}")
 
+
+def format_lottery_data(json_file, csv_file=CSV_FILE, columnar_dir=COLUMNAR_DIR):
+    """Rewrite csv_file (and the typed dataset) from a results JSON file, one record at a time"""
+    builder = ColumnarBuilder() if columnar_dir else None
+    processed, skipped = write_rows(feed(iter_json_records(json_file), builder), csv_file)
+    print(f"Total records in JSON: {processed + len(skipped)}")
+    print_summary(processed, skipped)
+    if builder is not None:
+        save_columnar(builder, columnar_dir)
+
+
+def format_store(store_path=STORE_PATH, csv_file=CSV_FILE, columnar_dir=COLUMNAR_DIR):
+    """Rewrite csv_file (and the typed dataset) from the results store"""
+    builder = ColumnarBuilder() if columnar_dir else None
+    processed, skipped = write_rows(feed(iter_store_records(store_path), builder), csv_file)
+    print(f"Total records in store: {processed + len(skipped)}")
+    print_summary(processed, skipped)
+    if builder is not None:
+        save_columnar(builder, columnar_dir)
+
+
+def append_new_draws(store_path=STORE_PATH, csv_file=CSV_FILE, columnar_dir=COLUMNAR_DIR):
+    """Append rows for the draws stored since the last row of csv_file.
+
+    Falls back to a full rewrite when the CSV is missing or its last draw isn't stored.
+    The typed dataset is rebuilt from the store whenever rows were added or a table is missing.
+    """
+    last_date = last_csv_date(csv_file) if os.path.exists(csv_file) else None
+    records = iter_store_records(store_path, last_date) if last_date else None
+    if records is None:
+        print(f"Can't resume {csv_file}, rewriting it from {store_path}")
+        format_store(store_path, csv_file, columnar_dir)
+        return
+
+    processed, skipped = write_rows(records, csv_file, append=True)
+    print(f"New records since {last_date}: {processed + len(skipped)}")
+    print_summary(processed, skipped)
+
+    if columnar_dir and (processed or not all(os.path.exists(os.path.join(columnar_dir, f"{name}.npz"))
+                                              for name in TABLES)):
+        export_columnar(iter_store_records(store_path), columnar_dir)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Format scraped results into lottery_results.csv")
+    parser.add_argument("--source", default=JSON_FILE,
+                        help=f"results JSON file or .db store to read (default: {JSON_FILE})")
+    parser.add_argument("--append", action="store_true",
+                        help="only append the draws stored since the last CSV row (reads --store)")
+    parser.add_argument("--store", default=STORE_PATH,
+                        help=f"results store used by --append (default: {STORE_PATH})")
+    parser.add_argument("--output", default=CSV_FILE)
+    parser.add_argument("--columnar-dir", default=COLUMNAR_DIR,
+                        help=f"directory for the typed NumPy/Parquet dataset (default: {COLUMNAR_DIR})")
+    parser.add_argument("--no-columnar", action="store_true",
+                        help="only write the CSV")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    columnar_dir = None if args.no_columnar else args.columnar_dir
+    if args.append:
+        append_new_draws(args.store, args.output, columnar_dir)
+    elif args.source.endswith('.db'):
+        format_store(args.source, args.output, columnar_dir)
+    else:
+        format_lottery_data(args.source, args.output, columnar_dir)
+
+
 # Usage
-format_lottery_data('lottery_results_final.json')
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""Off-screen heatmap rendering for recommender.plot_lottery_heatmap.
+
+HeatmapRenderer builds one Agg figure (grid image, colorbar and the 50 cell labels) and
+re-renders it for every heatmap by updating the data, color limits and labels, instead of
+building a pyplot figure per image. Resolution comes from a preset; "full" matches the
+published 500 dpi images.
+
+    python heatmap.py --per-year --preset preview --workers 4
+    python heatmap.py --windows 25 50 100 --out heatmaps
+    python heatmap.py --benchmark 5
+"""
+import argparse
+import os
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+from recommender import CSV_FILE, grid_positions
+
+# name -> (dpi, bbox_inches); "tight" trims the margins at the cost of an extra layout pass
+PRESETS = {
+    "full": (500, "tight"),
+    "standard": (200, "tight"),
+    "preview": (100, None),
+    "thumbnail": (50, None),
+}
+
+TITLE = 'Lotto Max Frequency Heatmap'
+
+
+class HeatmapRenderer:
+    """One reusable off-screen figure for the frequency heatmap"""
+
+    def __init__(self, preset="standard"):
+        import numpy as np
+        from matplotlib import colormaps
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        self.np = np
+        self.dpi, self.bbox_inches = PRESETS[preset]
+        self.cmap = colormaps['YlOrRd']
+        self.figure = Figure(figsize=(10, 5))
+        FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot()
+        self.image = self.ax.imshow(np.zeros((10, 5)), cmap=self.cmap)
+        self.figure.colorbar(self.image, ax=self.ax, label='Frequency')
+        self.labels = {number: self.ax.text(col - 1, row - 1, '', ha='center', va='center')
+                       for number, (row, col) in grid_positions.items()}
+        self.title = self.ax.set_title(TITLE)
+
+    def render(self, freq_data, path, title=TITLE):
+        """Draw freq_data ({number: count}) and save it to path"""
+        heatmap_data = self.np.zeros((10, 5))
+        for number, freq in freq_data.items():
+            if number in grid_positions:
+                row, col = grid_positions[number]
+                heatmap_data[row - 1, col - 1] = freq
+        max_freq = max(freq_data.values()) if freq_data else 0
+
+        self.image.set_data(heatmap_data)
+        self.image.set_clim(heatmap_data.min(), heatmap_data.max())
+        for number, label in self.labels.items():
+            if number in freq_data:
+                row, col = grid_positions[number]
+                current_color = self.cmap(heatmap_data[row - 1, col - 1] / max_freq if max_freq else 0.0)
+                label.set_text(f'{number}\n({freq_data[number]})')
+                label.set_color((1 - current_color[0], 1 - current_color[1], 1 - current_color[2]))
+                label.set_visible(True)
+            else:
+                label.set_visible(False)
+        self.title.set_text(title)
+
+        self.figure.savefig(path, dpi=self.dpi, transparent=False, facecolor='white',
+                            bbox_inches=self.bbox_inches)
+        return path
+
+
+# Each pool worker keeps one renderer for all the heatmaps it is given
+_renderer = None
+
+
+def init_worker(preset):
+    global _renderer
+    _renderer = HeatmapRenderer(preset)
+
+
+def render_job(job):
+    freq_data, path, title = job
+    return _renderer.render(freq_data, path, title)
+
+
+def render_batch(jobs, preset="standard", workers=1):
+    """Render (freq_data, path, title) jobs, in worker processes when workers > 1"""
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(preset,)) as executor:
+            return list(executor.map(render_job, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    init_worker(preset)
+    return [render_job(job) for job in jobs]
+
+
+def year_jobs(matrix, out_dir):
+    """One heatmap job per calendar year of draws"""
+    from draw_stats import FrequencyStats
+
+    years = sorted({int(str(date)[:4]) for date in matrix.dates})
+    return [(FrequencyStats(matrix.between(f"{year}-01-01", f"{year + 1}-01-01")).counter(),
+             os.path.join(out_dir, f"{year}_heatmap.jpg"), f"{TITLE} ({year})")
+            for year in years]
+
+
+def window_jobs(matrix, windows, out_dir):
+    """One heatmap job per trailing window of the latest draws"""
+    from draw_stats import DrawMatrix, FrequencyStats
+
+    jobs = []
+    for window in windows:
+        recent = DrawMatrix(matrix.dates[-window:], matrix.balls[-window:], matrix.bonus[-window:])
+        jobs.append((FrequencyStats(recent).counter(), os.path.join(out_dir, f"last_{window}_heatmap.jpg"),
+                     f"{TITLE} (last {window} draws)"))
+    return jobs
+
+
+def peak_rss_mb():
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(render, images):
+    """(seconds per image, peak traced bytes of one image); timing runs without tracemalloc"""
+    start = time.perf_counter()
+    for i in range(images):
+        render(i)
+    seconds = (time.perf_counter() - start) / images
+    tracemalloc.start()
+    render(images)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def benchmark(freq_data, images=5, out_dir="/tmp"):
+    """Per-image time and peak Python memory of the pyplot path and each renderer preset.
+
+    Renderer times are for re-renders of one figure; building it and drawing the first
+    image are reported separately.
+    """
+    from datetime import datetime
+
+    import recommender
+
+    results = {}
+    os.makedirs(os.path.join(out_dir, "recommendation_history"), exist_ok=True)
+    cwd = os.getcwd()
+    os.chdir(out_dir)
+    try:
+        results["pyplot"] = measure(
+            lambda i: recommender.plot_lottery_heatmap(freq_data, datetime(2000, 1, 1 + i)), images) + (None,)
+    finally:
+        os.chdir(cwd)
+
+    for preset in PRESETS:
+        start = time.perf_counter()
+        renderer = HeatmapRenderer(preset)
+        renderer.render(freq_data, os.path.join(out_dir, f"bench_{preset}.jpg"))
+        first = time.perf_counter() - start
+        results[preset] = measure(
+            lambda i: renderer.render(freq_data, os.path.join(out_dir, f"bench_{preset}_{i}.jpg")), images) + (first,)
+
+    for name, (seconds, peak, first) in results.items():
+        dpi = PRESETS[name][0] if name in PRESETS else 500
+        setup = f"  (setup + first image {first * 1000:.0f} ms)" if first else ""
+        print(f"{name:<10} {dpi:>4} dpi  {seconds * 1000:8.1f} ms/image  peak {peak / 1e6:7.1f} MB{setup}")
+    print(f"Process peak RSS: {peak_rss_mb():.0f} MB")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render frequency heatmaps")
+    parser.add_argument("--preset", default="standard", choices=list(PRESETS))
+    parser.add_argument("--per-year", action="store_true", help="one heatmap per year of draws")
+    parser.add_argument("--windows", nargs="*", type=int, default=[],
+                        help="one heatmap per trailing window of this many draws")
+    parser.add_argument("--out", default="heatmaps", help="output directory")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--csv", default=CSV_FILE)
+    parser.add_argument("--benchmark", type=int, default=0, metavar="IMAGES",
+                        help="time the pyplot path and every preset over this many images")
+    args = parser.parse_args(argv)
+
+    from draw_stats import DrawMatrix
+
+    if args.benchmark:
+        from recommender import frequency_data
+        benchmark(frequency_data(args.csv), args.benchmark)
+        return
+
+    matrix = DrawMatrix.from_csv(args.csv)
+    os.makedirs(args.out, exist_ok=True)
+    jobs = (year_jobs(matrix, args.out) if args.per_year else []) + window_jobs(matrix, args.windows, args.out)
+    if not jobs:
+        parser.error("nothing to render: give --per-year and/or --windows")
+
+    start = time.perf_counter()
+    render_batch(jobs, args.preset, args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"Rendered {len(jobs)} heatmaps to {args.out}/ in {elapsed:.2f}s ({elapsed / len(jobs) * 1000:.0f} ms each)")
+
+
+if __name__ == "__main__":
+    main()
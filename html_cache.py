@@ -0,0 +1,161 @@
+"""Content-addressed on-disk cache of raw site responses.
+
+Response bodies are stored once under objects/<sha256>. index.jsonl maps each url to
+the hash of its latest body together with the ETag / Last-Modified validators the
+server sent, so stale entries can be revalidated with a conditional request.
+
+Pages that can no longer change are served straight from the cache: a year archive
+fetched after that year ended, or a draw's detail page fetched a few days after the
+draw (once the prize breakdown has settled).
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+
+CACHE_DIR = "html_cache"
+
+# How long after the period a page covers before its content is treated as final
+SETTLE_AFTER = timedelta(days=3)
+
+YEAR_PAGE = re.compile(r"/numbers/(\d{4})$")
+DETAIL_PAGE = re.compile(r"/lotto-max-result-(\d{2}-\d{2}-\d{4})$")
+
+
+def period_end(url):
+    """Last moment a page's content refers to, or None for pages we can't classify"""
+    match = YEAR_PAGE.search(url)
+    if match:
+        return datetime(int(match.group(1)) + 1, 1, 1)
+    match = DETAIL_PAGE.search(url)
+    if match:
+        return datetime.strptime(match.group(1), "%m-%d-%Y") + timedelta(days=1)
+    return None
+
+
+class CachedResponse:
+    """Stand-in for requests.Response when a page is served from the cache"""
+
+    def __init__(self, content, encoding, status_code=200):
+        self.content = content
+        self.encoding = encoding
+        self.status_code = status_code
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+
+class HtmlCache:
+    """Raw html keyed by url, safe to share between scraper threads"""
+
+    def __init__(self, root=CACHE_DIR):
+        self.root = root
+        self.index_path = os.path.join(root, "index.jsonl")
+        self.lock = threading.Lock()
+        self.entries = {}
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        # Append-only log: the last line for a url wins, and a torn final line is ignored
+        if not os.path.exists(self.index_path):
+            return
+        lines = 0
+        with open(self.index_path, "r") as f:
+            for line in f:
+                lines += 1
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                self.entries[entry["url"]] = entry
+
+        # Revalidations append a line each; rewrite once the log is mostly superseded lines
+        if lines > 2 * len(self.entries) + 100:
+            tmp_path = self.index_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                for entry in self.entries.values():
+                    f.write(json.dumps(entry) + "\n")
+            os.replace(tmp_path, self.index_path)
+
+    def _append_index(self, entry):
+        with self.lock:
+            self.entries[entry["url"]] = entry
+            with open(self.index_path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], digest)
+
+    def __contains__(self, url):
+        return url in self.entries
+
+    def urls(self):
+        return list(self.entries)
+
+    def is_settled(self, url):
+        """True when the cached copy was fetched after the page stopped changing"""
+        entry = self.entries.get(url)
+        end = period_end(url)
+        if not entry or end is None:
+            return False
+        return datetime.fromisoformat(entry["fetched_at"]) >= end + SETTLE_AFTER
+
+    def validators(self, url):
+        """Conditional request headers for revalidating the cached copy of url"""
+        entry = self.entries.get(url)
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def object_path(self, url):
+        """File holding the cached body of url, or None if url isn't cached"""
+        entry = self.entries.get(url)
+        return self._object_path(entry["sha256"]) if entry else None
+
+    def response(self, url):
+        """The cached page as a CachedResponse, or None if url isn't cached"""
+        entry = self.entries.get(url)
+        if not entry:
+            return None
+        try:
+            with open(self._object_path(entry["sha256"]), "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            return None
+        return CachedResponse(content, entry.get("encoding"))
+
+    def get_text(self, url):
+        response = self.response(url)
+        return response.text if response else None
+
+    def store(self, url, content, encoding=None, etag=None, last_modified=None):
+        """Save a 200 response body and its validators"""
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        self._append_index({
+            "url": url,
+            "sha256": digest,
+            "encoding": encoding,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": datetime.now().isoformat(timespec="seconds"),
+        })
+
+    def revalidated(self, url):
+        """Record a 304: the cached body is still current as of now"""
+        entry = dict(self.entries[url])
+        entry["fetched_at"] = datetime.now().isoformat(timespec="seconds")
+        self._append_index(entry)
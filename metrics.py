@@ -0,0 +1,209 @@
+"""Run metrics for the scraper: counters, histograms and structured events.
+
+Instrumented code calls the module-level helpers, which record into one thread-safe
+registry for the process:
+
+    metrics.inc("retries_total", page="detail", reason="status")
+    metrics.observe("fetch_seconds", 0.21, page="detail")
+    with metrics.timed("parse_seconds", section="prize_breakdown"):
+        ...
+    metrics.event("fetch", url=url, status=200, seconds=0.21, bytes=48213)
+
+At the end of a run write() saves everything as <path>.json and as Prometheus text
+exposition in <path>.prom.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+PREFIX = "lottomax_"
+METRICS_PATH = "scrape_metrics"
+
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = (1_000, 10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 5_000_000)
+
+# Events beyond this many are counted but not kept
+MAX_EVENTS = 20_000
+
+# Histograms keep their most recent values, up to this many, for the quantiles
+MAX_VALUES = 100_000
+
+
+def buckets_for(name):
+    return BYTES_BUCKETS if name.endswith("_bytes") else SECONDS_BUCKETS
+
+
+def label_value(value):
+    """A label value escaped for the Prometheus text format: backslash, double quote and newline"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def quantile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0
+        self.max = None
+        self.values = deque(maxlen=MAX_VALUES)
+
+    def observe(self, value):
+        self.values.append(value)
+        self.count += 1
+        self.sum += value
+        if self.max is None or value > self.max:
+            self.max = value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def summary(self):
+        values = self.values
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": quantile(values, 0.5),
+            "p95": quantile(values, 0.95),
+            "p99": quantile(values, 0.99),
+            "max": self.max,
+            "buckets": dict(zip(map(str, self.buckets), self.counts)),
+        }
+
+
+class Registry:
+    def __init__(self, buckets=None):
+        # {metric name: histogram bucket bounds}, for metrics the default buckets don't fit
+        self.buckets = buckets or {}
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = time.time()
+            self.counters = {}
+            self.histograms = {}
+            self.events = []
+            self.dropped_events = 0
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram(self.buckets.get(name) or buckets_for(name))
+            self.histograms[key].observe(value)
+
+    @contextmanager
+    def timed(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def event(self, kind, **fields):
+        with self.lock:
+            if len(self.events) < MAX_EVENTS:
+                self.events.append({"event": kind, "time": round(time.time() - self.started, 4), **fields})
+            else:
+                self.dropped_events += 1
+
+    def snapshot(self):
+        """Everything recorded so far as one JSON-serializable dict"""
+        with self.lock:
+            fetches = [e for e in self.events if e["event"] == "fetch" and "seconds" in e]
+            return {
+                "started": datetime.fromtimestamp(self.started, timezone.utc).isoformat(timespec="seconds"),
+                "duration_seconds": round(time.time() - self.started, 3),
+                "counters": [{"name": name, "labels": dict(labels), "value": value}
+                             for (name, labels), value in sorted(self.counters.items())],
+                "histograms": [{"name": name, "labels": dict(labels), **histogram.summary()}
+                               for (name, labels), histogram in sorted(self.histograms.items())],
+                "slowest_fetches": sorted(fetches, key=lambda e: -e["seconds"])[:20],
+                "events": list(self.events),
+                "dropped_events": self.dropped_events,
+            }
+
+    def prometheus(self):
+        """Prometheus text exposition of the counters and histograms"""
+        def label_text(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{label_value(v)}"' for k, v in pairs) + "}"
+
+        lines = []
+        with self.lock:
+            typed = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                metric = PREFIX + name
+                if metric not in typed:
+                    lines.append(f"# TYPE {metric} counter")
+                    typed.add(metric)
+                lines.append(f"{metric}{label_text(labels)} {value}")
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                metric = PREFIX + name
+                if metric not in typed:
+                    lines.append(f"# TYPE {metric} histogram")
+                    typed.add(metric)
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    lines.append(f"{metric}_bucket{label_text(labels, [('le', bound)])} {count}")
+                lines.append(f"{metric}_bucket{label_text(labels, [('le', '+Inf')])} {histogram.count}")
+                lines.append(f"{metric}_sum{label_text(labels)} {histogram.sum}")
+                lines.append(f"{metric}_count{label_text(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path=METRICS_PATH):
+        """Write <path>.json and <path>.prom; returns the two file names"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        json_path, prom_path = f"{path}.json", f"{path}.prom"
+        with open(json_path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        with open(prom_path, "w") as f:
+            f.write(self.prometheus())
+        return json_path, prom_path
+
+    def print_summary(self):
+        """One line per histogram, slowest mean first"""
+        with self.lock:
+            rows = [(name, dict(labels), histogram.summary()) for (name, labels), histogram in self.histograms.items()]
+        print("\nMetrics summary:")
+        for name, labels, s in sorted(rows, key=lambda row: -(row[2]["mean"] or 0)):
+            label_text = ",".join(f"{k}={v}" for k, v in labels.items())
+            unit = "B" if name.endswith("_bytes") else "s"
+            print(f"  {name}[{label_text}] n={s['count']} mean={s['mean']:.4g}{unit} "
+                  f"p95={s['p95']:.4g}{unit} max={s['max']:.4g}{unit}")
+        with self.lock:
+            counters = sorted(self.counters.items())
+        for (name, labels), value in counters:
+            label_text = ",".join(f"{k}={v}" for k, v in labels)
+            print(f"  {name}[{label_text}] {value}")
+
+
+REGISTRY = Registry()
+
+inc = REGISTRY.inc
+observe = REGISTRY.observe
+timed = REGISTRY.timed
+event = REGISTRY.event
+write = REGISTRY.write
+reset = REGISTRY.reset
+print_summary = REGISTRY.print_summary
@@ -0,0 +1,111 @@
+"""Parsing of the display strings the site uses for money, counts and percentages.
+
+Every parser returns None when the text holds no value (e.g. "", "-", "N/A" or
+"Free Play Ticket") so callers can pick their own missing-value marker.
+normalize_record() turns a record's prize breakdown and provincial results into
+rows of ints, once, for the store's normalized tables.
+"""
+import re
+
+MONEY = re.compile(r"\$\s*(\d[\d,]*)(?:\.(\d{1,2}))?")
+COUNT = re.compile(r"\d[\d,]*")
+PERCENT = re.compile(r"([+-]?\d+(?:\.\d+)?)\s*%")
+# "Ontario: 2" lines inside a tier's winners text; some pages list winners under no name (": 1")
+REGION_WINNERS = re.compile(r"^[^\S\n]*([A-Za-z][A-Za-z .'-]*?)?[^\S\n]*:[^\S\n]*(\d[\d,]*)[^\S\n]*$", re.MULTILINE)
+UNKNOWN_REGION = "Unknown"
+CARRIED_OVER = re.compile(r"\s*Carried Over", re.IGNORECASE)
+FREE_PLAY = re.compile(r"Free Play", re.IGNORECASE)
+
+# The tiers in prize order; tier codes in the typed datasets index into this list
+TIER_NAMES = [
+    "Match 7",
+    "Match 6 plus Bonus",
+    "Match 6",
+    "Match 5 plus Bonus",
+    "Match 5",
+    "Match 4 plus Bonus",
+    "Match 4",
+    "Match 3 plus Bonus",
+    "Match 3",
+]
+
+# Regions of the provincial results; codes in the typed datasets index into this list
+PROVINCES = [
+    "Atlantic Canada",
+    "British Columbia",
+    "Ontario",
+    "Quebec",
+    "Western Canada",
+]
+
+
+def money_to_cents(text):
+    """'$25,000,000' -> 2500000000, '$91.80' -> 9180"""
+    match = MONEY.search(text or "")
+    if not match:
+        return None
+    dollars, cents = match.groups()
+    return int(dollars.replace(",", "")) * 100 + int((cents or "0").ljust(2, "0"))
+
+
+def parse_count(text):
+    """First integer in text: '5,039,394' -> 5039394, 'Carried Over -  0' -> 0"""
+    match = COUNT.search(text or "")
+    return int(match.group(0).replace(",", "")) if match else None
+
+
+def parse_percent(text):
+    """'15.0%' -> 15.0, '+18.16%' -> 18.16"""
+    match = PERCENT.search(text or "")
+    return float(match.group(1)) if match else None
+
+
+def parse_ball(text):
+    """A ball number as an int, or None"""
+    text = (text or "").strip()
+    return int(text) if text.isdigit() else None
+
+
+def parse_winners(text):
+    """A tier's winners text -> (winners, carried over, [(region, winners)]).
+
+    '3\\r\\n\\t...\\n\\nOntario: 2\\n\\n\\nBritish Columbia: 1' -> (3, False, [('Ontario', 2), ('British Columbia', 1)])
+    '2\\n\\nOntario: 1\\n\\n\\n: 1' -> (2, False, [('Ontario', 1), ('Unknown', 1)])
+    'Carried Over -  0' -> (0, True, [])
+    """
+    text = text or ""
+    regions = [(name or UNKNOWN_REGION, int(count.replace(",", ""))) for name, count in REGION_WINNERS.findall(text)]
+    return parse_count(text), CARRIED_OVER.match(text) is not None, regions
+
+
+def parse_tier(tier):
+    """One prize breakdown entry -> (tier, prize_cents, winners, fund_cents, carried_over, free_play, regions)
+
+    The one parser of tier entries: the typed records and the store's tables both use it.
+    """
+    prize = tier.get("prize_per_winner") or ""
+    winners, carried_over, regions = parse_winners(tier.get("winners"))
+    return (tier.get("match_type", "").strip(), money_to_cents(prize), winners,
+            money_to_cents(tier.get("prize_fund")), carried_over, FREE_PLAY.search(prize) is not None, regions)
+
+
+def parse_province(province):
+    """One provincial results entry -> (region, winners, amount_cents)"""
+    return (province.get("province", "").strip(), parse_count(province.get("winners")),
+            money_to_cents(province.get("amount_won")))
+
+
+def normalize_record(record):
+    """Rows of a record's prize breakdown and provincial results:
+
+    - tiers: (tier, prize_cents, winners, fund_cents, carried_over, free_play)
+    - regions: (tier, region, winners), one per region listed under a tier's winners
+    - provinces: (region, winners, amount_cents)
+    """
+    tiers, regions = [], []
+    for tier in record.get("prize_breakdown") or []:
+        *row, listed = parse_tier(tier)
+        tiers.append(tuple(row))
+        regions.extend((row[0], region, count) for region, count in listed)
+    provinces = [parse_province(p) for p in record.get("provincial_stats") or []]
+    return {"tiers": tiers, "regions": regions, "provinces": provinces}
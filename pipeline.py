@@ -0,0 +1,209 @@
+"""Single entry point for the scheduled job: scrape -> export / format -> recommend.
+
+Each stage declares the files it reads and writes. After a stage succeeds, the content
+hashes of both are recorded in pipeline_state.json; on the next run a stage is skipped
+when its inputs hash the same and its outputs are still as it left them. Stages whose
+dependencies are done run in parallel, e.g. the JSON export and the CSV formatter.
+
+The scrape stage always runs, since its real input is the website. When it finds no
+new draws the store is unchanged and every later stage is skipped.
+
+    python pipeline.py                 # run what's needed
+    python pipeline.py --skip-scrape   # only rebuild outputs from local data
+    python pipeline.py --force recommend
+    python pipeline.py --dry-run       # show what would run
+"""
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+STATE_FILE = "pipeline_state.json"
+# File hashes by mtime and size, so unchanged files aren't re-read; local to each checkout
+HASH_CACHE = ".pipeline_hashes.json"
+
+
+class Stage:
+    def __init__(self, name, command, inputs, outputs, deps=(), always=False):
+        self.name = name
+        self.command = command
+        self.inputs = inputs
+        self.outputs = outputs
+        self.deps = tuple(deps)
+        self.always = always
+
+
+STAGES = [
+    Stage("scrape", ["scrape.py"],
+          inputs=["scrape.py", "async_scrape.py", "html_cache.py", "results_store.py"],
+          outputs=["lottery_results.db", "lottery_dates.json"], always=True),
+    Stage("export-json", ["results_store.py", "export-json"],
+          inputs=["lottery_results.db", "results_store.py"],
+          outputs=["lottery_results_final.json"], deps=["scrape"]),
+    # The typed dataset in lottery_columnar/ is rebuilt alongside the CSV; it isn't tracked
+    # as an output because it is not kept in the repository
+    Stage("format", ["formatter.py", "--append"],
+          inputs=["lottery_results.db", "formatter.py", "columnar.py", "normalize.py"],
+          outputs=["lottery_results.csv"], deps=["scrape"]),
+    Stage("recommend", ["recommender.py"],
+          inputs=["lottery_results.csv", "lottery_dates.json", "recommender.py", "heatmap.py", "draw_stats.py"],
+          outputs=["recommendation_history"], deps=["format"]),
+]
+
+
+class Hasher:
+    """sha256 of files and directories, reusing the previous hash while mtime and size match"""
+
+    def __init__(self, cache=None):
+        self.cache = cache or {}
+
+    def file(self, path):
+        st = os.stat(path)
+        cached = self.cache.get(path)
+        if cached and cached["mtime_ns"] == st.st_mtime_ns and cached["size"] == st.st_size:
+            return cached["sha256"]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        self.cache[path] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": digest.hexdigest()}
+        return digest.hexdigest()
+
+    def path(self, path):
+        """Hash of a file, of a directory's files and names, or None when path is missing"""
+        if os.path.isfile(path):
+            return self.file(path)
+        if not os.path.isdir(path):
+            return None
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                full = os.path.join(root, name)
+                digest.update(os.path.relpath(full, path).encode() + b"\0" + self.file(full).encode())
+        return digest.hexdigest()
+
+    def paths(self, paths):
+        return {path: self.path(path) for path in paths}
+
+
+def load_json(path, default):
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            return json.load(f)
+    return default
+
+
+def save_json(data, path):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+
+def is_current(stage, state, hasher):
+    """True when the stage's inputs and outputs hash as they did after its last run"""
+    recorded = state["stages"].get(stage.name)
+    if not recorded:
+        return False
+    return (recorded["inputs"] == hasher.paths(stage.inputs)
+            and recorded["outputs"] == hasher.paths(stage.outputs))
+
+
+def run_stage(stage):
+    """Run the stage's command; returns (exit code, output, seconds)"""
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable] + stage.command, stdout=subprocess.PIPE,
+                             stderr=subprocess.STDOUT, text=True)
+    return process.returncode, process.stdout, time.perf_counter() - start
+
+
+def run_pipeline(stages=STAGES, state_file=STATE_FILE, force=(), skip=(), dry_run=False, workers=4):
+    """Run the stages in dependency order; returns {stage: (status, seconds)}"""
+    state = load_json(state_file, {"stages": {}})
+    hasher = Hasher(load_json(HASH_CACHE, {}))
+    by_name = {stage.name: stage for stage in stages}
+    report = {}
+    # A stage has to run when forced, when it always runs, when a dependency produced
+    # new outputs, or when its own inputs/outputs changed since its last run
+    changed = set()
+
+    def decide(stage):
+        if stage.name in skip:
+            return "skipped"
+        if any(report[dep][0] in ("failed", "blocked") for dep in stage.deps):
+            return "blocked"
+        if stage.name in force or stage.always or changed & set(stage.deps):
+            return "run"
+        return "run" if not is_current(stage, state, hasher) else "up to date"
+
+    pending = list(stages)
+    running = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while pending or running:
+            for stage in [s for s in pending if all(dep in report for dep in s.deps if dep in by_name)]:
+                pending.remove(stage)
+                decision = decide(stage)
+                if decision != "run" or dry_run:
+                    report[stage.name] = ("would run" if dry_run and decision == "run" else decision, 0.0)
+                    if dry_run and decision == "run":
+                        changed.add(stage.name)
+                    continue
+                print(f"[{stage.name}] running {' '.join(stage.command)}")
+                before = hasher.paths(stage.outputs)
+                running[executor.submit(run_stage, stage)] = (stage, before)
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, before = running.pop(future)
+                code, output, seconds = future.result()
+                if output.strip():
+                    print("\n".join(f"[{stage.name}] {line}" for line in output.rstrip().splitlines()))
+                if code != 0:
+                    report[stage.name] = ("failed", seconds)
+                    continue
+                outputs = hasher.paths(stage.outputs)
+                if outputs != before:
+                    changed.add(stage.name)
+                state["stages"][stage.name] = {"inputs": hasher.paths(stage.inputs), "outputs": outputs}
+                report[stage.name] = ("ran" if outputs != before else "ran, no changes", seconds)
+
+    if not dry_run:
+        save_json(state, state_file)
+        save_json(hasher.cache, HASH_CACHE)
+    return report
+
+
+def print_report(report, total):
+    print(f"\n{'Stage':<12} {'Status':<16} {'Time':>8}")
+    for name, (status, seconds) in report.items():
+        print(f"{name:<12} {status:<16} {seconds:>7.2f}s")
+    print(f"{'total':<12} {'':<16} {total:>7.2f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the scrape -> format -> recommend pipeline")
+    names = [stage.name for stage in STAGES]
+    parser.add_argument("--force", nargs="+", default=[], choices=names, help="run these stages regardless")
+    parser.add_argument("--skip-scrape", action="store_true", help="don't contact the website")
+    parser.add_argument("--dry-run", action="store_true", help="only report which stages would run")
+    parser.add_argument("--state", default=STATE_FILE)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    report = run_pipeline(STAGES, args.state, set(args.force), {"scrape"} if args.skip_scrape else set(),
+                          args.dry_run)
+    print_report(report, time.perf_counter() - start)
+    if any(status in ("failed", "blocked") for status, _ in report.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
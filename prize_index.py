@@ -0,0 +1,238 @@
+"""Prize winners by tier, region and draw over the whole history.
+
+Built from the store's normalized tables (or from records, normalized on the fly) into
+dense arrays with cumulative sums along the draws. Every query is a lookup:
+
+- winners of a tier, overall or in one region, over any date range
+- the same by year
+- the regional split of a tier
+- carry-over streaks of a tier
+
+    index = PrizeIndex.load("lottery_results.db")
+    index.by_year("Match 6 plus Bonus", "Ontario")
+    index.carry_over_streaks("Match 7", min_length=5)
+
+    python prize_index.py --tier "Match 6 plus Bonus" --region Ontario
+    python prize_index.py --streaks --min-length 5
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+from normalize import PROVINCES, TIER_NAMES, normalize_record
+from results_store import LEGACY_JSON, STORE_PATH, sortable_day
+
+MISSING = -1
+
+
+def codes(names, known):
+    """{name: code} for the known names first, then the others in sorted order"""
+    order = list(known) + sorted(set(names) - set(known))
+    return {name: code for code, name in enumerate(order)}
+
+
+def cumulative(values):
+    """Cumulative sums along the last axis, with a leading zero"""
+    out = np.zeros(values.shape[:-1] + (values.shape[-1] + 1,), dtype=np.int64)
+    np.cumsum(values, axis=-1, out=out[..., 1:])
+    return out
+
+
+class PrizeIndex:
+    """Tier and region winners per draw as (tier x draw) and (tier x region x draw) arrays"""
+
+    def __init__(self, days, tier_rows, region_rows, province_rows):
+        self.days = np.array(sorted(set(days)), dtype="datetime64[D]")
+        draw_of = {str(day): i for i, day in enumerate(self.days)}
+        n = len(self.days)
+        self.tiers = codes((row[1] for row in tier_rows), TIER_NAMES)
+        self.regions = codes([row[2] for row in region_rows] + [row[1] for row in province_rows], PROVINCES)
+        shape = (len(self.tiers), n)
+
+        self.winners = np.full(shape, MISSING, dtype=np.int64)
+        self.prize_cents = np.full(shape, MISSING, dtype=np.int64)
+        self.carried_over = np.zeros(shape, dtype=bool)
+        for day, tier, prize, winners, fund, carried_over, free_play in tier_rows:
+            t, d = self.tiers[tier], draw_of[day]
+            self.winners[t, d] = MISSING if winners is None else winners
+            self.prize_cents[t, d] = MISSING if prize is None else prize
+            self.carried_over[t, d] = carried_over
+
+        self.region_winners = np.zeros((len(self.tiers), len(self.regions), n), dtype=np.int64)
+        for day, tier, region, winners in region_rows:
+            self.region_winners[self.tiers[tier], self.regions[region], draw_of[day]] = winners
+
+        # Provincial results: winners and amounts over all tiers, per region and draw
+        self.province_winners = np.zeros((len(self.regions), n), dtype=np.int64)
+        self.province_cents = np.zeros((len(self.regions), n), dtype=np.int64)
+        for day, region, winners, amount in province_rows:
+            r, d = self.regions[region], draw_of[day]
+            self.province_winners[r, d] = winners or 0
+            self.province_cents[r, d] = amount or 0
+
+        self.tier_prefix = cumulative(np.maximum(self.winners, 0))
+        self.region_prefix = cumulative(self.region_winners)
+        self.province_prefix = cumulative(self.province_winners)
+        self.province_cents_prefix = cumulative(self.province_cents)
+
+    @classmethod
+    def from_store(cls, store_path=STORE_PATH):
+        """Read the store's normalized tables, without parsing any records"""
+        from results_store import ResultsStore
+
+        with ResultsStore(store_path) as store:
+            conn = store.conn
+            return cls([row[0] for row in conn.execute("SELECT day FROM draws")],
+                       conn.execute("SELECT * FROM tier_results").fetchall(),
+                       conn.execute("SELECT * FROM region_winners").fetchall(),
+                       conn.execute("SELECT * FROM province_results").fetchall())
+
+    @classmethod
+    def from_records(cls, records):
+        days, tier_rows, region_rows, province_rows = [], [], [], []
+        for record in records:
+            day = sortable_day(record["date"])
+            rows = normalize_record(record)
+            days.append(day)
+            tier_rows.extend((day, *row) for row in rows["tiers"])
+            region_rows.extend((day, *row) for row in rows["regions"])
+            province_rows.extend((day, *row) for row in rows["provinces"])
+        return cls(days, tier_rows, region_rows, province_rows)
+
+    @classmethod
+    def load(cls, source=STORE_PATH):
+        """From a .db store, or a results JSON file"""
+        if source.endswith(".db"):
+            return cls.from_store(source)
+        from formatter import iter_json_records
+        return cls.from_records(iter_json_records(source))
+
+    def tier_code(self, tier):
+        if tier not in self.tiers:
+            raise ValueError(f"unknown tier {tier!r}; known: {', '.join(self.tiers)}")
+        return self.tiers[tier]
+
+    def region_code(self, region):
+        if region not in self.regions:
+            raise ValueError(f"unknown region {region!r}; known: {', '.join(self.regions)}")
+        return self.regions[region]
+
+    def span(self, start=None, end=None):
+        """Draw index range of start <= day < end (YYYY-MM-DD strings or dates)"""
+        lo = 0 if start is None else int(np.searchsorted(self.days, np.datetime64(start, "D")))
+        hi = len(self.days) if end is None else int(np.searchsorted(self.days, np.datetime64(end, "D")))
+        return lo, max(lo, hi)
+
+    def winners_between(self, tier, region=None, start=None, end=None):
+        """Winners of a tier from start to end, overall or in one region"""
+        lo, hi = self.span(start, end)
+        if region is None:
+            prefix = self.tier_prefix[self.tier_code(tier)]
+        else:
+            prefix = self.region_prefix[self.tier_code(tier), self.region_code(region)]
+        return int(prefix[hi] - prefix[lo])
+
+    def years(self):
+        if not len(self.days):
+            return []
+        first, last = self.days[[0, -1]].astype("datetime64[Y]").astype(int) + 1970
+        return list(range(int(first), int(last) + 1))
+
+    def by_year(self, tier, region=None):
+        """{year: winners of the tier}, overall or in one region"""
+        years = self.years()
+        bounds = np.searchsorted(self.days, np.array([f"{year}-01-01" for year in years + [years[-1] + 1]]
+                                                     if years else [], dtype="datetime64[D]"))
+        if region is None:
+            prefix = self.tier_prefix[self.tier_code(tier)]
+        else:
+            prefix = self.region_prefix[self.tier_code(tier), self.region_code(region)]
+        totals = prefix[bounds[1:]] - prefix[bounds[:-1]]
+        return {year: int(total) for year, total in zip(years, totals)}
+
+    def by_region(self, tier, start=None, end=None):
+        """{region: winners of the tier} listed under the tier's winners, from start to end"""
+        lo, hi = self.span(start, end)
+        prefix = self.region_prefix[self.tier_code(tier)]
+        return {region: int(prefix[code, hi] - prefix[code, lo]) for region, code in self.regions.items()}
+
+    def provincial(self, start=None, end=None):
+        """{region: (winners, amount won in cents)} over all tiers, from the provincial results"""
+        lo, hi = self.span(start, end)
+        w, c = self.province_prefix, self.province_cents_prefix
+        return {region: (int(w[r, hi] - w[r, lo]), int(c[r, hi] - c[r, lo])) for region, r in self.regions.items()}
+
+    def carry_over_streaks(self, tier="Match 7", min_length=1):
+        """Runs of consecutive draws where the tier carried over, oldest first.
+
+        Each run is a dict with its first and last draw, its length, and the prize per
+        winner listed at its last draw (the jackpot, for Match 7).
+        """
+        carried = self.carried_over[self.tier_code(tier)].astype(np.int8)
+        edges = np.diff(np.concatenate(([0], carried, [0])))
+        starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+        keep = ends - starts >= min_length
+        prize = self.prize_cents[self.tier_code(tier)]
+        return [{"first": str(self.days[a]), "last": str(self.days[b - 1]), "draws": int(b - a),
+                 "prize_cents": None if prize[b - 1] == MISSING else int(prize[b - 1])}
+                for a, b in zip(starts[keep].tolist(), ends[keep].tolist())]
+
+    def current_streak(self, tier="Match 7"):
+        """Draws the tier has carried over in a row up to the latest draw"""
+        carried = self.carried_over[self.tier_code(tier)]
+        if not len(carried) or not carried[-1]:
+            return 0
+        return int(len(carried) - np.flatnonzero(~carried)[-1] - 1) if (~carried).any() else len(carried)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Prize winners by tier, region and year")
+    parser.add_argument("--source", default=None,
+                        help=f"results store or JSON file (default: {STORE_PATH} if it exists, else {LEGACY_JSON})")
+    parser.add_argument("--tier", default="Match 7")
+    parser.add_argument("--region", default=None, help="one region, e.g. Ontario (default: every region)")
+    parser.add_argument("--start", default=None, help="first date (YYYY-MM-DD)")
+    parser.add_argument("--end", default=None, help="date to stop before (YYYY-MM-DD)")
+    parser.add_argument("--streaks", action="store_true", help="list the tier's carry-over streaks")
+    parser.add_argument("--min-length", type=int, default=2, help="shortest streak listed")
+    parser.add_argument("--json", action="store_true")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    source = args.source or (STORE_PATH if os.path.exists(STORE_PATH) else LEGACY_JSON)
+    index = PrizeIndex.load(source)
+
+    if args.streaks:
+        streaks = index.carry_over_streaks(args.tier, args.min_length)
+        if args.json:
+            print(json.dumps({"streaks": streaks, "current": index.current_streak(args.tier)}, indent=2))
+            return
+        print(f"{args.tier} carry-over streaks of {args.min_length}+ draws:")
+        for streak in streaks:
+            prize = f"${streak['prize_cents'] / 100:,.0f}" if streak["prize_cents"] is not None else "-"
+            print(f"  {streak['first']} to {streak['last']}  {streak['draws']:>3} draws  {prize}")
+        print(f"Current streak: {index.current_streak(args.tier)} draws")
+        return
+
+    by_year = index.by_year(args.tier, args.region)
+    by_region = index.by_region(args.tier, args.start, args.end)
+    total = index.winners_between(args.tier, args.region, args.start, args.end)
+    if args.json:
+        print(json.dumps({"tier": args.tier, "region": args.region, "winners": total,
+                          "by_year": by_year, "by_region": by_region}, indent=2))
+        return
+    print(f"{args.tier} winners{' in ' + args.region if args.region else ''}: {total:,}")
+    print("By year:")
+    for year, winners in by_year.items():
+        print(f"  {year}  {winners:>10,}")
+    print("By region (as listed under the tier's winners):")
+    for region, winners in by_region.items():
+        print(f"  {region:<20} {winners:>10,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,19 @@
-import pandas as pd
-from collections import Counter
-import matplotlib.pyplot as plt
-import numpy as np
+import argparse
+import hashlib
 import json
-from datetime import timedelta
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+
+# numpy, matplotlib and draw_stats are imported inside the functions that use them, so
+# importing this module (or the quick CLI) doesn't load the numeric and plotting stack
+
+CSV_FILE = 'lottery_results.csv'
+COOCCURRENCE_INDEX = 'cooccurrence_index.npz'
+STATS_CACHE = 'recommender_cache.json'
+STARTUP_LOG = 'startup_times.jsonl'
 
 def map_numbers_to_grid():
     grid = {}
@@ -17,27 +27,133 @@ def map_numbers_to_grid():
 
 grid_positions = map_numbers_to_grid()
 
+def load_matrix(source=CSV_FILE):
+    """DrawMatrix of the CSV, or of a results JSON file / .db store read as records.Draw"""
+    from draw_stats import DrawMatrix
+
+    if source.endswith('.csv'):
+        return DrawMatrix.from_csv(source)
+    import records
+    return DrawMatrix.from_draws(records.load(source))
+
 # First get the frequency data
-def analyze_lottery_statistics():
-    # Read and filter data
-    df = pd.read_csv('lottery_results.csv')
-    df['Date'] = pd.to_datetime(df['Date'])
-    df = df[df['Date'] >= '2019-07-01']
-    
+def analyze_lottery_statistics(csv_file=CSV_FILE, era="rng"):
+    from draw_stats import FrequencyStats
+    from stats_query import ERAS
+
+    # Draws of the era (stats_query.ERAS, the RNG era by default) as a (draws x 7) matrix
+    matrix = load_matrix(csv_file).between(*ERAS[era])
+
     # Analyze number frequencies
-    all_numbers = []
-    for i in range(1, 8):
-        numbers = df[f'Main Numbers {i}'].tolist()
-        all_numbers.extend(numbers)
-    
-    freq = Counter(all_numbers)
-    return freq
+    return FrequencyStats(matrix).counter()
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+_memo = {}
+
+
+def frequency_data(csv_file=CSV_FILE, cache_file=STATS_CACHE):
+    """Number frequencies for csv_file, computed once per version of the file.
+
+    Results are memoized in-process and in cache_file, keyed on the file's mtime and size.
+    When those change the file is hashed, and the cached result is still used if the
+    contents are the same (e.g. after a fresh checkout).
+    """
+    st = os.stat(csv_file)
+    key = (os.path.abspath(csv_file), st.st_mtime_ns, st.st_size)
+    if key in _memo:
+        return _memo[key]
+
+    cached = None
+    if os.path.exists(cache_file):
+        with open(cache_file, 'r') as f:
+            cached = json.load(f).get(key[0])
+
+    if cached and (cached['mtime_ns'], cached['size']) == key[1:]:
+        freq = cached['freq']
+    else:
+        digest = file_sha256(csv_file)
+        if cached and cached['sha256'] == digest:
+            freq = cached['freq']
+        else:
+            freq = {str(k): v for k, v in analyze_lottery_statistics(csv_file).items()}
+        save_stats_cache(cache_file, key, digest, freq)
+
+    _memo[key] = Counter({int(k): v for k, v in freq.items()})
+    return _memo[key]
+
+
+def save_stats_cache(cache_file, key, digest, freq):
+    entries = {}
+    if os.path.exists(cache_file):
+        with open(cache_file, 'r') as f:
+            entries = json.load(f)
+    entries[key[0]] = {'mtime_ns': key[1], 'size': key[2], 'sha256': digest, 'freq': freq}
+    tmp_path = f'{cache_file}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(entries, f)
+    os.replace(tmp_path, cache_file)
+
+
+def top_numbers(freq_data, k=7):
+    """The k most frequent numbers, most frequent first (ties go to the lower number)"""
+    return sorted(freq_data, key=lambda number: (-freq_data[number], number))[:k]
+
+def load_cooccurrence_index(path=COOCCURRENCE_INDEX, csv_file=CSV_FILE):
+    """Pair/triple co-occurrence index, caught up with the draws in csv_file.
+
+    The index is kept in path between runs; only draws added since it was saved are indexed.
+    """
+    from draw_stats import CooccurrenceIndex
 
-# Get the frequency data
-freq_data = analyze_lottery_statistics()
+    index = CooccurrenceIndex.load(path) if os.path.exists(path) else CooccurrenceIndex()
+    added = index.update(load_matrix(csv_file))
+    if added:
+        index.save(path)
+    return index
+
+
+def top_pairs(k=10, since=None, index=None):
+    """The k pairs drawn together most often since a date (default: the RNG era)"""
+    from draw_stats import RNG_ERA_START
+
+    if index is None:
+        index = load_cooccurrence_index()
+    return index.top_pairs(k, start=since or RNG_ERA_START)
+
+
+def ticket_cooccurrence(numbers, since=None, index=None):
+    """How often each pair and triple of a ticket's numbers was drawn together since a date"""
+    from draw_stats import RNG_ERA_START
+
+    if index is None:
+        index = load_cooccurrence_index()
+    return index.ticket(numbers, start=since or RNG_ERA_START)
+
+def heatmap_path(next_draw_date):
+    return f'recommendation_history/{next_draw_date.strftime("%m-%d-%Y")}_heatmap.jpg'
+
+
+def plot_lottery_heatmap(freq_data, next_draw_date, preset=None):
+    """Create a heatmap using actual lottery frequency data.
+
+    With a preset (see heatmap.PRESETS) the image is drawn by the reusable off-screen
+    renderer in heatmap.py instead of through pyplot.
+    """
+    if preset:
+        from heatmap import HeatmapRenderer
+        return HeatmapRenderer(preset).render(freq_data, heatmap_path(next_draw_date))
+
+    import matplotlib.pyplot as plt
+    import numpy as np
 
-def plot_lottery_heatmap(freq_data, next_draw_date):
-    """Create a heatmap using actual lottery frequency data"""
     plt.figure(figsize=(10, 5))
     
     # Create heatmap data
@@ -67,27 +183,74 @@ def plot_lottery_heatmap(freq_data, next_draw_date):
                     color=inverted_color)
     
     plt.title('Lotto Max Frequency Heatmap')
-    plt.savefig(f'recommendation_history/{next_draw_date.strftime("%m-%d-%Y")}_heatmap.jpg', dpi=500, transparent=False, facecolor='white', bbox_inches='tight')
-    
+    plt.savefig(heatmap_path(next_draw_date), dpi=500, transparent=False, facecolor='white', bbox_inches='tight')
+    plt.close()
+    return heatmap_path(next_draw_date)
+
 
 from datetime import datetime
 
-def main():
-    # load in the last draw date from lottery_dates.json
-    with open('lottery_dates.json', 'r') as f:
-        lottery_dates = json.load(f)
-    # find the last draw date in lottery_dates
-    # Convert the strings to datetime objects
-    datetime_dates = [datetime.strptime(date, "%m-%d-%Y") for date in lottery_dates]
-    # Find the latest date
-    latest_date = max(datetime_dates)
-    # Calculate the next draw date based on specific rules
-    # For example, if draws are on Wednesdays and Saturdays:
-    days_until_next_draw = (2 - latest_date.weekday()) % 7  # 2 represents Wednesday
-    if days_until_next_draw == 0:
-        days_until_next_draw = 3  # If today is Wednesday, next draw is Saturday
-    next_draw_date = latest_date + timedelta(days=days_until_next_draw)
-    
-    plot_lottery_heatmap(freq_data, next_draw_date)
+def next_draw_date(dates_file='lottery_dates.json'):
+    """Date of the first scheduled draw after the last one in dates_file"""
+    from draw_calendar import DrawCalendar
+    return DrawCalendar.load(dates_file).next_draw()
+
+
+def quick(csv_file=CSV_FILE):
+    """Print the next draw date and the top numbers without loading the plotting stack"""
+    freq_data = frequency_data(csv_file)
+    print(f"Next draw: {next_draw_date().strftime('%A, %B %d %Y')}")
+    print("Top numbers: " + ", ".join(f"{n} ({freq_data[n]})" for n in top_numbers(freq_data)))
+
+
+def measure_cold_start(runs=5, log_file=STARTUP_LOG):
+    """Median wall time (ms) of fresh interpreters importing the module and running `quick`.
+
+    Each measurement is appended to log_file so startup regressions show up over time.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    commands = {
+        'import': [sys.executable, '-c', 'import recommender'],
+        'quick': [sys.executable, os.path.join(here, 'recommender.py'), 'quick'],
+    }
+    results = {}
+    for name, command in commands.items():
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run(command, cwd=here, check=True, stdout=subprocess.DEVNULL)
+            times.append((time.perf_counter() - start) * 1000)
+        results[name] = sorted(times)[len(times) // 2]
+        print(f"{name}: {results[name]:.0f} ms (median of {runs})")
+
+    if log_file:
+        with open(log_file, 'a') as f:
+            f.write(json.dumps({'time': datetime.now().isoformat(timespec='seconds'), **results}) + '\n')
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lotto Max number recommendations")
+    parser.add_argument("command", nargs="?", default="heatmap", choices=["heatmap", "quick", "startup"],
+                        help="heatmap (default): save the frequency heatmap for the next draw; "
+                             "quick: print the next draw date and top numbers; "
+                             "startup: measure cold-start time")
+    parser.add_argument("--data", default=CSV_FILE,
+                        help=f"draws to analyze: the CSV, a results JSON file or a .db store (default: {CSV_FILE})")
+    parser.add_argument("--runs", type=int, default=5, help="runs per startup measurement")
+    parser.add_argument("--preset", default="full",
+                        help="heatmap resolution preset from heatmap.PRESETS, or 'pyplot' for the "
+                             "original pyplot rendering (default: full, 500 dpi)")
+    args = parser.parse_args(argv)
+
+    if args.command == "quick":
+        quick(args.data)
+    elif args.command == "startup":
+        measure_cold_start(args.runs)
+    else:
+        preset = None if args.preset == "pyplot" else args.preset
+        plot_lottery_heatmap(frequency_data(args.data), next_draw_date(), preset)
+
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,316 @@
+"""Compact typed draw records.
+
+A scraped record is a tree of display strings: balls as "7", money as "$1,047.40", tier
+winners like "1\\r\\n\\t...\\n\\nOntario: 1". Draw keeps the same draw as slotted objects
+holding ints: balls and bonus, money in cents, counts and ratios as floats. The prize tiers
+and provincial results are packed into one int64 array each, and read back as tuples of
+Tier / ProvinceResult. Missing values are None.
+
+    draws = records.load("lottery_results_final.json")   # or the .db store, or lottery_columnar/
+    draws[-1].balls, draws[-1].jackpot_cents, draws[-1].tiers[0].carried_over
+
+The JSON and store loaders convert one record at a time, so the full tree of strings is
+never held in memory. The columnar loader reads the typed dataset the formatter writes,
+and is the fastest.
+"""
+import os
+import sys
+from array import array
+from datetime import date as Date
+
+from normalize import (PROVINCES, TIER_NAMES, money_to_cents, parse_ball, parse_count, parse_percent,
+                       parse_province, parse_tier)
+
+TIER_CODES = {name: code for code, name in enumerate(TIER_NAMES)}
+PROVINCE_CODES = {name: code for code, name in enumerate(PROVINCES)}
+
+
+def stat_text(statistics, title):
+    return statistics.get(title, {}).get("main_stat", "")
+
+
+# Tier and province values are packed per draw into array('q'), four / two slots per row;
+# missing values are stored as MISSING and read back as None
+MISSING = -1
+CARRIED_OVER = 1
+FREE_PLAY = 2
+
+# One shared tuple per distinct sequence of tier / province names
+_name_tuples = {}
+
+
+def shared_names(names):
+    names = tuple(sys.intern(name) for name in names)
+    return _name_tuples.setdefault(names, names)
+
+
+def packed(values):
+    if not values:
+        return ()
+    return array("q", [MISSING if v is None else v for v in values])
+
+
+def unpacked(value):
+    return None if value == MISSING else value
+
+
+class Tier:
+    """One row of a draw's prize breakdown"""
+
+    __slots__ = ("name", "prize_cents", "winners", "fund_cents", "carried_over", "free_play")
+
+    def __init__(self, name, prize_cents, winners, fund_cents, carried_over=False, free_play=False):
+        self.name = name
+        self.prize_cents = prize_cents
+        self.winners = winners
+        self.fund_cents = fund_cents
+        self.carried_over = carried_over
+        self.free_play = free_play
+
+    @property
+    def code(self):
+        """Index into normalize.TIER_NAMES, or None for a name not listed there"""
+        return TIER_CODES.get(self.name)
+
+    @classmethod
+    def from_record(cls, tier):
+        return cls(*parse_tier(tier)[:6])
+
+    def __repr__(self):
+        return f"Tier({self.name!r}, prize_cents={self.prize_cents}, winners={self.winners})"
+
+
+class ProvinceResult:
+    """Winners and amount won in one region for a draw"""
+
+    __slots__ = ("name", "winners", "amount_cents")
+
+    def __init__(self, name, winners, amount_cents):
+        self.name = name
+        self.winners = winners
+        self.amount_cents = amount_cents
+
+    @property
+    def code(self):
+        """Index into normalize.PROVINCES, or None"""
+        return PROVINCE_CODES.get(self.name)
+
+    @classmethod
+    def from_record(cls, province):
+        return cls(*parse_province(province))
+
+    def __repr__(self):
+        return f"ProvinceResult({self.name!r}, winners={self.winners}, amount_cents={self.amount_cents})"
+
+
+class Draw:
+    """One draw with every value parsed.
+
+    tiers and provinces are rebuilt from the packed arrays on each access; loop over a
+    local copy when reading them many times.
+    """
+
+    __slots__ = ("date", "balls", "bonus", "jackpot_cents", "total_sales_cents", "tickets_sold",
+                 "total_winners", "winning_ratio", "sales_difference", "max_millions_count",
+                 "max_millions_next_draw", "max_millions", "tier_names", "tier_values",
+                 "province_names", "province_values")
+
+    def __init__(self, date, balls, bonus=None, jackpot_cents=None, total_sales_cents=None,
+                 tickets_sold=None, total_winners=None, winning_ratio=None, sales_difference=None,
+                 max_millions_count=None, max_millions_next_draw=None, max_millions=(), tiers=(),
+                 provinces=()):
+        self.date = date
+        self.balls = balls
+        self.bonus = bonus
+        self.jackpot_cents = jackpot_cents
+        self.total_sales_cents = total_sales_cents
+        self.tickets_sold = tickets_sold
+        self.total_winners = total_winners
+        self.winning_ratio = winning_ratio
+        self.sales_difference = sales_difference
+        self.max_millions_count = max_millions_count
+        self.max_millions_next_draw = max_millions_next_draw
+        self.max_millions = max_millions
+        self.tiers = tiers
+        self.provinces = provinces
+
+    @property
+    def tiers(self):
+        values = self.tier_values
+        return tuple(Tier(name, unpacked(values[4 * i]), unpacked(values[4 * i + 1]), unpacked(values[4 * i + 2]),
+                          bool(values[4 * i + 3] & CARRIED_OVER), bool(values[4 * i + 3] & FREE_PLAY))
+                     for i, name in enumerate(self.tier_names))
+
+    @tiers.setter
+    def tiers(self, tiers):
+        self.tier_names = shared_names(tier.name for tier in tiers)
+        self.tier_values = packed([value for tier in tiers for value in (
+            tier.prize_cents, tier.winners, tier.fund_cents,
+            CARRIED_OVER * tier.carried_over | FREE_PLAY * tier.free_play)])
+
+    @property
+    def provinces(self):
+        values = self.province_values
+        return tuple(ProvinceResult(name, unpacked(values[2 * i]), unpacked(values[2 * i + 1]))
+                     for i, name in enumerate(self.province_names))
+
+    @provinces.setter
+    def provinces(self, provinces):
+        self.province_names = shared_names(p.name for p in provinces)
+        self.province_values = packed([value for p in provinces for value in (p.winners, p.amount_cents)])
+
+    @classmethod
+    def from_record(cls, record):
+        """Draw for a scraped record, or None when it doesn't have seven valid balls"""
+        main_draw = record.get("main_draw") or {}
+        balls = tuple(parse_ball(n) for n in main_draw.get("main_numbers", []))
+        if len(balls) != 7 or None in balls:
+            return None
+
+        statistics = record.get("statistics") or {}
+        max_millions = record.get("max_millions") or {}
+        sets = []
+        for result in max_millions.get("results") or []:
+            numbers = tuple(parse_ball(n) for n in result.get("numbers", []))
+            if len(numbers) == 7 and None not in numbers:
+                sets.append(numbers)
+        month, day, year = record["date"].split("-")
+
+        return cls(
+            Date(int(year), int(month), int(day)),
+            balls,
+            parse_ball(main_draw.get("bonus_number")),
+            money_to_cents(main_draw.get("jackpot")),
+            money_to_cents(stat_text(statistics, "Total Sales")),
+            parse_count(stat_text(statistics, "Tickets Sold")),
+            parse_count(stat_text(statistics, "Total Winners")),
+            parse_percent(stat_text(statistics, "Winning Ratio")),
+            parse_percent(stat_text(statistics, "Sales Difference (From previous draw)")),
+            parse_count(max_millions.get("count")),
+            parse_count(stat_text(statistics, "Max Millions for the next draw:")),
+            tuple(sets),
+            [Tier.from_record(tier) for tier in record.get("prize_breakdown") or []],
+            [ProvinceResult.from_record(p) for p in record.get("provincial_stats") or []],
+        )
+
+    @property
+    def site_date(self):
+        """MM-DD-YYYY, as in the site's urls and the scraped records"""
+        return self.date.strftime("%m-%d-%Y")
+
+    def tier(self, name):
+        """The prize tier with this name, or None"""
+        for tier in self.tiers:
+            if tier.name == name:
+                return tier
+        return None
+
+    def __repr__(self):
+        return f"Draw({self.date.isoformat()}, balls={self.balls}, bonus={self.bonus})"
+
+
+def from_records(records):
+    """Draws for an iterable of scraped records, skipping those without valid balls"""
+    draws = []
+    for record in records:
+        draw = Draw.from_record(record)
+        if draw is not None:
+            draws.append(draw)
+    return draws
+
+
+def load_json(json_file="lottery_results_final.json"):
+    """Draws of a results JSON file, in file order, converted while it is read"""
+    from formatter import iter_json_records
+    return from_records(iter_json_records(json_file))
+
+
+def load_store(store_path="lottery_results.db"):
+    """Draws of the results store, in insertion order"""
+    from results_store import ResultsStore
+    with ResultsStore(store_path) as store:
+        return from_records(store.records())
+
+
+def load_columnar(directory="lottery_columnar"):
+    """Draws of the typed dataset written by the formatter, in the dataset's row order.
+
+    Tier and province rows are stored grouped by draw, so each draw's packed arrays are
+    slices of one buffer.
+    """
+    import numpy as np
+
+    from columnar import TABLES, load_columnar as load_tables
+
+    names = [name for name in TABLES
+             if os.path.exists(os.path.join(directory, f"{name}.npz"))]
+    tables = load_tables(directory, tables=names)
+    d = tables["draws"]
+    n = len(d["date"])
+
+    def column(values, missing=MISSING):
+        # Typed missing markers (-1, NaN) back to None
+        values = values.tolist()
+        if missing is None:
+            return [None if v != v else v for v in values]
+        return [None if v == missing else v for v in values]
+
+    def slices(table, names_column, name_list, value_columns):
+        """Per-draw (shared name tuple, packed values) from a child table"""
+        if table is None or not len(table["draw"]):
+            return [((), ())] * n
+        bounds = np.searchsorted(table["draw"], np.arange(n + 1)).tolist()
+        values = np.stack(value_columns, axis=1).astype(np.int64).tobytes()
+        width = 8 * len(value_columns)
+        name_list = [str(name) for name in name_list]
+        codes = table[names_column].astype(np.uint8).tobytes()
+        names_of = {}
+        out = []
+        for lo, hi in zip(bounds, bounds[1:]):
+            if lo == hi:
+                out.append(((), ()))
+                continue
+            row_values = array("q")
+            row_values.frombytes(values[lo * width:hi * width])
+            key = codes[lo:hi]
+            if key not in names_of:
+                names_of[key] = shared_names(name_list[code] for code in key)
+            out.append((names_of[key], row_values))
+        return out
+
+    t = tables["prize_tiers"]
+    flags = CARRIED_OVER * t["carried_over"].astype(np.int64) | FREE_PLAY * t["free_play"].astype(np.int64)
+    tiers = slices(t, "tier", t["tier_names"], [t["prize_cents"], t["winners"], t["prize_fund_cents"], flags])
+    p = tables.get("provinces")
+    # Datasets written before the provinces table was added load without provincial results
+    provinces = slices(p, "province", p["province_names"] if p else [],
+                       [p["winners"], p["amount_cents"]] if p else [])
+
+    mm = tables["max_millions"]
+    max_millions = [[] for _ in range(n)]
+    for draw, numbers in zip(mm["draw"].tolist(), mm["numbers"].tolist()):
+        max_millions[draw].append(tuple(numbers))
+
+    draws = []
+    for values in zip(
+            d["date"].astype(object).tolist(), map(tuple, d["balls"].tolist()), column(d["bonus"], 0),
+            column(d["jackpot_cents"]), column(d["total_sales_cents"]), column(d["tickets_sold"]),
+            column(d["total_winners"]), column(d["winning_ratio"], None), column(d["sales_difference"], None),
+            column(d["max_millions_count"]), column(d["max_millions_next_draw"]),
+            map(tuple, max_millions), tiers, provinces):
+        draw = object.__new__(Draw)
+        (draw.date, draw.balls, draw.bonus, draw.jackpot_cents, draw.total_sales_cents, draw.tickets_sold,
+         draw.total_winners, draw.winning_ratio, draw.sales_difference, draw.max_millions_count,
+         draw.max_millions_next_draw, draw.max_millions, (draw.tier_names, draw.tier_values),
+         (draw.province_names, draw.province_values)) = values
+        draws.append(draw)
+    return draws
+
+
+def load(source):
+    """Draws from a results JSON file, a .db store or a typed dataset directory"""
+    if os.path.isdir(source):
+        return load_columnar(source)
+    if source.endswith(".db"):
+        return load_store(source)
+    return load_json(source)
@@ -0,0 +1,282 @@
+"""Bulk re-extraction of draw records from saved pages, spread over a process pool.
+
+After a parser fix or a markup change, the whole history can be rebuilt from raw pages
+instead of scraping it again. Pages can come from:
+
+- the scraper's html cache
+- a directory of saved pages, optionally gzipped (e.g. bench_pages/)
+- a .zip or .tar(.gz) archive of them
+
+Detail pages are parsed in chunks by worker processes and merged by draw date, so the
+result doesn't depend on the worker count or the order the chunks finish in. Every field
+of the result is compared with lottery_results_final.json.
+
+    python reextract.py html_cache --workers 8
+    python reextract.py pages.tar.gz --report changes.json
+    python reextract.py html_cache --write      # replace the stored history, then export the JSON
+"""
+import argparse
+import gzip
+import json
+import os
+import re
+import tarfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from html_cache import DETAIL_PAGE, HtmlCache
+from results_store import LEGACY_JSON, STORE_PATH, open_store, write_json_atomic
+
+# Detail pages by file name, with or without an extension
+PAGE_NAME = re.compile(r"lotto-max-result-(\d{2}-\d{2}-\d{4})(?:\.[\w.]*)?$")
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+# Changed values kept per field in the report
+EXAMPLES = 5
+
+
+def draw_day(date):
+    return datetime.strptime(date, "%m-%d-%Y")
+
+
+def cache_pages(root):
+    """(date, payload, encoding) for each detail page in an html cache; payloads are file paths"""
+    cache = HtmlCache(root)
+    pages = []
+    for url in cache.urls():
+        match = DETAIL_PAGE.search(url)
+        if match:
+            pages.append((match.group(1), cache.object_path(url), cache.entries[url].get("encoding")))
+    return pages
+
+
+def directory_pages(root):
+    pages = []
+    for directory, _, files in os.walk(root):
+        for name in files:
+            match = PAGE_NAME.search(name)
+            if match:
+                pages.append((match.group(1), os.path.join(directory, name), None))
+    return pages
+
+
+def archive_pages(path):
+    """Pages of a zip or tar archive, read in one sequential pass; payloads are the page bytes"""
+    pages = []
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for name in archive.namelist():
+                match = PAGE_NAME.search(name)
+                if match:
+                    pages.append((match.group(1), archive.read(name), None))
+    else:
+        with tarfile.open(path, "r:*") as archive:
+            for member in archive:
+                match = PAGE_NAME.search(member.name)
+                if match and member.isfile():
+                    pages.append((match.group(1), archive.extractfile(member).read(), None))
+    return pages
+
+
+def list_pages(source):
+    """Detail pages of source, ordered by draw date and then payload so duplicates resolve the same way"""
+    if os.path.isdir(source):
+        if os.path.exists(os.path.join(source, "index.jsonl")):
+            pages = cache_pages(source)
+        else:
+            pages = directory_pages(source)
+    else:
+        pages = archive_pages(source)
+    return sorted(pages, key=lambda page: (draw_day(page[0]), str(page[1])))
+
+
+def page_text(payload, encoding):
+    if isinstance(payload, str):
+        with open(payload, "rb") as f:
+            payload = f.read()
+    if payload[:2] == GZIP_MAGIC:
+        payload = gzip.decompress(payload)
+    return payload.decode(encoding or "utf-8", errors="replace")
+
+
+# Parser of the current worker process, set by init_worker
+_parse = None
+
+
+def init_worker(fast, features):
+    global _parse
+    from scrape import extract_all_lottery_data, extract_all_lottery_data_fast
+
+    if fast:
+        _parse = lambda html: extract_all_lottery_data_fast(html, features)
+    else:
+        _parse = extract_all_lottery_data
+
+
+def parse_chunk(chunk):
+    """[(date, record or None)] for a chunk of pages"""
+    import metrics
+    from scrape import DETAIL_URL
+
+    parsed = []
+    for date, payload, encoding in chunk:
+        try:
+            data = _parse(page_text(payload, encoding))
+        except (OSError, ValueError) as e:
+            print(f"Can't read the page for {date}: {e}")
+            data = None
+        if data:
+            data['date'] = date
+            data['url'] = DETAIL_URL.format(date=date)
+        parsed.append((date, data))
+    # The parsers time themselves into the worker's metrics registry; nothing reads it here
+    metrics.reset()
+    return parsed
+
+
+def reextract(pages, workers=1, chunk_size=None, fast=False, features="html.parser"):
+    """Parse pages across workers; returns ({date: record}, [dates that failed to parse])"""
+    if chunk_size is None:
+        # A few chunks per worker, so a slow chunk doesn't leave the others idle
+        chunk_size = max(1, -(-len(pages) // (workers * 4)))
+    chunks = [pages[i:i + chunk_size] for i in range(0, len(pages), chunk_size)]
+
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(fast, features)) as executor:
+            results = list(executor.map(parse_chunk, chunks))
+    else:
+        init_worker(fast, features)
+        results = [parse_chunk(chunk) for chunk in chunks]
+
+    # map() returns the chunks in page order, so a date seen twice always keeps the same page
+    records = {}
+    failed = []
+    for chunk in results:
+        for date, data in chunk:
+            if data:
+                records[date] = data
+            else:
+                failed.append(date)
+    return records, [date for date in dict.fromkeys(failed) if date not in records]
+
+
+def merge(current, records):
+    """The current records with re-extracted ones swapped in, in the current order, followed by
+    the draws that weren't there before in date order. Draws without a page are kept as they are."""
+    merged = [records.get(record['date'], record) for record in current]
+    known = {record['date'] for record in current}
+    merged.extend(records[date] for date in sorted(records, key=draw_day) if date not in known)
+    return merged
+
+
+def flatten(value, path=""):
+    """{field path: leaf value}, e.g. "statistics.Winning Ratio.main_stat" or "prize_breakdown[2].winners" """
+    if isinstance(value, dict):
+        leaves = {}
+        for key, item in value.items():
+            leaves.update(flatten(item, f"{path}.{key}" if path else key))
+        return leaves
+    if isinstance(value, list) and value and isinstance(value[0], (dict, list)):
+        leaves = {}
+        for i, item in enumerate(value):
+            leaves.update(flatten(item, f"{path}[{i}]"))
+        return leaves
+    return {path: value}
+
+
+def diff_records(current, records):
+    """Field changes between the current records and the re-extracted ones, by field"""
+    by_date = {record['date']: record for record in current}
+    fields = {}
+    changed_draws = 0
+    for date in sorted(records, key=draw_day):
+        before = by_date.get(date)
+        if before is None:
+            continue
+        old, new = flatten(before), flatten(records[date])
+        changes = [(path, old.get(path), new.get(path)) for path in sorted(old.keys() | new.keys())
+                   if old.get(path) != new.get(path)]
+        changed_draws += bool(changes)
+        for path, was, now in changes:
+            # Group list positions, so every tier's winners count falls under one field
+            field = fields.setdefault(re.sub(r"\[\d+\]", "[]", path), {"draws": 0, "examples": []})
+            field["draws"] += 1
+            if len(field["examples"]) < EXAMPLES:
+                field["examples"].append({"date": date, "field": path, "before": was, "after": now})
+    return {
+        "compared": sum(date in by_date for date in records),
+        "changed_draws": changed_draws,
+        "added": sorted((date for date in records if date not in by_date), key=draw_day),
+        "not_reextracted": sorted((date for date in by_date if date not in records), key=draw_day),
+        "fields": dict(sorted(fields.items(), key=lambda item: -item[1]["draws"])),
+    }
+
+
+def print_report(report):
+    print(f"\nCompared {report['compared']} draws: {report['changed_draws']} changed, "
+          f"{len(report['added'])} new, {len(report['not_reextracted'])} not in the source"
+          + (f", {len(report['failed'])} failed to parse" if report.get("failed") else ""))
+    for field, change in report["fields"].items():
+        print(f"  {field:<50} {change['draws']:>5} draws")
+        for example in change["examples"][:2]:
+            print(f"      {example['date']} {example['field']}: {example['before']!r} -> {example['after']!r}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Re-extract the draw history from saved pages")
+    parser.add_argument("source", help="html cache directory, directory of saved pages, or .zip / .tar archive")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=None, help="pages per task (default: a few tasks per worker)")
+    parser.add_argument("--fast-parse", action="store_true", help="use extract_all_lottery_data_fast")
+    parser.add_argument("--parser-features", default="html.parser", help="tree builder for --fast-parse")
+    parser.add_argument("--json", default=LEGACY_JSON, help=f"records to compare with (default: {LEGACY_JSON})")
+    parser.add_argument("--report", default=None, help="write the change report to this JSON file")
+    parser.add_argument("--output", default=None, help="write the merged records to this JSON file")
+    parser.add_argument("--write", action="store_true",
+                        help="swap the re-extracted draws into the stored history and export the JSON")
+    parser.add_argument("--store", default=STORE_PATH)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    start = time.perf_counter()
+    pages = list_pages(args.source)
+    listed = time.perf_counter()
+    records, failed = reextract(pages, args.workers, args.chunk_size, args.fast_parse, args.parser_features)
+    elapsed = time.perf_counter() - listed
+    print(f"Re-extracted {len(records)} draws from {len(pages)} pages with {args.workers} worker(s) in "
+          f"{elapsed:.2f}s ({len(pages) / elapsed if elapsed else 0:.0f} pages/s), "
+          f"reading the source took {listed - start:.2f}s")
+
+    current = []
+    if os.path.exists(args.json):
+        with open(args.json, "r") as f:
+            current = json.load(f)
+    report = diff_records(current, records)
+    report["failed"] = failed
+    print_report(report)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote the change report to {args.report}")
+
+    merged = merge(current, records)
+    if args.output:
+        write_json_atomic(args.output, merged)
+        print(f"Wrote {len(merged)} records to {args.output}")
+    if args.write:
+        # The store is the source of truth: merge onto its records, not onto a possibly stale JSON
+        with open_store(args.store, args.json) as store:
+            stored = merge(list(store.records()), records)
+            store.replace_all(stored)
+            store.export_json(args.json)
+        print(f"Replaced the history in {args.store} ({len(stored)} draws) and exported {args.json}")
+
+
+if __name__ == "__main__":
+    main()
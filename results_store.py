@@ -0,0 +1,228 @@
+"""Append-only results store keyed by draw date.
+
+Scraped draws live in a SQLite database (lottery_results.db) with one row per draw,
+so a scheduled run only inserts the new draws instead of rewriting the full history.
+Every write is a single transaction: a crash mid-run leaves the previous state intact.
+The legacy lottery_results_final.json is exported from the store on demand.
+
+Each draw's prize breakdown and provincial results are also written as rows of ints
+(see normalize.normalize_record), so per-tier and per-region questions are queries
+instead of string parsing. Stores created before these tables existed are filled in
+when they are first opened.
+
+    python results_store.py import-json   # seed the store from lottery_results_final.json
+    python results_store.py export-json   # write lottery_results_final.json from the store
+"""
+import argparse
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+from normalize import normalize_record
+
+STORE_PATH = "lottery_results.db"
+LEGACY_JSON = "lottery_results_final.json"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS draws (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,  -- insertion order, the order of the legacy JSON
+    date TEXT NOT NULL UNIQUE,              -- MM-DD-YYYY as used in the site urls
+    day TEXT NOT NULL,                      -- YYYY-MM-DD, sortable
+    record TEXT NOT NULL                    -- the scraped record as JSON
+);
+CREATE INDEX IF NOT EXISTS draws_day ON draws (day);
+
+CREATE TABLE IF NOT EXISTS tier_results (
+    day TEXT NOT NULL,
+    tier TEXT NOT NULL,                     -- match type, e.g. "Match 6 plus Bonus"
+    prize_cents INTEGER,                    -- per winner
+    winners INTEGER,
+    fund_cents INTEGER,
+    carried_over INTEGER NOT NULL,
+    free_play INTEGER NOT NULL,
+    PRIMARY KEY (tier, day)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS region_winners (
+    day TEXT NOT NULL,
+    tier TEXT NOT NULL,
+    region TEXT NOT NULL,                   -- as listed under the tier's winners
+    winners INTEGER NOT NULL,
+    PRIMARY KEY (tier, region, day)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS province_results (
+    day TEXT NOT NULL,
+    region TEXT NOT NULL,
+    winners INTEGER,
+    amount_cents INTEGER,
+    PRIMARY KEY (region, day)
+) WITHOUT ROWID;
+"""
+
+# PRAGMA user_version once the normalized tables hold every draw; bumped whenever
+# normalize_record() changes, so existing stores rebuild the tables on open.
+# 2: region lines without a name are kept as "Unknown"
+SCHEMA_VERSION = 2
+
+NORMALIZED_TABLES = ["tier_results", "region_winners", "province_results"]
+
+
+def sortable_day(date):
+    """MM-DD-YYYY -> YYYY-MM-DD"""
+    return datetime.strptime(date, "%m-%d-%Y").strftime("%Y-%m-%d")
+
+
+def write_json_atomic(path, records):
+    """Write records as `json.dump(records, f, indent=2)` would, one record at a time.
+
+    The file is written next to path and renamed over it, so readers never see a
+    partial file.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write("[")
+        first = True
+        for record in records:
+            f.write("\n  " if first else ",\n  ")
+            f.write(json.dumps(record, indent=2).replace("\n", "\n  "))
+            first = False
+        f.write("]" if first else "\n]")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class ResultsStore:
+    """Draw records in insertion order, indexed by date"""
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            with self.conn:
+                self.write_normalized(self.records(), replace=True)
+                self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM draws").fetchone()[0]
+
+    def __contains__(self, date):
+        return self.conn.execute("SELECT 1 FROM draws WHERE date = ?", (date,)).fetchone() is not None
+
+    def dates(self):
+        """Set of every stored draw date"""
+        return {row[0] for row in self.conn.execute("SELECT date FROM draws")}
+
+    def last_seq(self):
+        return self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM draws").fetchone()[0]
+
+    def seq_of(self, date):
+        """Insertion sequence number of a stored draw, or None"""
+        row = self.conn.execute("SELECT seq FROM draws WHERE date = ?", (date,)).fetchone()
+        return row[0] if row else None
+
+    def get(self, date):
+        row = self.conn.execute("SELECT record FROM draws WHERE date = ?", (date,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def records(self, after_seq=0):
+        """Yield stored records in insertion order, optionally only those after a sequence number"""
+        cursor = self.conn.execute(
+            "SELECT record FROM draws WHERE seq > ? ORDER BY seq", (after_seq,))
+        for (record,) in cursor:
+            yield json.loads(record)
+
+    def append(self, records):
+        """Insert draws that aren't stored yet, in one transaction. Returns how many were added."""
+        # The first record of a date wins, as with INSERT OR IGNORE
+        new, seen = [], self.dates()
+        for record in records:
+            if record['date'] not in seen:
+                seen.add(record['date'])
+                new.append(record)
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO draws (date, day, record) VALUES (?, ?, ?)",
+                ((r['date'], sortable_day(r['date']), json.dumps(r)) for r in new),
+            )
+            self.write_normalized(new)
+        return len(new)
+
+    def replace_all(self, records):
+        """Swap the whole history for records (e.g. after a re-parse), atomically"""
+        records = list(records)
+        with self.conn:
+            self.conn.execute("DELETE FROM draws")
+            self.conn.execute("DELETE FROM sqlite_sequence WHERE name = 'draws'")
+            self.conn.executemany(
+                "INSERT INTO draws (date, day, record) VALUES (?, ?, ?)",
+                ((r['date'], sortable_day(r['date']), json.dumps(r)) for r in records),
+            )
+            self.write_normalized(records, replace=True)
+
+    def write_normalized(self, records, replace=False):
+        """Add the normalized rows of records, inside the caller's transaction"""
+        if replace:
+            for table in NORMALIZED_TABLES:
+                self.conn.execute(f"DELETE FROM {table}")
+        tiers, regions, provinces = [], [], []
+        for record in records:
+            day = sortable_day(record['date'])
+            rows = normalize_record(record)
+            tiers.extend((day, *row) for row in rows["tiers"])
+            regions.extend((day, *row) for row in rows["regions"])
+            provinces.extend((day, *row) for row in rows["provinces"])
+        # A name listed twice for one draw keeps its last row
+        self.conn.executemany("INSERT OR REPLACE INTO tier_results VALUES (?, ?, ?, ?, ?, ?, ?)", tiers)
+        self.conn.executemany("INSERT OR REPLACE INTO region_winners VALUES (?, ?, ?, ?)", regions)
+        self.conn.executemany("INSERT OR REPLACE INTO province_results VALUES (?, ?, ?, ?)", provinces)
+
+    def import_json(self, path=LEGACY_JSON):
+        """Append the records of a legacy results file. Returns how many were added."""
+        with open(path, 'r') as f:
+            return self.append(json.load(f))
+
+    def export_json(self, path=LEGACY_JSON):
+        """Write the legacy results file, byte-compatible with the old json.dump output"""
+        write_json_atomic(path, self.records())
+
+
+def open_store(path=STORE_PATH, legacy_json=LEGACY_JSON):
+    """Open the store, seeding it from the legacy JSON the first time"""
+    store = ResultsStore(path)
+    if len(store) == 0 and os.path.exists(legacy_json):
+        added = store.import_json(legacy_json)
+        print(f"Imported {added} existing results from {legacy_json} into {path}")
+    return store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the lottery results store")
+    parser.add_argument("command", choices=["import-json", "export-json", "count"])
+    parser.add_argument("--store", default=STORE_PATH)
+    parser.add_argument("--json", default=LEGACY_JSON)
+    args = parser.parse_args(argv)
+
+    with ResultsStore(args.store) as store:
+        if args.command == "import-json":
+            added = store.import_json(args.json)
+            print(f"Added {added} draws to {args.store} ({len(store)} total)")
+        elif args.command == "export-json":
+            store.export_json(args.json)
+            print(f"Exported {len(store)} draws to {args.json}")
+        else:
+            print(len(store))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,76 +1,202 @@
 import requests
-from bs4 import BeautifulSoup
-from datetime import datetime, timedelta
-from time import sleep
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from time import sleep, monotonic
+import argparse
+import threading
 import json
+import os
 import re
 
-YEAR_URL = "https://www.lottomaxnumbers.com/numbers/{year}"
+import metrics
+from draw_calendar import DATES_FILE, FIRST_DRAW, DrawCalendar, site_date
+from html_cache import CACHE_DIR, DETAIL_PAGE, YEAR_PAGE, HtmlCache
+from results_store import STORE_PATH, open_store
 
-DETAIL_URL = "https://www.lottomaxnumbers.com/numbers/lotto-max-result-{date}"
+SITE_URL = "https://www.lottomaxnumbers.com"
+
+YEAR_URL = SITE_URL + "/numbers/{year}"
+
+DETAIL_URL = SITE_URL + "/numbers/lotto-max-result-{date}"
+
+# Serve requests from a local stand-in of the site instead (e.g. http://localhost:8000).
+# Stored records keep the canonical SITE_URL urls.
+MIRROR_URL = os.environ.get("LOTTO_MAX_MIRROR")
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
 }
 
 
-def extract_open_data(year):
-    """Extract all lottery draw dates for a given year"""
-    url = YEAR_URL.format(year=year)
-
-    try:
-        response = requests.get(url, headers=HEADERS)
-        soup = BeautifulSoup(response.text, "html.parser")
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` requests per second on average"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = 1.0
+        self.updated = monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        while True:
+            with self.lock:
+                now = monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            sleep(wait)
+
+
+def make_session(pool_size=10):
+    """Create a keep-alive HTTP session with room for pool_size concurrent connections"""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def resolve_url(url):
+    """Map a canonical site url onto the mirror, if one is configured"""
+    if MIRROR_URL:
+        return MIRROR_URL.rstrip("/") + url[len(SITE_URL):]
+    return url
+
+
+def page_kind(url):
+    """Metrics label for a site url"""
+    if DETAIL_PAGE.search(url):
+        return "detail"
+    if YEAR_PAGE.search(url):
+        return "year"
+    return "other"
+
+
+def fetch(url, session=None, limiter=None, cache=None):
+    """GET a site url, honouring the mirror setting and the rate limiter.
+
+    With a cache, settled pages are served from disk without a request and any other
+    cached page is revalidated with a conditional request.
+    """
+    page = page_kind(url)
+    headers = {}
+    if cache:
+        if cache.is_settled(url):
+            cached = cache.response(url)
+            if cached:
+                metrics.inc("cache_hits_total", page=page, result="settled")
+                metrics.event("fetch", url=url, page=page, status="cached")
+                return cached
+        headers = cache.validators(url)
+
+    if limiter:
+        with metrics.timed("rate_limit_wait_seconds", page=page):
+            limiter.acquire()
+    start = monotonic()
+    if session:
+        response = session.get(resolve_url(url), headers=headers)
+    else:
+        response = requests.get(resolve_url(url), headers={**HEADERS, **headers})
+    seconds = monotonic() - start
+    size = len(response.content)
+
+    metrics.observe("fetch_seconds", seconds, page=page)
+    metrics.observe("response_bytes", size, page=page)
+    metrics.inc("http_responses_total", page=page, status=response.status_code)
+    metrics.event("fetch", url=url, page=page, status=response.status_code,
+                  seconds=round(seconds, 4), bytes=size)
+
+    if cache:
+        if response.status_code == 304 and url in cache:
+            metrics.inc("cache_hits_total", page=page, result="revalidated")
+            cache.revalidated(url)
+            return cache.response(url) or fetch(url, session, limiter)
+        if response.status_code == 200:
+            cache.store(url, response.content, response.encoding,
+                        response.headers.get("ETag"), response.headers.get("Last-Modified"))
+    return response
+
+
+def parse_year_page(html_content):
+    """Extract the draw dates (MM-DD-YYYY) listed on a year archive page"""
+    soup = BeautifulSoup(html_content, "html.parser")
+
+    # Find the table with class "archiveResults mobFormat"
+    table = soup.find("table", {"class": "archiveResults mobFormat"})
+
+    dates = []
+
+    # Check if table exists
+    if table and table.find("tbody"):
+        # Iterate through each row in the table body
+        for row in table.find("tbody").find_all("tr"):
+            # Skip rows that don't contain lottery results
+            if not row.find("ul", {"class": "balls"}):
+                continue
 
-        # Find the table with class "archiveResults mobFormat"
-        table = soup.find("table", {"class": "archiveResults mobFormat"})
+            # Extract date
+            date_cell = row.find("td", {"class": "noBefore colour"})
+            if date_cell and date_cell.find("a"):
+                date_str = date_cell.find("a").get_text(strip=True)
+                # Convert date string to proper format (MM-DD-YYYY)
+                try:
+                    date_obj = datetime.strptime(date_str, "%B %d %Y")
+                    formatted_date = date_obj.strftime("%m-%d-%Y")
+                    dates.append(formatted_date)
+                except ValueError as e:
+                    print(f"Error parsing date {date_str}: {e}")
 
-        dates = []
+    return dates
 
-        # Check if table exists
-        if table and table.find("tbody"):
-            # Iterate through each row in the table body
-            for row in table.find("tbody").find_all("tr"):
-                # Skip rows that don't contain lottery results
-                if not row.find("ul", {"class": "balls"}):
-                    continue
 
-                # Extract date
-                date_cell = row.find("td", {"class": "noBefore colour"})
-                if date_cell and date_cell.find("a"):
-                    date_str = date_cell.find("a").get_text(strip=True)
-                    # Convert date string to proper format (MM-DD-YYYY)
-                    try:
-                        date_obj = datetime.strptime(date_str, "%B %d %Y")
-                        formatted_date = date_obj.strftime("%m-%d-%Y")
-                        dates.append(formatted_date)
-                    except ValueError as e:
-                        print(f"Error parsing date {date_str}: {e}")
+def extract_open_data(year, session=None, cache=None):
+    """Extract all lottery draw dates for a given year"""
+    url = YEAR_URL.format(year=year)
 
+    try:
+        response = fetch(url, session, cache=cache)
+        with metrics.timed("parse_seconds", section="year_page"):
+            dates = parse_year_page(response.text)
         print(f"Found {len(dates)} dates for year {year}")
         return dates
 
     except Exception as e:
         print(f"Error extracting dates for year {year}: {e}")
+        metrics.inc("scrape_failures_total", page="year")
         return []
 
 
-def get_all_dates(start_year=2009, end_year=2024):
-    """Get all lottery dates from start_year to end_year"""
+def get_all_dates(start_year=FIRST_DRAW.year, end_year=None, session=None, cache=None):
+    """Get all lottery dates from start_year to end_year (default: this year)"""
+    end_year = end_year or date.today().year
     all_dates = []
 
     for year in range(start_year, end_year + 1):
         print(f"\nExtracting dates for {year}...")
-        year_dates = extract_open_data(year)
+        from_cache = cache is not None and cache.is_settled(YEAR_URL.format(year=year))
+        year_dates = extract_open_data(year, session, cache)
         all_dates.extend(year_dates)
-        sleep(1)  # Be nice to the server
+        if not from_cache:
+            sleep(1)  # Be nice to the server
 
     return all_dates
 
 
 def extract_main_draw(soup):
+    return parse_main_draw(soup.find("div", class_="mainResult lottoMax green"))
+
+
+def parse_main_draw(main_result):
+    """Parse the main result section: draw date, numbers, bonus, jackpot and winners"""
     try:
-        main_result = soup.find("div", class_="mainResult lottoMax green")
         if not main_result:
             print("Could not find main result section")
             return None
@@ -116,10 +242,14 @@ def extract_main_draw(soup):
 
 def extract_max_millions(soup):
     """Extract all Max Millions numbers and details"""
+    return parse_max_millions(soup.find("div", class_="maxMillionsResultsWrap"))
+
+
+def parse_max_millions(max_millions_div):
+    """Parse the Max Millions section into its count and winning number sets"""
     try:
         max_millions = []
-        max_millions_div = soup.find("div", class_="maxMillionsResultsWrap")
-        
+
         if max_millions_div:
             # Method 1: Count divs
             div_count = len(max_millions_div.find_all("div", class_="maxMillionResults"))
@@ -174,21 +304,31 @@ def extract_max_millions(soup):
 
 
 def extract_prize_breakdown(soup):
+    return parse_prize_breakdown(soup.find("table", class_="tableBreakdown"))
+
+
+def parse_prize_breakdown(breakdown_table):
+    """Parse the prize breakdown table into one dict per prize tier"""
     try:
-        breakdown_table = soup.find("table", class_="tableBreakdown")
         prize_tiers = []
 
-        if breakdown_table and breakdown_table.find("tbody"):
-            for row in breakdown_table.find("tbody").find_all("tr"):
+        tbody = breakdown_table.find("tbody") if breakdown_table else None
+        if tbody:
+            for row in tbody.find_all("tr"):
                 if "Totals" in row.text:
                     continue
 
                 try:
+                    # One pass over the row's cells; the first cell with a given title wins
+                    cells = {}
+                    for cell in row.find_all("td", attrs={"data-title": True}):
+                        cells.setdefault(cell["data-title"], cell)
+                    strong = row.find("strong")
                     tier = {
-                        "match_type": row.find("strong").text.strip() if row.find("strong") else "",
-                        "prize_per_winner": row.find("td", {"data-title": "Prize Per Winner"}).text.strip() if row.find("td", {"data-title": "Prize Per Winner"}) else "",
-                        "winners": row.find("td", {"data-title": "Winners"}).text.strip() if row.find("td", {"data-title": "Winners"}) else "",
-                        "prize_fund": row.find("td", {"data-title": "Prize Fund"}).text.strip() if row.find("td", {"data-title": "Prize Fund"}) else "",
+                        "match_type": strong.text.strip() if strong else "",
+                        "prize_per_winner": cells["Prize Per Winner"].text.strip() if "Prize Per Winner" in cells else "",
+                        "winners": cells["Winners"].text.strip() if "Winners" in cells else "",
+                        "prize_fund": cells["Prize Fund"].text.strip() if "Prize Fund" in cells else "",
                     }
                     prize_tiers.append(tier)
                 except Exception as e:
@@ -202,8 +342,12 @@ def extract_prize_breakdown(soup):
 
 
 def extract_statistics(soup):
+    return parse_statistics(soup.find("div", class_="prizeStatsBox"))
+
+
+def parse_statistics(stats_box):
+    """Parse the prize statistics boxes, keyed by their display titles"""
     try:
-        stats_box = soup.find("div", class_="prizeStatsBox")
         stats = {}
 
         if stats_box:
@@ -259,12 +403,17 @@ def extract_statistics(soup):
 
 
 def extract_provincial_stats(soup):
+    return parse_provincial_stats(soup.find("table", class_="provinceStats"))
+
+
+def parse_provincial_stats(province_table):
+    """Parse the provincial winners table"""
     try:
-        province_table = soup.find("table", class_="provinceStats")
         provinces = []
 
-        if province_table and province_table.find("tbody"):
-            for row in province_table.find("tbody").find_all("tr"):
+        tbody = province_table.find("tbody") if province_table else None
+        if tbody:
+            for row in tbody.find_all("tr"):
                 try:
                     cells = row.find_all("td")
                     if len(cells) >= 3:
@@ -286,32 +435,158 @@ def extract_provincial_stats(soup):
 
 def extract_all_lottery_data(html_content):
     try:
-        soup = BeautifulSoup(html_content, "html.parser")
+        with metrics.timed("parse_seconds", section="soup"):
+            soup = BeautifulSoup(html_content, "html.parser")
         
-        main_draw = extract_main_draw(soup)
+        with metrics.timed("parse_seconds", section="main_draw"):
+            main_draw = extract_main_draw(soup)
         if not main_draw:
             print("Failed to extract main draw data")
             return None
 
-        return {
-            "main_draw": main_draw,
-            "max_millions": extract_max_millions(soup),
-            "prize_breakdown": extract_prize_breakdown(soup),
-            "statistics": extract_statistics(soup),
-            "provincial_stats": extract_provincial_stats(soup),
-        }
+        data = {"main_draw": main_draw}
+        for section, extract in (
+            ("max_millions", extract_max_millions),
+            ("prize_breakdown", extract_prize_breakdown),
+            ("statistics", extract_statistics),
+            ("provincial_stats", extract_provincial_stats),
+        ):
+            with metrics.timed("parse_seconds", section=section):
+                data[section] = extract(soup)
+        return data
     except Exception as e:
         print(f"Error in extract_all_lottery_data: {str(e)}")
         return None
 
 
-def scrape_detail_page(date, max_retries=3):
+# (tag, class) of each result section, matched the same way as soup.find(tag, class_=...)
+RESULT_SECTIONS = {
+    "main_draw": ("div", "mainResult lottoMax green"),
+    "max_millions": ("div", "maxMillionsResultsWrap"),
+    "prize_breakdown": ("table", "tableBreakdown"),
+    "statistics": ("div", "prizeStatsBox"),
+    "provincial_stats": ("table", "provinceStats"),
+}
+
+SECTION_MARKERS = ["mainResult", "maxMillionsResultsWrap", "tableBreakdown", "prizeStatsBox", "provinceStats"]
+
+# Only build the subtrees of elements carrying one of the section classes. A pattern
+# rather than a list, because while parsing the strainer may see the unsplit class string.
+SECTION_STRAINER = SoupStrainer(attrs={"class": re.compile(r"\b(?:%s)\b" % "|".join(SECTION_MARKERS))})
+
+PARSER_FEATURES = "html.parser"
+
+
+def trim_to_sections(html_content):
+    """Cut the page down to the span holding the result sections, leaving the sections untouched.
+
+    Everything before the first section is dropped. The tail is dropped too when the last
+    section is a table, since it ends at the next </table> (these tables don't nest).
+    """
+    positions = {marker: html_content.rfind(marker) for marker in SECTION_MARKERS}
+    positions = {marker: i for marker, i in positions.items() if i != -1}
+    if not positions:
+        return html_content
+
+    first = min(html_content.find(marker) for marker in positions)
+    start = max(html_content.rfind("<", 0, first), 0)
+
+    end = len(html_content)
+    last_marker = max(positions, key=positions.get)
+    if last_marker in ("tableBreakdown", "provinceStats"):
+        table_end = html_content.find("</table>", positions[last_marker])
+        if table_end != -1:
+            end = table_end + len("</table>")
+    return html_content[start:end]
+
+
+def find_sections(soup):
+    """Locate every result section in a single walk, keeping the first match like soup.find()"""
+    sections = {}
+    for tag in soup.find_all(["div", "table"], class_=SECTION_MARKERS):
+        classes = tag.get("class", [])
+        for key, (name, class_name) in RESULT_SECTIONS.items():
+            if key in sections or tag.name != name:
+                continue
+            if class_name in classes or " ".join(classes) == class_name:
+                sections[key] = tag
+    return sections
+
+
+def extract_all_lottery_data_fast(html_content, features=PARSER_FEATURES):
+    """High-throughput variant of extract_all_lottery_data() producing the same dicts.
+
+    Only the result sections are parsed into a tree, they are located in one walk and
+    each one is visited once. features selects the tree builder: "lxml" is faster but
+    normalises the "\r\n" inside the winners cells, so check a builder with
+    check_parser_parity() before switching to it.
+    """
+    try:
+        with metrics.timed("parse_seconds", section="soup"):
+            soup = BeautifulSoup(trim_to_sections(html_content), features, parse_only=SECTION_STRAINER)
+            sections = find_sections(soup)
+
+        with metrics.timed("parse_seconds", section="main_draw"):
+            main_draw = parse_main_draw(sections.get("main_draw"))
+        if not main_draw:
+            print("Failed to extract main draw data")
+            return None
+
+        data = {"main_draw": main_draw}
+        for section, parse in (
+            ("max_millions", parse_max_millions),
+            ("prize_breakdown", parse_prize_breakdown),
+            ("statistics", parse_statistics),
+            ("provincial_stats", parse_provincial_stats),
+        ):
+            with metrics.timed("parse_seconds", section=section):
+                data[section] = parse(sections.get(section))
+        return data
+    except Exception as e:
+        print(f"Error in extract_all_lottery_data_fast: {str(e)}")
+        return None
+
+
+def check_parser_parity(cache, features=PARSER_FEATURES):
+    """Check that the fast parser's output is byte-identical on every cached detail page.
+
+    Returns the urls whose serialized records differ.
+    """
+    urls = [url for url in cache.urls() if DETAIL_PAGE.search(url)]
+    mismatched = []
+    reference_time = fast_time = 0.0
+
+    for url in urls:
+        html = cache.get_text(url)
+        if html is None:
+            continue
+        start = monotonic()
+        expected = json.dumps(extract_all_lottery_data(html), indent=2)
+        reference_time += monotonic() - start
+        start = monotonic()
+        actual = json.dumps(extract_all_lottery_data_fast(html, features), indent=2)
+        fast_time += monotonic() - start
+        if actual != expected:
+            mismatched.append(url)
+
+    print(f"\nChecked {len(urls)} cached pages with {features}: {len(mismatched)} mismatched")
+    for url in mismatched[:20]:
+        print(f"  {url}")
+    if urls and fast_time:
+        print(f"Reference parser: {len(urls) / reference_time:.1f} pages/s, "
+              f"fast parser: {len(urls) / fast_time:.1f} pages/s")
+    return mismatched
+
+
+def scrape_detail_page(date, max_retries=3, session=None, limiter=None, cache=None):
     """Scrape the detail page for a specific date with retries"""
     url = DETAIL_URL.format(date=date)
     
     for attempt in range(max_retries):
         try:
-            response = requests.get(url, headers=HEADERS)
+            if attempt:
+                metrics.inc("retries_total", page="detail")
+            response = fetch(url, session, limiter, cache)
             if response.status_code == 404:
                 print(f"No results found for {date}")
                 return None
@@ -320,77 +595,233 @@ def scrape_detail_page(date, max_retries=3):
                 sleep(2)  # Wait before retry
                 continue
                 
-            data = extract_all_lottery_data(response.text)
+            with metrics.timed("parse_seconds", section="page"):
+                data = extract_all_lottery_data(response.text)
             if data:
                 data['date'] = date
                 data['url'] = url
                 return data
+            metrics.inc("parse_failures_total", page="detail")
             
         except Exception as e:
             print(f"Attempt {attempt + 1} failed for {date}: {str(e)}")
+            metrics.event("error", url=url, attempt=attempt + 1, error=str(e))
             sleep(2)  # Wait before retry
             
     print(f"Failed to scrape {date} after {max_retries} attempts")
+    metrics.inc("scrape_failures_total", page="detail")
     return None
 
 
-def main():
-    # First get all dates
-    print("Getting all lottery draw dates...")
-    all_dates = get_all_dates(2009, 2024)
-    print(f"\nFound total of {len(all_dates)} draw dates")
-    
-    # Update lottery_dates.json
-    with open('lottery_dates.json', 'w') as f:
-        json.dump(all_dates, f, indent=2)
-    
-    # Try to load existing results
+def scrape_dates(dates, workers=1, rate=1.0, session=None, cache=None):
+    """Scrape the detail pages for dates concurrently, returning results in the order of dates"""
+    session = session or make_session(workers)
+    limiter = TokenBucket(rate) if rate else None
+    total = len(dates)
+
+    def scrape_one(item):
+        i, date = item
+        print(f"\nScraping {date} ({i}/{total})...")
+        return scrape_detail_page(date, session=session, limiter=limiter, cache=cache)
+
+    # map() yields in submission order, so the output matches a sequential run
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(scrape_one, enumerate(dates, 1)))
+
+    return [result for result in results if result]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape Lotto Max results")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of detail pages fetched concurrently (default: 1)")
+    parser.add_argument("--rate", type=float, default=1.0,
+                        help="maximum requests per second, 0 for no limit (default: 1.0)")
+    parser.add_argument("--backend", choices=["threads", "async"], default="threads",
+                        help="scraping engine; async caps in-flight requests at --workers")
+    parser.add_argument("--cache-dir", default=CACHE_DIR,
+                        help=f"raw html cache directory (default: {CACHE_DIR})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always download pages, without reading or writing the cache")
+    parser.add_argument("--offline", action="store_true",
+                        help="rebuild the stored results from cached pages only")
+    parser.add_argument("--crawl", action="store_true",
+                        help="list the draws from every year archive page instead of the draw calendar")
+    parser.add_argument("--store", default=STORE_PATH,
+                        help=f"results database (default: {STORE_PATH})")
+    parser.add_argument("--export-json", action="store_true",
+                        help="also rewrite lottery_results_final.json after adding new draws")
+    parser.add_argument("--fast-parse", action="store_true",
+                        help="parse with extract_all_lottery_data_fast when rebuilding offline")
+    parser.add_argument("--check-parser-parity", "--check-parity", dest="check_parser_parity", action="store_true",
+                        help="compare the fast parser with the reference parser on cached pages")
+    parser.add_argument("--parser-features", default=PARSER_FEATURES,
+                        help=f"tree builder for the fast parser (default: {PARSER_FEATURES})")
+    parser.add_argument("--metrics", default=metrics.METRICS_PATH,
+                        help=f"write run metrics to this path + .json / .prom (default: {metrics.METRICS_PATH})")
+    parser.add_argument("--no-metrics", action="store_true", help="don't write the metrics files")
+    return parser.parse_args(argv)
+
+
+def reparse_from_cache(cache, store, parse=extract_all_lottery_data):
+    """Rebuild the stored results from cached detail pages, without any network access"""
     try:
-        with open('lottery_results_final.json', 'r') as f:  # Changed from partial to final
-            existing_results = json.load(f)
-            print(f"\nLoaded {len(existing_results)} existing results")
-            
-        # Find new dates to scrape
-        existing_dates = set(r['date'] for r in existing_results)
-        new_dates = [d for d in all_dates if d not in existing_dates]
-        print(f"\nNew dates to scrape: {len(new_dates)}")
-        
-        if not new_dates:
-            print("No new draws to scrape. Exiting...")
-            return
-        
-        # Scrape only new dates
-        print("\nScraping new draws...")
-        for i, date in enumerate(new_dates, 1):
-            print(f"\nScraping {date} ({i}/{len(new_dates)})...")
-            result = scrape_detail_page(date)
-            if result:
-                existing_results.append(result)
-            sleep(1)
-        
-        # Save updated results
-        print("\nSaving updated results...")
-        with open('lottery_results_final.json', 'w') as f:
-            json.dump(existing_results, f, indent=2)
-        
+        with open(DATES_FILE, 'r') as f:
+            lottery_dates = json.load(f)
     except FileNotFoundError:
+        lottery_dates = []
+
+    # Keep the current record order, then any listed draws that were never saved
+    previous = {r['date']: r for r in store.records()}
+    dates = list(previous) + [d for d in lottery_dates if d not in previous]
+
+    results = []
+    missing = []
+    for date in dates:
+        url = DETAIL_URL.format(date=date)
+        html = cache.get_text(url)
+        data = parse(html) if html else None
+        if data:
+            data['date'] = date
+            data['url'] = url
+            results.append(data)
+        elif date in previous:
+            # Nothing usable cached; keep what we had rather than dropping the draw
+            missing.append(date)
+            results.append(previous[date])
+
+    print(f"\nReparsed {len(results) - len(missing)} draws from cache")
+    if missing:
+        print(f"Kept {len(missing)} existing records with no cached page: {', '.join(missing[:10])}"
+              + (" ..." if len(missing) > 10 else ""))
+
+    store.replace_all(results)
+
+
+def crawl_archives(start_year, skip_dates, args, session=None, cache=None):
+    """List the draws on the year archives from start_year on and scrape the ones not in skip_dates.
+
+    Returns (listed dates, new results).
+    """
+    if args.backend == "async":
+        # Year pages and the detail pages they list are fetched in one overlapped pass
+        import asyncio
+        from async_scrape import scrape_async
+        return asyncio.run(scrape_async(start_year, None, skip_dates, concurrency=args.workers, cache=cache))
+
+    all_dates = get_all_dates(start_year, None, session, cache)
+    new_dates = [d for d in all_dates if d not in skip_dates]
+    print(f"\nNew dates to scrape: {len(new_dates)}")
+    new_results = []
+    if new_dates:
+        print("\nScraping new draws...")
+        new_results = scrape_dates(new_dates, args.workers, args.rate, session, cache)
+    return all_dates, new_results
+
+
+def scrape_scheduled(calendar, args, session=None, cache=None):
+    """Scrape the draws the schedule expects after the last known one.
+
+    The year archives are only crawled when an expected draw has no results, e.g. a
+    cancelled or moved draw, and then only from the year of the last known draw.
+    Returns (every known date in archive order, new results).
+    """
+    expected = calendar.expected_after()
+    print(f"\nExpecting {len(expected)} new draws after {site_date(calendar.last)}")
+    new_results = []
+    if expected:
+        print("\nScraping new draws...")
+        if args.backend == "async":
+            import asyncio
+            from async_scrape import scrape_dates_async
+            new_results = asyncio.run(scrape_dates_async(expected, concurrency=args.workers, cache=cache))
+        else:
+            new_results = scrape_dates(expected, args.workers, args.rate, session, cache)
+
+    found = {result['date'] for result in new_results}
+    missed = [d for d in expected if d not in found]
+    metrics.inc("calendar_probes_total", len(found), result="found")
+    metrics.inc("calendar_probes_total", len(missed), result="missed")
+    listed = DrawCalendar.load(DATES_FILE)
+    if missed:
+        print(f"\nNo results for {', '.join(missed)}; checking the year archives")
+        archive_dates, more = crawl_archives(calendar.last.year, set(calendar.site_dates()) | found,
+                                             args, session, cache)
+        listed.add(archive_dates)
+        new_results += more
+
+    listed.add(calendar.days)
+    listed.add(found)
+    return listed.site_dates(), new_results
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        run(args)
+    finally:
+        # Written on every exit path, including "no new draws" and errors
+        if not args.no_metrics:
+            metrics.print_summary()
+            json_path, prom_path = metrics.write(args.metrics)
+            print(f"Wrote metrics to {json_path} and {prom_path}")
+
+
+def run(args):
+    cache = None if args.no_cache else HtmlCache(args.cache_dir)
+
+    if args.check_parser_parity:
+        if cache is None:
+            print("--check-parser-parity needs the cache")
+            return
+        check_parser_parity(cache, args.parser_features)
+        return
+
+    store = open_store(args.store)
+
+    if args.offline:
+        if cache is None:
+            print("--offline needs the cache")
+            return
+        parse = extract_all_lottery_data
+        if args.fast_parse:
+            parse = lambda html: extract_all_lottery_data_fast(html, args.parser_features)
+        reparse_from_cache(cache, store, parse)
+        store.export_json()
+        return
+
+    existing_dates = store.dates()
+    if existing_dates:
+        print(f"\nLoaded {len(existing_dates)} existing results")
+    else:
         print("\nNo existing results found, starting fresh")
-        # If no existing file, scrape all dates
-        all_results = []
-        for i, date in enumerate(all_dates, 1):
-            print(f"\nScraping {date} ({i}/{len(all_dates)})...")
-            result = scrape_detail_page(date)
-            if result:
-                all_results.append(result)
-            sleep(1)
-        
-        # Save results
-        print("\nSaving results...")
-        with open('lottery_results_final.json', 'w') as f:
-            json.dump(all_results, f, indent=2)
-    
+
+    session = make_session(args.workers) if args.backend == "threads" else None
+    calendar = DrawCalendar(existing_dates)
+    if calendar and not args.crawl:
+        all_dates, new_results = scrape_scheduled(calendar, args, session, cache)
+    else:
+        print("Getting all lottery draw dates...")
+        all_dates, new_results = crawl_archives(FIRST_DRAW.year, existing_dates, args, session, cache)
+    print(f"\nFound total of {len(all_dates)} draw dates")
+
+    # Update lottery_dates.json
+    with open(DATES_FILE, 'w') as f:
+        json.dump(all_dates, f, indent=2)
+
+    if not new_results:
+        print("No new draws to scrape. Exiting...")
+        return
+
+    # Only the new draws are written; the legacy JSON is exported on request
+    print("\nSaving results...")
+    added = store.append(new_results)
+    print(f"Added {added} draws to {args.store}")
+    if args.export_json:
+        store.export_json()
+
     print("\nScraping completed!")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,406 @@
+"""Local HTTP query service over the draw history, kept in memory between requests.
+
+The history is loaded once into an index and requests are answered from it, so a
+lookup doesn't re-read the results file. The index holds:
+
+- the draws by date
+- ticket bitmasks
+- a StatsQuery
+- the draw calendar
+
+The file is checked for changes every --reload-interval seconds. A changed file is
+loaded in a worker thread, and the new index replaces the old one once it is built.
+Requests are served from the old index in the meantime.
+
+    python service.py --data lottery_results_final.json --port 8080
+
+    GET /draw/latest                          the latest draw
+    GET /draw/2024-12-31                      a draw by date (YYYY-MM-DD or MM-DD-YYYY)
+    GET /check?numbers=1,2,3,4,5,6,7          a ticket against every draw (&date=... for one draw)
+    GET /frequencies?era=rng&weekdays=tuesday&last=100&top=7
+    GET /next-draw
+    GET /stats                                request counts, latencies and index status
+    GET /metrics                              the same counters in Prometheus text format
+
+Only the standard library and numpy are used; it binds to localhost by default.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import date as Date
+from functools import lru_cache
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+import metrics
+import records
+from draw_calendar import DrawCalendar, parse_date, site_date
+from normalize import TIER_NAMES
+from stats_query import CACHE_SIZE, StatsQuery
+from ticket_eval import NO_PRIZE, TIER_LABELS, TIER_OF, draw_tier_maps, popcount, ticket_masks, to_masks
+
+DATA_FILE = "lottery_results_final.json"
+HOST = "127.0.0.1"
+PORT = 8080
+RELOAD_INTERVAL = 1.0
+
+# Request latencies are mostly well under a millisecond
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05, 0.25, 1.0)
+
+# Largest request head accepted, and winning draws listed by /check
+MAX_HEAD_BYTES = 16_384
+WINS_LISTED = 20
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           500: "Internal Server Error"}
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def source_version(source):
+    """(mtime, size) of the data source; for a directory, of its newest file.
+
+    A .db store also counts its write-ahead log.
+    """
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in os.listdir(source)]
+    else:
+        paths = [source, source + "-wal"]
+    stats = [os.stat(path) for path in paths if os.path.isfile(path)]
+    if not stats:
+        raise FileNotFoundError(source)
+    return max(s.st_mtime_ns for s in stats), sum(s.st_size for s in stats)
+
+
+def draw_dict(draw):
+    return {
+        "date": draw.date.isoformat(),
+        "weekday": draw.date.strftime("%A"),
+        "balls": list(draw.balls),
+        "bonus": draw.bonus,
+        "jackpot_cents": draw.jackpot_cents,
+        "total_sales_cents": draw.total_sales_cents,
+        "tickets_sold": draw.tickets_sold,
+        "total_winners": draw.total_winners,
+        "max_millions": [list(numbers) for numbers in draw.max_millions],
+        "tiers": [{"name": t.name, "prize_cents": t.prize_cents, "winners": t.winners,
+                   "carried_over": t.carried_over, "free_play": t.free_play} for t in draw.tiers],
+        "provinces": [{"name": p.name, "winners": p.winners, "amount_cents": p.amount_cents}
+                      for p in draw.provinces],
+    }
+
+
+class HistoryIndex:
+    """Everything the endpoints read, built once per version of the data"""
+
+    def __init__(self, draws, source=None, version=None):
+        self.draws = sorted(draws, key=lambda draw: draw.date)
+        self.source = source
+        self.version = version
+        self.loaded_at = time.time()
+        self.by_date = {draw.date: i for i, draw in enumerate(self.draws)}
+        self.dates = np.array([draw.date for draw in self.draws], dtype="datetime64[D]")
+        self.masks = to_masks([draw.balls for draw in self.draws]) if self.draws else np.zeros(0, np.uint64)
+        self.bonus_masks = np.array([1 << (draw.bonus or 0) if draw.bonus else 0 for draw in self.draws],
+                                    dtype=np.uint64)
+        # prizes[draw, tier code]: prize per winner in cents, -1 when unknown
+        self.prizes = np.full((len(self.draws), len(TIER_NAMES)), -1, dtype=np.int64)
+        self.free_plays = np.zeros(self.prizes.shape, dtype=bool)
+        listed = np.zeros(self.prizes.shape, dtype=bool)
+        for i, draw in enumerate(self.draws):
+            for tier in draw.tiers:
+                code = tier.code
+                if code is None:
+                    continue
+                listed[i, code] = True
+                if tier.prize_cents is not None:
+                    self.prizes[i, code] = tier.prize_cents
+                self.free_plays[i, code] = tier.free_play
+        # Tier a win counts in on each draw, for draws without the newer bonus tiers
+        self.tier_map = draw_tier_maps(listed)
+        self.query = StatsQuery.from_draws(self.draws)
+        # Answers by query string, so a repeated window skips StatsQuery's selection as well
+        self.window = lru_cache(maxsize=CACHE_SIZE)(self.window_summary)
+        self.calendar = DrawCalendar(self.by_date)
+
+    @classmethod
+    def load(cls, source):
+        version = source_version(source)
+        return cls(records.load(source), source, version)
+
+    def draw(self, day):
+        """The draw on a YYYY-MM-DD or MM-DD-YYYY date, or "latest" """
+        if not self.draws:
+            raise RequestError(404, "no draws loaded")
+        if day == "latest":
+            return self.draws[-1]
+        try:
+            day = Date.fromisoformat(day) if day[4:5] == "-" else parse_date(day)
+        except ValueError:
+            raise RequestError(400, f"bad date {day!r}, use YYYY-MM-DD or MM-DD-YYYY")
+        if day not in self.by_date:
+            raise RequestError(404, f"no draw on {day.isoformat()}")
+        return self.draws[self.by_date[day]]
+
+    def check(self, numbers, day=None, since=None):
+        """Prize tiers a ticket would have won, on one draw or over the history"""
+        try:
+            mask = ticket_masks([numbers])[0]
+        except ValueError as e:
+            raise RequestError(400, str(e))
+        rows = np.arange(len(self.draws))
+        if day is not None:
+            rows = rows[[self.by_date[self.draw(day).date]]]
+        elif since is not None:
+            try:
+                start = np.datetime64(Date.fromisoformat(since), "D")
+            except ValueError:
+                raise RequestError(400, f"bad date {since!r}, use YYYY-MM-DD")
+            rows = rows[np.searchsorted(self.dates, start):]
+        matched = popcount(self.masks[rows] & mask)
+        bonus = (self.bonus_masks[rows] & mask) != 0
+        tiers = self.tier_map[rows, TIER_OF[matched, bonus.astype(np.intp)]]
+
+        def result(row, tier):
+            draw = self.draws[row]
+            won = tier != NO_PRIZE
+            prize = int(self.prizes[row, tier]) if won and self.prizes[row, tier] >= 0 else None
+            return {"date": draw.date.isoformat(), "matched": sorted(set(numbers) & set(draw.balls)),
+                    "bonus": draw.bonus in numbers, "tier": TIER_LABELS[tier], "prize_cents": prize,
+                    "free_play": won and bool(self.free_plays[row, tier]),
+                    "max_millions": tuple(sorted(numbers)) in draw.max_millions}
+
+        if day is not None:
+            return result(int(rows[0]), int(tiers[0]))
+        won = np.flatnonzero(tiers != NO_PRIZE)
+        prizes = self.prizes[rows[won], tiers[won]]
+        cash = prizes[(prizes > 0) & ~self.free_plays[rows[won], tiers[won]]]
+        histogram = np.bincount(tiers, minlength=len(TIER_LABELS))
+        return {
+            "numbers": sorted(numbers),
+            "draws": len(rows),
+            "tiers": {label: int(count) for label, count in zip(TIER_LABELS, histogram) if count},
+            "prize_cents": int(cash.sum()),
+            # Latest first
+            "wins": [result(int(rows[i]), int(tiers[i])) for i in won[::-1][:WINS_LISTED]],
+        }
+
+    def frequencies(self, params):
+        """StatsQuery summary and number counts for the window described by the query string"""
+        return self.window(tuple(sorted(params.items())))
+
+    def window_summary(self, params):
+        params = dict(params)
+        query = {}
+        for name in ("start", "end", "era"):
+            if name in params:
+                query[name] = params[name]
+        for name in ("weekdays", "bands"):
+            if name in params:
+                query[name] = params[name].split(",")
+        try:
+            if "last" in params:
+                query["last"] = int(params["last"])
+            top = int(params.get("top", 7))
+            summary = self.query.summary(top, **query)
+            counts = self.query.frequencies(**query)
+        except KeyError as e:
+            raise RequestError(400, f"unknown value {e}")
+        except ValueError as e:
+            raise RequestError(400, str(e))
+        summary["frequencies"] = {str(n): int(counts[n]) for n in range(1, len(counts))}
+        return summary
+
+    def next_draw(self):
+        day = self.calendar.next_draw()
+        return {"date": day.isoformat(), "site_date": site_date(day), "weekday": day.strftime("%A"),
+                "days_away": (day - Date.today()).days,
+                "last_draw": self.calendar.last.isoformat() if self.calendar.last else None}
+
+
+class QueryService:
+    def __init__(self, source=DATA_FILE, reload_interval=RELOAD_INTERVAL):
+        self.source = source
+        self.reload_interval = reload_interval
+        self.registry = metrics.Registry({"request_seconds": LATENCY_BUCKETS})
+        self.started = time.time()
+        self.reloads = 0
+        self.reload_error = None
+        self.failed_version = None
+        self.index = HistoryIndex.load(source)
+        self.routes = {
+            "draw": self.get_draw,
+            "check": self.get_check,
+            "frequencies": lambda path, params: self.index.frequencies(params),
+            "next-draw": lambda path, params: self.index.next_draw(),
+            "stats": self.get_stats,
+        }
+
+    def get_draw(self, path, params):
+        parts = path.split("/")
+        if len(parts) != 3 or not parts[2]:
+            raise RequestError(404, "use /draw/<date> or /draw/latest")
+        return draw_dict(self.index.draw(parts[2]))
+
+    def get_check(self, path, params):
+        if "numbers" not in params:
+            raise RequestError(400, "numbers is required, e.g. ?numbers=1,2,3,4,5,6,7")
+        try:
+            numbers = [int(n) for n in params["numbers"].split(",")]
+        except ValueError:
+            raise RequestError(400, "numbers must be comma-separated integers")
+        return self.index.check(numbers, params.get("date"), params.get("since"))
+
+    def get_stats(self, path, params):
+        snapshot = self.registry.snapshot()
+        index = self.index
+        return {
+            "uptime_seconds": round(time.time() - self.started, 3),
+            "source": index.source,
+            "draws": len(index.draws),
+            "loaded_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(index.loaded_at)),
+            "reloads": self.reloads,
+            "reload_error": self.reload_error,
+            "stats_cache": index.query.cache_info()._asdict(),
+            "requests": snapshot["counters"],
+            "latency_seconds": [{key: value for key, value in h.items() if key != "buckets"}
+                                for h in snapshot["histograms"]],
+        }
+
+    def respond(self, method, target):
+        """(endpoint, status, body) for one request; the body is a JSON-able dict or Prometheus text"""
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+        route = path.split("/")[1] if path != "/" else ""
+        if method not in ("GET", "HEAD"):
+            return route, 405, {"error": f"{method} not allowed"}
+        if route == "metrics":
+            return route, 200, self.registry.prometheus()
+        if route not in self.routes:
+            return "unknown", 404, {"error": f"no endpoint {path}", "endpoints": sorted(self.routes) + ["metrics"]}
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            return route, 200, self.routes[route](path, params)
+        except RequestError as e:
+            return route, e.status, {"error": str(e)}
+        except Exception as e:
+            print(f"Error answering {target}: {e!r}")
+            return route, 500, {"error": "internal error"}
+
+    async def reply(self, writer, method, status, body, keep_alive):
+        """Write one response; body is a JSON-able dict or Prometheus text"""
+        if isinstance(body, str):
+            content_type, payload = "text/plain; version=0.0.4", body.encode()
+        else:
+            content_type, payload = "application/json", json.dumps(body).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(payload)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}"
+            f"\r\n\r\n".encode("latin-1") + (payload if method != "HEAD" else b""))
+        await writer.drain()
+
+    async def handle(self, reader, writer):
+        """Serve the requests of one connection, keeping it open between requests (HTTP/1.1)"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                start = time.perf_counter()
+                lines = head.decode("latin-1").split("\r\n")
+                request_line = lines[0].split(" ")
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = headers.get("content-length") or "0"
+
+                # Without a request line or a body length the rest of the stream can't be
+                # read, so answer 400 and close the connection
+                if len(request_line) != 3 or not length.isdigit():
+                    error = "malformed request line" if len(request_line) != 3 else f"bad Content-Length {length!r}"
+                    await self.reply(writer, "GET", 400, {"error": error}, keep_alive=False)
+                    self.registry.inc("requests_total", endpoint="bad-request", status=400)
+                    return
+                method, target, version = request_line
+                if int(length):
+                    try:
+                        await reader.readexactly(int(length))
+                    except (asyncio.IncompleteReadError, ConnectionError):
+                        return
+
+                route, status, body = self.respond(method, target)
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              and version == "HTTP/1.1")
+                await self.reply(writer, method, status, body, keep_alive)
+                self.registry.inc("requests_total", endpoint=route, status=status)
+                self.registry.observe("request_seconds", time.perf_counter() - start, endpoint=route)
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+
+    async def watch(self):
+        """Reload the index whenever the data source changes"""
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            version = None
+            try:
+                version = source_version(self.source)
+                if version in (self.index.version, self.failed_version):
+                    continue
+                start = time.perf_counter()
+                index = await asyncio.to_thread(HistoryIndex.load, self.source)
+            except Exception as e:
+                # Keep serving the current index; the source is tried again once it changes
+                self.failed_version = version
+                self.reload_error = f"{type(e).__name__}: {e}"
+                self.registry.inc("reload_failures_total")
+                continue
+            self.index = index
+            self.reloads += 1
+            self.reload_error = None
+            self.registry.observe("reload_seconds", time.perf_counter() - start)
+            print(f"Reloaded {len(index.draws)} draws from {self.source} in {time.perf_counter() - start:.2f}s")
+
+    async def serve(self, host=HOST, port=PORT):
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEAD_BYTES)
+        print(f"Serving {len(self.index.draws)} draws from {self.source} on http://{host}:{port}")
+        async with server:
+            watcher = asyncio.create_task(self.watch())
+            try:
+                await server.serve_forever()
+            finally:
+                watcher.cancel()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve draw lookups, ticket checks and statistics over HTTP")
+    parser.add_argument("--data", default=DATA_FILE,
+                        help=f"results JSON file, .db store or typed dataset directory (default: {DATA_FILE})")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--reload-interval", type=float, default=RELOAD_INTERVAL,
+                        help="seconds between checks of the data source for changes")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    service = QueryService(args.data, args.reload_interval)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
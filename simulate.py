@@ -0,0 +1,255 @@
+"""Monte Carlo comparison of ticket strategies on synthetic Lotto Max draws.
+
+Every strategy picks a fixed set of tickets, which are then played against millions of
+synthetic draws (7 of 50 plus a bonus). Draws come in fixed-size blocks, each generated
+from its own SeedSequence(seed, spawn_key=(1, block)) stream and reduced in block order,
+so a seed gives identical results whether the blocks run in one process or many.
+
+    python simulate.py --draws 10000000 --tickets 10 --workers 8 --seed 42
+"""
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from columnar import COLUMNAR_DIR
+from draw_stats import NUMBERS, RNG_ERA_START, DrawMatrix, FrequencyStats
+from ticket_eval import NO_PRIZE, TIER_LABELS, TIER_OF, DrawHistory, popcount, ticket_masks, to_masks
+
+TICKET_PRICE_CENTS = 500
+
+# Draws per reproducible stream, and per vectorized step within a block
+BLOCK_DRAWS = 1 << 16
+STEP_DRAWS = 1 << 13
+
+# Stream ids under the seed: tickets come from one stream, each draw block from its own
+TICKET_STREAM = 0
+DRAW_STREAM = 1
+
+Z_95 = 1.959963984540054
+
+
+def weighted_picks(rng, count, weights, pool=NUMBERS):
+    """count tickets of 7 numbers from 1..pool drawn without replacement with the given weights.
+
+    Each number gets the key log(u) / weight and the 7 largest keys win (Efraimidis-Spirakis),
+    which samples all the tickets with one array operation.
+    """
+    with np.errstate(divide="ignore"):
+        keys = np.log(rng.random((count, pool))) / np.asarray(weights, dtype=np.float64)[:pool]
+    return np.argpartition(-keys, 7, axis=1)[:, :7] + 1
+
+
+# Every strategy picks from 1..pool: 49 for draws before FIFTY_BALL_START
+
+def random_strategy(count, rng, counts, pool=NUMBERS):
+    """Quick picks"""
+    return weighted_picks(rng, count, np.ones(NUMBERS), pool)
+
+
+def hot_strategy(count, rng, counts, pool=NUMBERS):
+    """Numbers weighted by how often they were drawn"""
+    return weighted_picks(rng, count, np.maximum(counts[1:], 1e-9), pool)
+
+
+def cold_strategy(count, rng, counts, pool=NUMBERS):
+    """Numbers weighted towards the ones drawn least often"""
+    return weighted_picks(rng, count, 1.0 / np.maximum(counts[1:], 1), pool)
+
+
+def top_strategy(count, rng, counts, pool=NUMBERS):
+    """The most frequent numbers, one ticket after the other down the ranking"""
+    order = np.lexsort((np.arange(pool), -counts[1:pool + 1])) + 1
+    return np.array([np.roll(order, -7 * i)[:7] for i in range(count)])
+
+
+def wheel_strategy(count, rng, counts, pool=NUMBERS):
+    """A wheel over the whole pool: tickets spread to share as few pairs as possible"""
+    from wheel import build_wheel
+    wheel = build_wheel(range(1, pool + 1), count, seed=int(rng.integers(2 ** 32)))
+    return np.array(wheel.tickets)
+
+
+STRATEGIES = {
+    "random": random_strategy,
+    "hot": hot_strategy,
+    "cold": cold_strategy,
+    "top": top_strategy,
+    "wheel": wheel_strategy,
+}
+
+
+def historical_prizes(history, free_play_cents=TICKET_PRICE_CENTS):
+    """Average cash prize per tier (cents) over the draws that paid it, indexed like TIER_LABELS.
+
+    Free play tiers are valued at the ticket price; the Match 7 value is the average advertised
+    jackpot, since carried-over draws still list it.
+    """
+    prizes = np.zeros(NO_PRIZE + 1, dtype=np.float64)
+    for tier in range(NO_PRIZE):
+        paid = history.prize_cents[:, tier]
+        paid = paid[paid > 0]
+        if len(paid):
+            prizes[tier] = paid.mean()
+        if history.free_play[:, tier].any() and not len(paid):
+            prizes[tier] = free_play_cents
+    return prizes
+
+
+def synthetic_draws(rng, count):
+    """(main masks, bonus masks) of count fair draws.
+
+    The eight smallest of 50 uniform keys are a uniform sample without replacement;
+    argpartition puts the eighth smallest at position 7, which becomes the bonus.
+    """
+    picks = np.argpartition(rng.random((count, NUMBERS)), 7, axis=1)[:, :8] + 1
+    return to_masks(picks[:, :7]), np.uint64(1) << picks[:, 7].astype(np.uint64)
+
+
+def simulate_block(block, seed, draws, masks, strategy_of, prizes, strategies):
+    """Sums for one block of draws: (draws, per-strategy payout sum / sum of squares,
+    per-strategy tier count sum / sum of squares), all per draw"""
+    rng = np.random.Generator(np.random.PCG64(np.random.SeedSequence(seed, spawn_key=(DRAW_STREAM, block))))
+    tiers = NO_PRIZE + 1
+    payout_sum = np.zeros(strategies)
+    payout_sq = np.zeros(strategies)
+    tier_sum = np.zeros((strategies, tiers))
+    tier_sq = np.zeros((strategies, tiers))
+    tickets_per = np.bincount(strategy_of, minlength=strategies)
+
+    for start in range(0, draws, STEP_DRAWS):
+        n = min(STEP_DRAWS, draws - start)
+        draw_masks, bonus_masks = synthetic_draws(rng, n)
+        matched = popcount(draw_masks[:, None] & masks[None, :])
+        rows, cols = np.nonzero(matched >= 3)
+        bonus = (masks[cols] & bonus_masks[rows]) != 0
+        won = TIER_OF[matched[rows, cols], bonus.view(np.uint8)]
+
+        # Per (draw, strategy) payout and per (draw, strategy, tier) counts; draws are
+        # independent, so their spread gives the confidence intervals
+        cell = rows * strategies + strategy_of[cols]
+        payout = np.bincount(cell, weights=prizes[won], minlength=n * strategies).reshape(n, strategies)
+        counts = np.bincount(cell * tiers + won, minlength=n * strategies * tiers).reshape(n, strategies, tiers)
+        counts[:, :, NO_PRIZE] = tickets_per - counts.sum(axis=2)
+
+        payout_sum += payout.sum(axis=0)
+        payout_sq += (payout ** 2).sum(axis=0)
+        tier_sum += counts.sum(axis=0)
+        tier_sq += (counts.astype(np.float64) ** 2).sum(axis=0)
+    return draws, payout_sum, payout_sq, tier_sum, tier_sq
+
+
+def run_block(args):
+    return simulate_block(*args)
+
+
+def simulate(tickets, total_draws, seed, prizes, workers=1):
+    """Play {strategy: (k x 7) tickets} against total_draws synthetic draws.
+
+    Returns {strategy: result dict}; identical for a seed whatever the worker count.
+    """
+    names = list(tickets)
+    masks = np.concatenate([ticket_masks(tickets[name]) for name in names])
+    strategy_of = np.repeat(np.arange(len(names)), [len(tickets[name]) for name in names])
+    blocks = [(block, seed, min(BLOCK_DRAWS, total_draws - start), masks, strategy_of, prizes, len(names))
+              for block, start in enumerate(range(0, total_draws, BLOCK_DRAWS))]
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(run_block, blocks))
+    else:
+        results = [run_block(block) for block in blocks]
+
+    # Reduce in block order so floating point sums don't depend on scheduling
+    draws, payout_sum, payout_sq, tier_sum, tier_sq = results[0]
+    for result in results[1:]:
+        draws += result[0]
+        payout_sum = payout_sum + result[1]
+        payout_sq = payout_sq + result[2]
+        tier_sum = tier_sum + result[3]
+        tier_sq = tier_sq + result[4]
+
+    return {name: summarize(draws, len(tickets[name]), payout_sum[i], payout_sq[i], tier_sum[i], tier_sq[i])
+            for i, name in enumerate(names)}
+
+
+def mean_interval(total, total_sq, n, scale=1.0):
+    """(mean, half width of the 95% interval) of n per-draw values, divided by scale"""
+    mean = float(total) / n
+    variance = max(float(total_sq) / n - mean * mean, 0.0) * n / max(n - 1, 1)
+    return mean / scale, Z_95 * math.sqrt(variance / n) / scale
+
+
+def summarize(draws, tickets, payout_sum, payout_sq, tier_sum, tier_sq):
+    ev, ev_half = mean_interval(payout_sum, payout_sq, draws, tickets)
+    tiers = {}
+    for t, label in enumerate(TIER_LABELS):
+        p, half = mean_interval(tier_sum[t], tier_sq[t], draws, tickets)
+        tiers[label] = {"probability": p, "low": max(p - half, 0.0), "high": p + half,
+                        "hits": int(tier_sum[t])}
+    return {
+        "draws": draws,
+        "tickets": tickets,
+        "expected_value_cents": ev,
+        "expected_value_interval": (ev - ev_half, ev + ev_half),
+        "return_to_player": ev / TICKET_PRICE_CENTS,
+        "tiers": tiers,
+    }
+
+
+def build_strategies(names, count, seed, counts):
+    """{name: (count x 7) tickets}, each strategy from its own stream under the seed"""
+    tickets = {}
+    for i, name in enumerate(names):
+        rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(TICKET_STREAM, i)))
+        tickets[name] = STRATEGIES[name](count, rng, counts)
+    return tickets
+
+
+def print_report(results):
+    for name, result in results.items():
+        low, high = result["expected_value_interval"]
+        print(f"\n{name}: {result['tickets']} tickets x {result['draws']:,} draws")
+        print(f"  Expected value per ${TICKET_PRICE_CENTS / 100:.0f} ticket: "
+              f"${result['expected_value_cents'] / 100:.4f} (95% CI ${low / 100:.4f} - ${high / 100:.4f}), "
+              f"return {result['return_to_player']:.1%}")
+        for label, tier in result["tiers"].items():
+            if label == TIER_LABELS[NO_PRIZE]:
+                continue
+            odds = f"1 in {1 / tier['probability']:,.0f}" if tier["probability"] else "never hit"
+            print(f"  {label:<20} {tier['probability']:.3e} [{tier['low']:.3e}, {tier['high']:.3e}]  {odds}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate ticket strategies on synthetic draws")
+    parser.add_argument("--draws", type=int, default=1_000_000, help="synthetic draws to play")
+    parser.add_argument("--tickets", type=int, default=10, help="tickets per strategy")
+    parser.add_argument("--strategies", nargs="+", default=list(STRATEGIES), choices=list(STRATEGIES))
+    parser.add_argument("--seed", type=int, default=None, help="seed for reproducible runs")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--columnar-dir", default=COLUMNAR_DIR,
+                        help="typed dataset for number frequencies and prize values")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    seed = args.seed if args.seed is not None else np.random.SeedSequence().entropy
+    print(f"Seed: {seed}")
+
+    history = DrawHistory.from_columnar(args.columnar_dir).since(RNG_ERA_START)
+    counts = FrequencyStats(DrawMatrix.from_columnar(args.columnar_dir).since(RNG_ERA_START)).counts
+    tickets = build_strategies(args.strategies, args.tickets, seed, counts)
+
+    start = time.perf_counter()
+    results = simulate(tickets, args.draws, seed, historical_prizes(history), args.workers)
+    elapsed = time.perf_counter() - start
+    print_report(results)
+    print(f"\nSimulated {args.draws:,} draws with {args.workers} worker(s) in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""Number statistics for any window, era, weekday and jackpot band of the draw history.
+
+Every draw falls in one cell: its weekday crossed with its jackpot band. Each cell keeps
+the positions of its draws and cumulative number counts over them, so a query such as
+"Tuesday draws since the 50-ball change with a jackpot of $60M or more" adds one row
+difference per selected cell: O(cells x 50), however many draws the window spans.
+
+- Gaps come from one sorted array of (cell, number, draw) keys, probed with searchsorted.
+- Pair counts come from cumulative pair counts per cell, built the first time a query
+  needs them.
+- Results are memoized in an LRU cache keyed on the normalized query. Different date
+  strings that select the same draws share an entry.
+
+    query = StatsQuery.load("lottery_results.db")
+    query.frequencies(era="rng", weekdays=["tuesday"])
+    query.gaps(last=100)
+    query.top_pairs(10, start="2023-01-01", bands=["60M+"])
+
+    python stats_query.py --era 50-ball --weekdays friday --bands 60M+ --top 10
+"""
+import argparse
+import json
+from functools import lru_cache
+
+import numpy as np
+
+from draw_stats import FIFTY_BALL_START, NUMBERS, PAIR_SLOT, PAIRS, DRAW_PAIRS, RNG_ERA_START, to_day
+
+# name -> (start, end) of the era, end exclusive; None leaves that side open
+ERAS = {
+    "all": (None, None),
+    # Fridays only, numbers 1-49
+    "49-ball": (None, FIFTY_BALL_START),
+    # Tuesday and Friday draws, numbers 1-50
+    "50-ball": (FIFTY_BALL_START, None),
+    "rng": (RNG_ERA_START, None),
+}
+
+# (name, lowest jackpot, highest jackpot) in cents, the high end exclusive; draws with no
+# recorded jackpot fall in UNKNOWN_BAND
+JACKPOT_BANDS = [
+    ("under-20M", 0, 20_000_000_00),
+    ("20M-40M", 20_000_000_00, 40_000_000_00),
+    ("40M-60M", 40_000_000_00, 60_000_000_00),
+    ("60M+", 60_000_000_00, None),
+]
+UNKNOWN_BAND = "unknown"
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+CACHE_SIZE = 1024
+
+
+def weekday_of(dates):
+    """Monday = 0 for datetime64[D] dates (1970-01-01 was a Thursday)"""
+    return (dates.astype(np.int64) + 3) % 7
+
+
+def weekday_code(day):
+    if isinstance(day, str):
+        return WEEKDAYS.index(day.lower())
+    return int(day)
+
+
+def band_names(bands=JACKPOT_BANDS):
+    return [name for name, _, _ in bands] + [UNKNOWN_BAND]
+
+
+def band_of(jackpot_cents, bands=JACKPOT_BANDS):
+    """Band index per draw; missing jackpots (None or negative) get the last index"""
+    codes = np.full(len(jackpot_cents), len(bands), dtype=np.int64)
+    for i, (_, low, high) in enumerate(bands):
+        inside = jackpot_cents >= low
+        if high is not None:
+            inside &= jackpot_cents < high
+        codes[inside] = i
+    return codes
+
+
+def frozen(array):
+    array.setflags(write=False)
+    return array
+
+
+def most_frequent(counts, k):
+    """The k numbers with the highest counts (indexed by number); ties go to the lower number"""
+    order = np.lexsort((np.arange(len(counts)), -counts))
+    return [int(n) for n in order if n != 0][:k]
+
+
+def most_frequent_pairs(counts, k):
+    order = np.lexsort((np.arange(len(counts)), -counts))[:k]
+    return [((int(PAIRS[i, 0]), int(PAIRS[i, 1])), int(counts[i])) for i in order]
+
+
+class Cell:
+    """The draws of one weekday and jackpot band"""
+
+    def __init__(self, rows, balls):
+        self.rows = rows
+        self.balls = balls
+        hits = np.zeros((len(rows) + 1, NUMBERS + 1), dtype=np.int32)
+        hits[1 + np.arange(len(rows))[:, None], balls] = 1
+        self.number_prefix = np.cumsum(hits, axis=0, dtype=np.int32)
+        self._pair_prefix = None
+
+    @property
+    def pair_prefix(self):
+        if self._pair_prefix is None:
+            balls = np.sort(self.balls, axis=1)
+            slots = PAIR_SLOT[balls[:, DRAW_PAIRS[:, 0]], balls[:, DRAW_PAIRS[:, 1]]]
+            hits = np.zeros((len(self.rows) + 1, len(PAIRS)), dtype=np.int32)
+            hits[1 + np.arange(len(self.rows))[:, None], slots] = 1
+            self._pair_prefix = np.cumsum(hits, axis=0, dtype=np.int32)
+        return self._pair_prefix
+
+    def span(self, lo, hi):
+        """Positions in this cell of the draws with lo <= draw index < hi"""
+        return int(np.searchsorted(self.rows, lo)), int(np.searchsorted(self.rows, hi))
+
+
+class StatsQuery:
+    """Windowed statistics over a chronological draw history"""
+
+    def __init__(self, dates, balls, bonus=None, jackpot_cents=None, bands=JACKPOT_BANDS, cache_size=CACHE_SIZE):
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        order = np.argsort(dates, kind="stable")
+        self.dates = dates[order]
+        self.balls = np.asarray(balls, dtype=np.uint8).reshape(-1, 7)[order]
+        self.bonus = (np.zeros(len(dates), dtype=np.uint8) if bonus is None
+                      else np.asarray(bonus, dtype=np.uint8)[order])
+        jackpot = (np.full(len(dates), -1, dtype=np.int64) if jackpot_cents is None
+                   else np.asarray(jackpot_cents, dtype=np.int64)[order])
+        self.bands = bands
+        self.band_names = band_names(bands)
+        n = len(self.dates)
+
+        # One cell per (weekday, band) that actually has draws
+        cell_ids = weekday_of(self.dates) * len(self.band_names) + band_of(jackpot, bands)
+        self.cells = {}
+        for cell_id in np.unique(cell_ids).tolist():
+            rows = np.nonzero(cell_ids == cell_id)[0]
+            self.cells[divmod(cell_id, len(self.band_names))] = Cell(rows, self.balls[rows])
+
+        # Sorted (cell, number, draw) keys: a number's latest draw before hi in a cell is
+        # one searchsorted away
+        self.cell_index = {key: i for i, key in enumerate(self.cells)}
+        self.cell_list = list(self.cells.values())
+        index_of_draw = np.empty(n, dtype=np.int64)
+        for key, cell in self.cells.items():
+            index_of_draw[cell.rows] = self.cell_index[key]
+        draws = np.repeat(np.arange(n, dtype=np.int64), 7)
+        self.keys = np.sort((index_of_draw[draws] * (NUMBERS + 1) + self.balls.ravel()) * (n + 1) + draws)
+
+        self.cached = lru_cache(maxsize=cache_size)(self.compute)
+
+    @classmethod
+    def from_draws(cls, draws, **kwargs):
+        """Build from records.Draw objects"""
+        draws = list(draws)
+        return cls([np.datetime64(d.date, "D") for d in draws], [d.balls for d in draws],
+                   [d.bonus or 0 for d in draws],
+                   [-1 if d.jackpot_cents is None else d.jackpot_cents for d in draws], **kwargs)
+
+    @classmethod
+    def from_matrix(cls, matrix, **kwargs):
+        """Build from a DrawMatrix; there are no jackpots, so every draw is in the unknown band"""
+        return cls(matrix.dates, matrix.balls, matrix.bonus, **kwargs)
+
+    @classmethod
+    def load(cls, source, **kwargs):
+        """Build from a results JSON file, a .db store or a typed dataset directory"""
+        import records
+        return cls.from_draws(records.load(source), **kwargs)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def select(self, start=None, end=None, last=None, era=None, weekdays=None, bands=None):
+        """Normalize a query to (lo, hi, cells): draw index range and the cells it covers.
+
+        start / end (end exclusive) and era narrow the dates; weekdays (names or Monday = 0)
+        and bands (names from band_names) pick cells; last keeps the latest `last` draws
+        that pass every other filter.
+        """
+        n = len(self.dates)
+        lo, hi = 0, n
+        if era is not None:
+            era_start, era_end = ERAS[era]
+            start = max(filter(None, [start, era_start]), key=to_day, default=None)
+            end = min(filter(None, [end, era_end]), key=to_day, default=None)
+        if start is not None:
+            lo = int(np.searchsorted(self.dates, to_day(start)))
+        if end is not None:
+            hi = int(np.searchsorted(self.dates, to_day(end)))
+        hi = max(lo, hi)
+
+        days = None if weekdays is None else {weekday_code(day) for day in weekdays}
+        bands = None if bands is None else {self.band_names.index(band) for band in bands}
+        cells = tuple(self.cell_index[key] for key in self.cells
+                      if (days is None or key[0] in days) and (bands is None or key[1] in bands))
+
+        if last is not None:
+            lo = self.last_start(lo, hi, cells, last)
+        return lo, hi, cells
+
+    def last_start(self, lo, hi, cells, last):
+        """Smallest draw index from which the selected cells hold at most `last` draws before hi"""
+        if last <= 0:
+            return hi
+        if len(cells) == len(self.cell_list):
+            return max(lo, hi - last)
+        # Start at the `last`-th latest selected draw
+        rows = [cell.rows[a:b] for cell, (a, b) in ((self.cell_list[c], self.cell_list[c].span(lo, hi)) for c in cells)]
+        rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+        if len(rows) <= last:
+            return lo
+        return int(np.partition(rows, len(rows) - last)[len(rows) - last])
+
+    def compute(self, kind, lo, hi, cells):
+        """One statistic of a normalized selection; called through the LRU cache"""
+        spans = [(self.cell_list[c], *self.cell_list[c].span(lo, hi)) for c in cells]
+        if kind == "draws":
+            return sum(b - a for _, a, b in spans)
+        if kind == "frequencies":
+            counts = np.zeros(NUMBERS + 1, dtype=np.int64)
+            for cell, a, b in spans:
+                counts += cell.number_prefix[b] - cell.number_prefix[a]
+            return frozen(counts)
+        if kind == "pairs":
+            counts = np.zeros(len(PAIRS), dtype=np.int64)
+            for cell, a, b in spans:
+                counts += cell.pair_prefix[b] - cell.pair_prefix[a]
+            return frozen(counts)
+        if kind == "gaps":
+            return frozen(self.compute_gaps(lo, hi, cells, spans))
+        raise ValueError(f"unknown statistic {kind!r}")
+
+    def compute_gaps(self, lo, hi, cells, spans):
+        n = len(self.dates)
+        numbers = np.arange(NUMBERS + 1, dtype=np.int64)
+        last_seen = np.full(NUMBERS + 1, -1, dtype=np.int64)
+        for c in cells:
+            base = (c * (NUMBERS + 1) + numbers) * (n + 1)
+            j = np.searchsorted(self.keys, base + hi) - 1
+            found = (j >= 0) & (self.keys[np.maximum(j, 0)] >= base + lo)
+            last_seen = np.where(found, np.maximum(last_seen, self.keys[np.maximum(j, 0)] - base), last_seen)
+
+        # Gap = selected draws after the latest one holding the number; the whole
+        # selection when it never came up
+        after = np.zeros(NUMBERS + 1, dtype=np.int64)
+        for cell, _, b in spans:
+            after += b - np.searchsorted(cell.rows, last_seen + 1)
+        after = np.where(last_seen >= 0, after, sum(b - a for _, a, b in spans))
+        after[0] = 0
+        return after
+
+    def statistic(self, kind, query):
+        return self.cached(kind, *self.select(**query))
+
+    def draws(self, **query):
+        """How many draws the query selects"""
+        return self.statistic("draws", query)
+
+    def frequencies(self, **query):
+        """(51,) read-only counts; frequencies[k] is how often number k was drawn"""
+        return self.statistic("frequencies", query)
+
+    def gaps(self, **query):
+        """(51,) selected draws since each number last came up, within the selection"""
+        return self.statistic("gaps", query)
+
+    def pair_counts(self, **query):
+        """(1225,) counts in draw_stats.PAIRS order"""
+        return self.statistic("pairs", query)
+
+    def top(self, k=7, **query):
+        """The k most frequent numbers, most frequent first (ties go to the lower number)"""
+        return most_frequent(self.frequencies(**query), k)
+
+    def top_pairs(self, k=10, **query):
+        """[((a, b), count)] for the k most frequent pairs"""
+        return most_frequent_pairs(self.pair_counts(**query), k)
+
+    def summary(self, k=7, **query):
+        """Draw count, date range, hottest, coldest and most overdue numbers and top pairs"""
+        lo, hi, cells = self.select(**query)
+        counts = self.cached("frequencies", lo, hi, cells)
+        gaps = self.cached("gaps", lo, hi, cells)
+        # Rows of the selected draws inside the window, for the date range
+        rows = [cell.rows[a:b] for cell, a, b in ((self.cell_list[c], *self.cell_list[c].span(lo, hi)) for c in cells)]
+        rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+        # 50 can't be cold or overdue in a window that ends before it was added
+        pool = NUMBERS if len(rows) and self.dates[rows.max()] >= to_day(FIFTY_BALL_START) else NUMBERS - 1
+        numbers = np.arange(1, pool + 1)
+        coldest = numbers[np.lexsort((numbers, counts[1:pool + 1]))][:k]
+        overdue = numbers[np.lexsort((numbers, -gaps[1:pool + 1]))][:k]
+        return {
+            "draws": self.cached("draws", lo, hi, cells),
+            "first": str(self.dates[rows.min()]) if len(rows) else None,
+            "last": str(self.dates[rows.max()]) if len(rows) else None,
+            "hot": [(n, int(counts[n])) for n in most_frequent(counts, k)],
+            "cold": [(int(n), int(counts[n])) for n in coldest],
+            "overdue": [(int(n), int(gaps[n])) for n in overdue],
+            "pairs": most_frequent_pairs(self.cached("pairs", lo, hi, cells), k),
+        }
+
+    def cache_info(self):
+        return self.cached.cache_info()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Number statistics for a window of the draw history")
+    parser.add_argument("--data", default="lottery_results_final.json",
+                        help="results JSON file, .db store or typed dataset directory")
+    parser.add_argument("--start", default=None, help="first date (YYYY-MM-DD)")
+    parser.add_argument("--end", default=None, help="date to stop before (YYYY-MM-DD)")
+    parser.add_argument("--last", type=int, default=None, help="only the latest N selected draws")
+    parser.add_argument("--era", default=None, choices=list(ERAS))
+    parser.add_argument("--weekdays", nargs="+", default=None, choices=WEEKDAYS)
+    parser.add_argument("--bands", nargs="+", default=None, choices=band_names())
+    parser.add_argument("--top", type=int, default=7, help="numbers and pairs listed")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    query = StatsQuery.load(args.data)
+    summary = query.summary(args.top, start=args.start, end=args.end, last=args.last, era=args.era,
+                            weekdays=args.weekdays, bands=args.bands)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    print(f"{summary['draws']} draws from {summary['first']} to {summary['last']}")
+    print("Hot:     " + ", ".join(f"{n} ({c})" for n, c in summary["hot"]))
+    print("Cold:    " + ", ".join(f"{n} ({c})" for n, c in summary["cold"]))
+    print("Overdue: " + ", ".join(f"{n} ({g} draws)" for n, g in summary["overdue"]))
+    print("Pairs:   " + ", ".join(f"{a}-{b} ({c})" for (a, b), c in summary["pairs"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+"""Shared fixtures: the committed results JSON, loaded once per test session."""
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+RESULTS_JSON = os.path.join(ROOT, "lottery_results_final.json")
+
+
+@pytest.fixture(scope="session")
+def records():
+    with open(RESULTS_JSON, "r") as f:
+        return json.load(f)
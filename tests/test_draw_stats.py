@@ -0,0 +1,73 @@
+"""DrawMatrix, FrequencyStats and CooccurrenceIndex, built up one draw at a time, against plain Python counts."""
+from collections import Counter
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from draw_stats import NUMBERS, CooccurrenceIndex, DrawMatrix, FrequencyStats
+from records import from_records
+
+
+@pytest.fixture(scope="module")
+def draws(records):
+    return sorted(((d.date, list(d.balls), d.bonus or 0) for d in from_records(records)), key=lambda d: d[0])
+
+
+def test_prefix_counts_grow_with_appends(draws):
+    matrix = DrawMatrix.from_rows(draws[:3])
+    for i, (date, balls, bonus) in enumerate(draws[3:], start=3):
+        matrix.append(date, balls, bonus)
+        if i % 50 == 0 or i == len(draws) - 1:
+            prefix = matrix.prefix_counts()
+            counts = Counter(n for _, balls, _ in draws[:i + 1] for n in balls)
+            assert prefix.shape == (i + 2, NUMBERS + 1)
+            assert prefix[-1].tolist() == [counts[n] for n in range(NUMBERS + 1)]
+    # Every row, not just the last: prefix[j] - prefix[i] counts draws i..j-1
+    hits = np.zeros((len(draws), NUMBERS + 1), dtype=np.int32)
+    for row, (_, balls, _) in enumerate(draws):
+        hits[row, balls] = 1
+    assert (matrix.prefix_counts()[1:] == np.cumsum(hits, axis=0)).all()
+    assert (matrix.rolling_counts(25)[-1] == hits[-25:].sum(axis=0)).all()
+
+
+def test_frequency_stats_after_appends(draws):
+    stats = FrequencyStats(DrawMatrix.from_rows(draws[:100]), windows=(10, 50))
+    for date, balls, bonus in draws[100:]:
+        stats.append(date, balls, bonus)
+
+    counts = Counter(n for _, balls, _ in draws for n in balls)
+    last_seen = {n: i for i, (_, balls, _) in enumerate(draws) for n in balls}
+    assert stats.counts.tolist() == [counts[n] for n in range(NUMBERS + 1)]
+    assert stats.bonus_counts[1:].tolist() == [sum(b == n for _, _, b in draws) for n in range(1, NUMBERS + 1)]
+    assert stats.gaps()[1:].tolist() == [len(draws) - 1 - last_seen.get(n, -1) if n in last_seen else len(draws)
+                                         for n in range(1, NUMBERS + 1)]
+    for window in (10, 50):
+        recent = Counter(n for _, balls, _ in draws[-window:] for n in balls)
+        assert stats.window_counts[window].tolist() == [recent[n] for n in range(NUMBERS + 1)]
+
+
+def test_cooccurrence_index_after_updates(draws, tmp_path):
+    matrix = DrawMatrix.from_rows(draws[:40])
+    index = CooccurrenceIndex.from_matrix(matrix)
+    for i, (date, balls, bonus) in enumerate(draws[40:], start=40):
+        matrix.append(date, balls, bonus)
+        if i % 7 == 0:
+            assert index.update(matrix) > 0
+        if i == 600:
+            index.save(tmp_path / "index.npz")
+            index = CooccurrenceIndex.load(tmp_path / "index.npz")
+    index.update(matrix)
+    assert len(index) == len(draws)
+    assert index.pair_prefix.shape[0] == len(draws) + 1
+    assert index.triples.shape[0] == len(draws)
+
+    for lo, hi in [(0, len(draws)), (len(draws) - 50, len(draws)), (123, 456)]:
+        window = [sorted(balls) for _, balls, _ in draws[lo:hi]]
+        pairs = Counter(pair for balls in window for pair in combinations(balls, 2))
+        triples = Counter(triple for balls in window for triple in combinations(balls, 3))
+        start, end = str(draws[lo][0]), str(draws[hi][0]) if hi < len(draws) else None
+        counts = index.pair_counts(start, end)
+        assert {(a, b): int(counts[a, b]) for a, b in combinations(range(1, NUMBERS + 1), 2)
+                if counts[a, b]} == dict(pairs)
+        assert index.top_triples(5, start, end) == sorted(triples.items(), key=lambda t: (-t[1], t[0]))[:5]
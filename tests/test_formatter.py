@@ -0,0 +1,149 @@
+"""The streaming formatter against the original load-everything row builder."""
+import csv
+import json
+import os
+
+import pytest
+
+from columnar import TABLES, ColumnarBuilder, load_columnar
+from formatter import append_new_draws, format_lottery_data, iter_json_records, write_rows
+from conftest import RESULTS_JSON
+from results_store import ResultsStore
+
+
+def reference_row(data):
+    """The row the original formatter wrote for a record, copied as it was"""
+    # Format max millions numbers
+    max_millions_numbers = '|'.join([
+        ','.join(result['numbers'])
+        for result in data.get('max_millions', {}).get('results', [])
+    ]) if data.get('max_millions', {}).get('results') else ''
+
+    # Get statistics with default values
+    statistics = data.get('statistics', {})
+
+    return [
+        data.get('date', ''),                                         # Date
+        data.get('main_draw', {}).get('draw_date', ''),              # Draw Date
+        data.get('main_draw', {}).get('main_numbers', [''])[0],      # Main Numbers 1
+        data.get('main_draw', {}).get('main_numbers', ['', ''])[1],  # Main Numbers 2
+        data.get('main_draw', {}).get('main_numbers', ['', '', ''])[2],  # Main Numbers 3
+        data.get('main_draw', {}).get('main_numbers', ['', '', '', ''])[3],  # Main Numbers 4
+        data.get('main_draw', {}).get('main_numbers', ['', '', '', '', ''])[4],  # Main Numbers 5
+        data.get('main_draw', {}).get('main_numbers', ['', '', '', '', '', ''])[5],  # Main Numbers 6
+        data.get('main_draw', {}).get('main_numbers', [''] * 7)[6],  # Main Numbers 7
+        data.get('main_draw', {}).get('bonus_number', ''),           # Bonus Number
+        data.get('main_draw', {}).get('jackpot', ''),               # Jackpot
+        json.dumps(data.get('prize_breakdown', [])),                 # Prize Breakdown
+        statistics.get('Total Sales', {}).get('main_stat', 'N/A'),   # Total Sales
+        statistics.get('Tickets Sold', {}).get('main_stat', 'N/A'),  # Tickets Sold
+        statistics.get('Total Winners', {}).get('main_stat', 'N/A'), # Total Winners
+        statistics.get('Winning Ratio', {}).get('main_stat', 'N/A'), # Winning Ratio
+        statistics.get('Sales Difference (From previous draw)', {}).get('main_stat', 'N/A'),  # Sales Difference
+        data.get('max_millions', {}).get('count', '0'),             # Millions Count
+        max_millions_numbers,                                        # Max Millions Numbers
+        statistics.get('Max Millions for the next draw:', {}).get('main_stat', '0')  # Max Millions Next Draw
+    ]
+
+
+def reference_csv(records, path):
+    """(CSV bytes, skipped indexes) as the original formatter wrote them"""
+    skipped = []
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([
+            'Date', 'Draw Date', *(f'Main Numbers {i}' for i in range(1, 8)), 'Bonus Number', 'Jackpot',
+            'Prize Breakdown', 'Total Sales', 'Tickets Sold', 'Total Winners', 'Winning Ratio',
+            'Sales Difference', 'Millions Count', 'Max Millions Numbers', 'Max Millions Next Draw',
+        ])
+        for index, data in enumerate(records):
+            try:
+                writer.writerow(reference_row(data))
+            except Exception:
+                skipped.append(index)
+    with open(path, 'rb') as f:
+        return f.read(), skipped
+
+
+@pytest.mark.parametrize("chunk_size", [97, 4096, 1 << 16])
+def test_iter_json_records(records, chunk_size):
+    assert list(iter_json_records(RESULTS_JSON, chunk_size)) == records
+
+
+def test_iter_json_records_empty_array(tmp_path):
+    path = tmp_path / "empty.json"
+    path.write_text("[]")
+    assert list(iter_json_records(str(path))) == []
+
+
+def test_csv_is_byte_identical(records, tmp_path):
+    output = tmp_path / "results.csv"
+    format_lottery_data(RESULTS_JSON, str(output), columnar_dir=None)
+    assert output.read_bytes() == reference_csv(records, tmp_path / "reference.csv")[0]
+
+
+def test_malformed_records_match_the_original(records, tmp_path):
+    """Short or missing number lists, missing sections and broken Max Millions sets"""
+    def variant(record, **main_draw):
+        record = json.loads(json.dumps(record))
+        record['main_draw'].update(main_draw)
+        return record
+
+    base = records[-1]
+    broken = json.loads(json.dumps(base))
+    broken['max_millions'] = {'count': '1', 'results': [{}]}
+    malformed = [
+        base,
+        variant(base, main_numbers=base['main_draw']['main_numbers'][:6]),
+        variant(base, main_numbers=base['main_draw']['main_numbers'][:1]),
+        variant(base, main_numbers=[]),
+        {key: value for key, value in base.items() if key != 'main_draw'},
+        {key: value for key, value in base.items() if key not in ('statistics', 'max_millions')},
+        broken,
+        {},
+    ]
+    output = tmp_path / "results.csv"
+    processed, skipped = write_rows(malformed, str(output))
+    expected, expected_skipped = reference_csv(malformed, tmp_path / "reference.csv")
+    assert output.read_bytes() == expected
+    assert [entry['index'] for entry in skipped] == expected_skipped == [1, 2, 3, 6]
+    assert processed == len(malformed) - len(skipped)
+
+
+def test_append_matches_full_rewrite(records, tmp_path):
+    store_path, output = str(tmp_path / "results.db"), tmp_path / "results.csv"
+    with ResultsStore(store_path) as store:
+        store.append(records[:1000])
+    # No CSV yet: a full rewrite from the store
+    append_new_draws(store_path, str(output), columnar_dir=None)
+    with ResultsStore(store_path) as store:
+        store.append(records[1000:])
+    append_new_draws(store_path, str(output), columnar_dir=None)
+    append_new_draws(store_path, str(output), columnar_dir=None)
+    assert output.read_bytes() == reference_csv(records, tmp_path / "reference.csv")[0]
+
+
+def test_columnar_dataset_loads_every_table(records, tmp_path):
+    store_path, directory = str(tmp_path / "results.db"), str(tmp_path / "columnar")
+    with ResultsStore(store_path) as store:
+        store.append(records[650:700])
+    append_new_draws(store_path, str(tmp_path / "results.csv"), columnar_dir=directory)
+    tables = load_columnar(directory)
+    assert sorted(tables) == sorted(TABLES)
+    assert len(tables["draws"]["date"]) == 50
+    assert len(tables["provinces"]["draw"]) > 0
+
+    # A table missing from an older dataset is written on the next append, even with no new draws
+    os.remove(os.path.join(directory, "provinces.npz"))
+    append_new_draws(store_path, str(tmp_path / "results.csv"), columnar_dir=directory)
+    assert sorted(load_columnar(directory)) == sorted(TABLES)
+
+
+def test_columnar_bonus_is_zero_without_one(records):
+    record = json.loads(json.dumps(records[0]))
+    del record["main_draw"]["bonus_number"]
+    builder = ColumnarBuilder()
+    builder.add(records[0])
+    builder.add(record)
+    bonus = builder.tables()["draws"]["bonus"]
+    assert bonus[0] == int(records[0]["main_draw"]["bonus_number"]) and bonus[1] == 0
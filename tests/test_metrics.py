@@ -0,0 +1,27 @@
+"""Prometheus text output of the metrics registry."""
+import re
+
+from metrics import Registry
+
+# name{label="value",...} number, with values escaped as the text format requires
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{((?:[a-zA-Z_]\w*="(?:[^"\\\n]|\\[\\"n])*",?)*)\})? (\S+)$')
+LABEL = re.compile(r'([a-zA-Z_]\w*)="((?:[^"\\\n]|\\[\\"n])*)"')
+
+
+def unescape(value):
+    return re.sub(r'\\([\\"n])', lambda m: "\n" if m.group(1) == "n" else m.group(1), value)
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    awkward = 'C:\\cache\\"page"\nsecond line'
+    registry.inc("errors_total", url=awkward)
+    registry.observe("fetch_seconds", 0.2, error=awkward)
+
+    samples = [line for line in registry.prometheus().splitlines() if not line.startswith("#")]
+    assert samples
+    for line in samples:
+        match = SAMPLE.match(line)
+        assert match, line
+        labels = {k: unescape(v) for k, v in LABEL.findall(match.group(2) or "")}
+        assert awkward in labels.values()
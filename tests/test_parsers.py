@@ -0,0 +1,51 @@
+"""The fast detail page parser against the original one on the saved pages in bench_pages/."""
+import json
+import os
+import re
+
+import pytest
+
+from benchmark import load_corpus
+from conftest import ROOT
+from scrape import extract_all_lottery_data, extract_all_lottery_data_fast
+
+CORPUS = load_corpus(os.path.join(ROOT, "bench_pages")) or {"detail": []}
+SECTIONS = ["main_draw", "max_millions", "prize_breakdown", "statistics", "provincial_stats"]
+
+
+def assert_same(html):
+    expected = extract_all_lottery_data(html)
+    actual = extract_all_lottery_data_fast(html)
+    if expected is None:
+        assert actual is None
+        return
+    assert list(actual) == list(expected)
+    for section in SECTIONS:
+        assert actual[section] == expected[section], section
+    # The store keeps the serialized records, so they have to match byte for byte too
+    assert json.dumps(actual, indent=2) == json.dumps(expected, indent=2)
+
+
+def test_corpus_has_detail_pages():
+    assert len(CORPUS["detail"]) >= 5
+
+
+@pytest.mark.parametrize("html", CORPUS["detail"])
+def test_fast_parser_matches(html):
+    assert extract_all_lottery_data(html) is not None
+    assert_same(html)
+
+
+@pytest.mark.parametrize("section", [
+    r'<div class="maxMillionsResultsWrap">.*?</div>\s*(?=<table)',
+    r'<table class="provinceStats">.*?</table>',
+    r'<div class="prizeStatsBox">.*?</div>\s*(?=<table|<footer)',
+    r'<table class="tableBreakdown">.*?</table>',
+])
+def test_fast_parser_matches_without_section(section):
+    for html in CORPUS["detail"]:
+        assert_same(re.sub(section, "", html, flags=re.DOTALL))
+
+
+def test_page_without_results():
+    assert_same("<html><body><p>No results for this date</p></body></html>")
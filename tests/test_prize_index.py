@@ -0,0 +1,84 @@
+"""Prize tier parsing and PrizeIndex against counts taken straight from the records."""
+from collections import Counter
+
+import numpy as np
+
+import records as typed
+from normalize import normalize_record
+from prize_index import PrizeIndex
+from results_store import ResultsStore, sortable_day
+
+
+def test_typed_records_match_store_rows(records):
+    for record in records:
+        rows = normalize_record(record)
+        draw = typed.Draw.from_record(record)
+        assert [(t.name, t.prize_cents, t.winners, t.fund_cents, t.carried_over, t.free_play)
+                for t in draw.tiers] == rows["tiers"]
+        assert [(p.name, p.winners, p.amount_cents) for p in draw.provinces] == rows["provinces"]
+
+
+def test_tier_flags_ignore_case():
+    entry = {"match_type": "Match 7 ", "prize_per_winner": "FREE PLAY ticket",
+             "winners": "carried over -  0", "prize_fund": "-"}
+    record = {"prize_breakdown": [entry]}
+    tier = typed.Tier.from_record(entry)
+    assert (tier.name, tier.carried_over, tier.free_play) == ("Match 7", True, True)
+    assert normalize_record(record)["tiers"] == [("Match 7", None, 0, None, True, True)]
+
+
+def test_index_matches_record_counts(records, tmp_path):
+    index = PrizeIndex.from_records(records)
+    with ResultsStore(str(tmp_path / "results.db")) as store:
+        store.append(records)
+    stored = PrizeIndex.from_store(str(tmp_path / "results.db"))
+    assert (stored.region_winners == index.region_winners).all()
+    assert (stored.winners == index.winners).all()
+
+    by_year, in_range = Counter(), 0
+    for record in records:
+        day = sortable_day(record["date"])
+        for tier, region, winners in normalize_record(record)["regions"]:
+            if tier == "Match 6 plus Bonus" and region == "Ontario":
+                by_year[int(day[:4])] += winners
+                in_range += winners if "2015-01-01" <= day < "2020-01-01" else 0
+    assert {year: n for year, n in index.by_year("Match 6 plus Bonus", "Ontario").items() if n} == dict(by_year)
+    assert index.winners_between("Match 6 plus Bonus", "Ontario", "2015-01-01", "2020-01-01") == in_range
+
+
+def test_carry_over_streaks(records):
+    index = PrizeIndex.from_records(records)
+    carried = [row[4] for record in sorted(records, key=lambda r: sortable_day(r["date"]))
+               for row in normalize_record(record)["tiers"] if row[0] == "Match 7"]
+    runs, length = [], 0
+    for flag in carried + [False]:
+        if flag:
+            length += 1
+        elif length:
+            runs.append(length)
+            length = 0
+    assert [s["draws"] for s in index.carry_over_streaks("Match 7")] == runs
+    assert np.sum(runs) == index.carried_over[index.tier_code("Match 7")].sum()
+
+
+def test_region_winners_add_up_to_tier_winners(records, tmp_path):
+    """Winners listed under no region name (": 1") count as Unknown, so the split is complete"""
+    index = PrizeIndex.from_records(records)
+    listed = index.region_winners.sum(axis=1)
+    # Carried-over jackpots list regions under a count of 0; every other listing adds up
+    check = (listed > 0) & ~index.carried_over
+    assert check.sum() > 900
+    assert (listed[check] == index.winners[check]).all()
+    tier = index.tier_code("Match 6 plus Bonus")
+    by_region = index.by_region("Match 6 plus Bonus")
+    assert by_region["Unknown"] > 0
+    assert sum(by_region.values()) == index.winners[tier][listed[tier] > 0].sum()
+
+    # A store written before the Unknown rows gets them back when opened
+    path = str(tmp_path / "results.db")
+    with ResultsStore(path) as store:
+        store.append(records)
+        with store.conn:
+            store.conn.execute("DELETE FROM region_winners WHERE region = 'Unknown'")
+            store.conn.execute("PRAGMA user_version = 1")
+    assert (PrizeIndex.from_store(path).region_winners == index.region_winners).all()
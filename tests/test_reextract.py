@@ -0,0 +1,24 @@
+"""reextract.py --write against a store holding draws the JSON file doesn't."""
+import json
+import os
+
+from conftest import ROOT
+from reextract import main
+from results_store import ResultsStore
+
+
+def test_write_keeps_draws_missing_from_stale_json(records, tmp_path):
+    store_path, json_path = str(tmp_path / "results.db"), str(tmp_path / "results.json")
+    with ResultsStore(store_path) as store:
+        store.append(records)
+    # An out-of-date export: the latest 200 draws are only in the store
+    with open(json_path, "w") as f:
+        json.dump(records[:-200], f)
+
+    main([os.path.join(ROOT, "bench_pages"), "--workers", "1", "--json", json_path,
+          "--store", store_path, "--write"])
+
+    with ResultsStore(store_path) as store:
+        assert [r["date"] for r in store.records()] == [r["date"] for r in records]
+    with open(json_path) as f:
+        assert len(json.load(f)) == len(records)
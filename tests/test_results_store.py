@@ -0,0 +1,88 @@
+"""ResultsStore against plain lists of records."""
+import json
+import sqlite3
+
+import pytest
+
+from results_store import NORMALIZED_TABLES, ResultsStore
+
+
+def table_counts(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ["draws"] + NORMALIZED_TABLES}
+    finally:
+        conn.close()
+
+
+def test_append_keeps_order_and_skips_stored_dates(records, tmp_path):
+    path = str(tmp_path / "results.db")
+    with ResultsStore(path) as store:
+        assert store.append(records[:600]) == 600
+        # Overlapping batch with a repeated date: only unseen dates are added, the first copy wins
+        repeat = dict(records[700], url="second copy")
+        assert store.append(records[500:800] + [repeat]) == 200
+        assert store.append(records) == len(records) - 800
+        assert store.append(records) == 0
+        assert len(store) == len(records)
+        assert list(store.records()) == records
+        assert store.get(records[700]["date"])["url"] == records[700]["url"]
+
+
+def test_failed_append_adds_nothing(records, tmp_path):
+    path = str(tmp_path / "results.db")
+    with ResultsStore(path) as store:
+        store.append(records[:10])
+    before = table_counts(path)
+
+    broken = dict(records[20], date="not a date")
+    with ResultsStore(path) as store:
+        with pytest.raises(ValueError):
+            store.append(records[10:20] + [broken])
+        assert len(store) == 10
+    assert table_counts(path) == before
+
+
+def test_export_matches_json_dump(records, tmp_path):
+    path = str(tmp_path / "results.db")
+    with ResultsStore(path) as store:
+        store.append(records)
+        store.export_json(str(tmp_path / "results.json"))
+    with open(tmp_path / "results.json") as f:
+        assert f.read() == json.dumps(records, indent=2)
+
+
+def test_export_of_empty_store(tmp_path):
+    with ResultsStore(str(tmp_path / "results.db")) as store:
+        store.export_json(str(tmp_path / "results.json"))
+    with open(tmp_path / "results.json") as f:
+        assert f.read() == json.dumps([], indent=2)
+
+
+def test_normalized_tables_are_backfilled(records, tmp_path):
+    path = str(tmp_path / "results.db")
+    with ResultsStore(path) as store:
+        store.append(records)
+    expected = table_counts(path)
+
+    # A store from before the normalized tables: draws only, user_version 0
+    conn = sqlite3.connect(path)
+    with conn:
+        for table in NORMALIZED_TABLES:
+            conn.execute(f"DELETE FROM {table}")
+        conn.execute("PRAGMA user_version = 0")
+    conn.close()
+
+    ResultsStore(path).close()
+    assert table_counts(path) == expected
+    assert expected["tier_results"] > len(records)
+
+
+def test_replace_all(records, tmp_path):
+    path = str(tmp_path / "results.db")
+    with ResultsStore(path) as store:
+        store.append(records)
+        store.replace_all(records[:100])
+        assert list(store.records()) == records[:100]
+    assert table_counts(path)["draws"] == 100
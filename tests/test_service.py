@@ -0,0 +1,44 @@
+"""QueryService answers over a real socket, including malformed requests."""
+import asyncio
+
+import pytest
+
+from conftest import RESULTS_JSON
+from service import QueryService
+
+
+@pytest.fixture(scope="module")
+def service():
+    return QueryService(RESULTS_JSON)
+
+
+def exchange(service, raw):
+    """Send raw bytes to the service on an ephemeral port; the bytes it sends back before closing"""
+    async def run():
+        server = await asyncio.start_server(service.handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(raw)
+            await writer.drain()
+            response = await asyncio.wait_for(reader.read(), 5)
+            writer.close()
+            return response
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("raw", [
+    b"GARBAGE\r\n\r\n",
+    b"GET /next-draw HTTP/1.1\r\nContent-Length: abc\r\n\r\n",
+    b"GET /next-draw HTTP/1.1\r\nContent-Length: -5\r\n\r\n",
+])
+def test_malformed_request_gets_400(service, raw):
+    assert exchange(service, raw).startswith(b"HTTP/1.1 400 Bad Request\r\n")
+
+
+def test_check_on_49_ball_draw(service):
+    # 05-10-2019 had no Match 5 plus Bonus tier
+    response = exchange(service, b"GET /check?numbers=16,17,31,34,36,10,1&date=2019-05-10 HTTP/1.1\r\n"
+                                 b"Connection: close\r\n\r\n")
+    assert response.startswith(b"HTTP/1.1 200 OK\r\n")
+    assert b'"tier": "Match 5", "prize_cents": 11080' in response
@@ -0,0 +1,89 @@
+"""StatsQuery windows against filtering the draws in plain Python."""
+from collections import Counter
+from datetime import date as Date
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from draw_stats import NUMBERS, PAIRS
+from records import from_records
+from stats_query import ERAS, JACKPOT_BANDS, UNKNOWN_BAND, WEEKDAYS, StatsQuery
+
+
+@pytest.fixture(scope="module")
+def draws(records):
+    return sorted(from_records(records), key=lambda d: d.date)
+
+
+@pytest.fixture(scope="module")
+def query(draws):
+    return StatsQuery.from_draws(draws)
+
+
+def band(draw):
+    if draw.jackpot_cents is None or draw.jackpot_cents < 0:
+        return UNKNOWN_BAND
+    for name, low, high in JACKPOT_BANDS:
+        if draw.jackpot_cents >= low and (high is None or draw.jackpot_cents < high):
+            return name
+
+
+def naive_select(draws, start=None, end=None, last=None, era=None, weekdays=None, bands=None):
+    bounds = [(start, end)] + ([ERAS[era]] if era else [])
+    selected = [d for d in draws
+                if all((lo is None or d.date >= Date.fromisoformat(lo)) and (hi is None or d.date < Date.fromisoformat(hi))
+                       for lo, hi in bounds)
+                and (weekdays is None or WEEKDAYS[d.date.weekday()] in weekdays)
+                and (bands is None or band(d) in bands)]
+    return selected[max(0, len(selected) - last):] if last is not None else selected
+
+
+def naive_stats(selected):
+    counts = Counter(n for d in selected for n in d.balls)
+    latest = {n: i for i, d in enumerate(selected) for n in d.balls}
+    gaps = [0] + [len(selected) - 1 - latest[n] if n in latest else len(selected) for n in range(1, NUMBERS + 1)]
+    pairs = Counter(pair for d in selected for pair in combinations(sorted(d.balls), 2))
+    return ([counts[n] for n in range(NUMBERS + 1)], gaps,
+            [pairs[(int(a), int(b))] for a, b in PAIRS])
+
+
+def random_queries(count, seed):
+    rng = np.random.default_rng(seed)
+    years = range(2009, 2026)
+    bands = [name for name, _, _ in JACKPOT_BANDS] + [UNKNOWN_BAND]
+    for _ in range(count):
+        query = {}
+        if rng.random() < 0.4:
+            query["start"] = f"{rng.choice(years)}-{rng.integers(1, 13):02d}-01"
+        if rng.random() < 0.4:
+            query["end"] = f"{rng.choice(years)}-{rng.integers(1, 13):02d}-15"
+        if rng.random() < 0.3:
+            query["era"] = str(rng.choice(list(ERAS)))
+        if rng.random() < 0.4:
+            query["last"] = int(rng.integers(0, 300))
+        if rng.random() < 0.4:
+            query["weekdays"] = [str(day) for day in rng.choice(["tuesday", "friday", "monday"], rng.integers(1, 3), replace=False)]
+        if rng.random() < 0.4:
+            query["bands"] = [str(b) for b in rng.choice(bands, rng.integers(1, 4), replace=False)]
+        yield query
+
+
+FIXED_QUERIES = [{"last": 0}, {"last": 0, "era": "50-ball"}, {"last": 1}, {"last": 100000},
+                 {"start": "2015-01-01", "last": 0, "weekdays": ["friday"]}]
+
+
+@pytest.mark.parametrize("params", FIXED_QUERIES + list(random_queries(150, seed=11)), ids=str)
+def test_window_matches_naive(draws, query, params):
+    selected = naive_select(draws, **params)
+    counts, gaps, pairs = naive_stats(selected)
+    assert query.draws(**params) == len(selected)
+    assert query.frequencies(**params).tolist() == counts
+    assert query.gaps(**params).tolist() == gaps
+    assert query.pair_counts(**params).tolist() == pairs
+
+
+def test_49_ball_summary_leaves_out_50(query):
+    summary = query.summary(era="49-ball")
+    assert 50 not in [n for n, _ in summary["cold"]] + [n for n, _ in summary["overdue"]]
+    assert summary["last"] < "2019-05-14"
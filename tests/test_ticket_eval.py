@@ -0,0 +1,91 @@
+"""ticket_eval against a set-intersection evaluator reading the raw records."""
+import numpy as np
+import pytest
+
+from columnar import ColumnarBuilder
+from conftest import RESULTS_JSON
+from normalize import money_to_cents
+from ticket_eval import MAX_MILLION_CENTS, NO_PRIZE, TIER_LABELS, DrawHistory, evaluate, random_tickets
+
+
+def parse_draw(record):
+    """(balls, bonus, {tier name: cents paid}, Max Millions sets) of a raw record"""
+    prizes = {}
+    for tier in record["prize_breakdown"]:
+        prize = tier["prize_per_winner"]
+        prizes[tier["match_type"].strip()] = 0 if "free play" in prize.lower() else money_to_cents(prize) or 0
+    sets = [tuple(sorted(int(n) for n in s["numbers"])) for s in record["max_millions"]["results"]]
+    return ({int(n) for n in record["main_draw"]["main_numbers"]}, int(record["main_draw"]["bonus_number"]),
+            prizes, sets)
+
+
+def naive_tier(ticket, draw):
+    """(tier name or None, cents paid) of one ticket on one parsed draw"""
+    balls, bonus, prizes, sets = draw
+    matched = len(ticket & balls)
+    if matched < 3:
+        name = None
+    elif matched == 7:
+        name = "Match 7"
+    elif bonus in ticket and f"Match {matched} plus Bonus" in prizes:
+        name = f"Match {matched} plus Bonus"
+    else:
+        name = f"Match {matched}"
+    cents = prizes.get(name, 0) if name else 0
+    return name, cents + sets.count(tuple(sorted(ticket))) * MAX_MILLION_CENTS
+
+
+def winning_tickets(record, rng):
+    """Tickets sharing 3 to 7 numbers with a draw, with and without its bonus"""
+    balls = [int(n) for n in record["main_draw"]["main_numbers"]]
+    bonus = int(record["main_draw"]["bonus_number"])
+    others = [n for n in rng.permutation(np.arange(1, 51)).tolist() if n not in balls and n != bonus]
+    tickets = [balls]
+    for matched in (6, 5, 4, 3):
+        tickets.append(balls[:matched] + others[:7 - matched])
+        tickets.append(balls[:matched] + [bonus] + others[:6 - matched])
+    return tickets
+
+
+@pytest.fixture(scope="module")
+def history():
+    return DrawHistory.from_json(RESULTS_JSON)
+
+
+def test_matches_naive_evaluator(records, history):
+    rng = np.random.default_rng(7)
+    sample = [records[i] for i in rng.choice(len(records), 30, replace=False)]
+    tickets = [t for record in sample for t in winning_tickets(record, rng)]
+    tickets += random_tickets(20, seed=3).tolist()
+    mm = next(r for r in records if r["max_millions"]["results"])
+    tickets.append([int(n) for n in mm["max_millions"]["results"][0]["numbers"]])
+
+    result = evaluate(np.array(tickets), history)
+    draws = [parse_draw(record) for record in records]
+    for i, ticket in enumerate(tickets):
+        tiers = np.zeros(NO_PRIZE + 1, dtype=np.int64)
+        payout = 0
+        for draw in draws:
+            name, cents = naive_tier(set(ticket), draw)
+            tiers[TIER_LABELS.index(name) if name else NO_PRIZE] += 1
+            payout += cents
+        assert result.tiers[i].tolist() == tiers.tolist(), ticket
+        assert result.payout_cents[i] == payout, ticket
+
+
+def test_bonus_win_before_bonus_tiers(records):
+    # 05-10-2019 has no Match 5 or Match 4 plus Bonus tier: a bonus win pays the plain tier
+    record = next(r for r in records if r["date"] == "05-10-2019")
+    balls = [int(n) for n in record["main_draw"]["main_numbers"]]
+    bonus = int(record["main_draw"]["bonus_number"])
+    filler = [n for n in range(1, 51) if n not in balls and n != bonus]
+    tickets = np.array([balls[:5] + filler[:2], balls[:5] + [bonus] + filler[:1],
+                        balls[:4] + filler[:3], balls[:4] + [bonus] + filler[:2]])
+    builder = ColumnarBuilder()
+    builder.add(record)
+    result = evaluate(tickets, DrawHistory(builder.tables()))
+
+    assert result.payout_cents.tolist() == [11080, 11080, 2000, 2000]
+    match_5, match_4 = TIER_LABELS.index("Match 5"), TIER_LABELS.index("Match 4")
+    assert result.tiers[:, match_5].tolist() == [1, 1, 0, 0]
+    assert result.tiers[:, match_4].tolist() == [0, 0, 1, 1]
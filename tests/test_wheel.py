@@ -0,0 +1,55 @@
+"""Wheel scores kept incrementally against a recount over the tickets."""
+import math
+import random
+from itertools import combinations
+
+import pytest
+
+from wheel import TRIPLE_WEIGHT, Wheel, build_wheel, coverage, frequency_weights
+
+
+def recount(tickets, weights, triple_weight):
+    """Weighted covered pairs, plus triple_weight times the weighted covered triples"""
+    pairs = {pair for ticket in tickets for pair in combinations(sorted(ticket), 2)}
+    triples = {triple for ticket in tickets for triple in combinations(sorted(ticket), 3)}
+    return (sum(math.prod(weights[n] for n in pair) for pair in pairs)
+            + triple_weight * sum(math.prod(weights[n] for n in triple) for triple in triples))
+
+
+@pytest.mark.parametrize("triple_weight", [0, TRIPLE_WEIGHT])
+def test_score_matches_recount(triple_weight):
+    pool = list(range(1, 21))
+    weights = frequency_weights({n: 10 + n % 7 for n in pool}, pool)
+    wheel = build_wheel(pool, 8, weights, triple_weight, steps=3000, seed=5)
+
+    assert len(wheel.tickets) == 8
+    for ticket in wheel.tickets:
+        assert len(set(ticket)) == 7 and set(ticket) <= set(pool)
+    assert wheel.score == pytest.approx(recount(wheel.tickets, weights, triple_weight))
+
+
+def test_swap_delta_is_the_score_change():
+    pool = list(range(1, 16))
+    wheel = Wheel(pool)
+    rng = random.Random(3)
+    wheel.fill(6, rng)
+    for _ in range(300):
+        index = rng.randrange(len(wheel.tickets))
+        ticket = wheel.tickets[index]
+        old = rng.choice(ticket)
+        new = rng.choice([n for n in pool if n not in ticket])
+        before = wheel.score
+        delta = wheel.swap_delta(ticket, old, new)
+        wheel.swap(index, old, new)
+        assert wheel.score - before == pytest.approx(delta)
+        assert wheel.score == pytest.approx(recount(wheel.tickets, wheel.weights, wheel.triple_weight))
+
+
+def test_coverage_report():
+    pool = list(range(1, 15))
+    wheel = build_wheel(pool, 5, steps=2000, seed=1)
+    report = coverage(wheel.tickets, pool)
+    pairs = {pair for ticket in wheel.tickets for pair in combinations(sorted(ticket), 2)}
+    assert report["pairs"]["covered"] == len(pairs)
+    assert report["pairs"]["covered"] <= report["pairs"]["bound"]
+    assert report["number_uses"]["min"] >= 1
@@ -0,0 +1,321 @@
+"""Score Lotto Max tickets against the draw history.
+
+Tickets and draws are 64-bit masks with bit n set for number n, so the numbers a ticket
+shares with a draw are popcount(ticket & draw). Tickets are evaluated in chunks against
+every draw at once; only the (ticket, draw) cells that win a prize are looked up in the
+parsed prize breakdown of that draw.
+
+    python ticket_eval.py tickets.csv         # one ticket of 7 numbers per line
+    python ticket_eval.py --random 1000000    # score random tickets
+"""
+import argparse
+import csv
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from columnar import COLUMNAR_DIR, ColumnarBuilder, load_columnar
+from formatter import JSON_FILE, iter_json_records
+from normalize import TIER_NAMES
+
+NUMBERS = 50
+BALLS = 7
+NO_PRIZE = len(TIER_NAMES)
+TIER_LABELS = TIER_NAMES + ["No prize"]
+
+# A Max Millions set only pays on an exact match of all seven numbers
+MAX_MILLION_CENTS = 100_000_000
+
+# Tickets per chunk are sized so a chunk holds about this many (ticket, draw) cells,
+# small enough for the work arrays to stay in cache
+CHUNK_CELLS = 1 << 18
+
+# TIER_OF[matched numbers, bonus matched] -> tier code (index into TIER_NAMES) or NO_PRIZE
+TIER_OF = np.full((BALLS + 1, 2), NO_PRIZE, dtype=np.uint8)
+TIER_OF[7] = TIER_NAMES.index("Match 7")
+for _matched in (6, 5, 4, 3):
+    TIER_OF[_matched, 0] = TIER_NAMES.index(f"Match {_matched}")
+    TIER_OF[_matched, 1] = TIER_NAMES.index(f"Match {_matched} plus Bonus")
+
+# (bonus tier, plain tier) pairs. Draws before 2019-05-14 have no Match 5 or Match 4 plus
+# Bonus tier, so on those draws a bonus win counts in the plain tier
+BONUS_FALLBACK = [(TIER_NAMES.index(f"Match {_matched} plus Bonus"), TIER_NAMES.index(f"Match {_matched}"))
+                  for _matched in (6, 5, 4, 3)]
+
+
+def draw_tier_maps(listed):
+    """(draws x tiers) bool of the tiers each draw lists -> (draws x NO_PRIZE + 1) tier remap.
+
+    TIER_OF gives the tier of a win under the current prize structure; remap[draw, tier] is the
+    tier that draw actually paid it in.
+    """
+    remap = np.tile(np.arange(NO_PRIZE + 1, dtype=np.uint8), (len(listed), 1))
+    for bonus, plain in BONUS_FALLBACK:
+        remap[~listed[:, bonus] & listed[:, plain], bonus] = plain
+    return remap
+
+
+def popcount64(x, out=None):
+    """Set bits per element of a uint64 array (SWAR fallback for NumPy < 2.0)"""
+    x = x - ((x >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    x = (x & np.uint64(0x3333333333333333)) + ((x >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    x = (x + (x >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    counts = (x * np.uint64(0x0101010101010101)) >> np.uint64(56)
+    if out is None:
+        return counts.astype(np.uint8)
+    out[...] = counts
+    return out
+
+
+popcount = getattr(np, "bitwise_count", popcount64)
+
+
+def to_masks(numbers):
+    """(n x k) array of numbers -> n uint64 masks"""
+    numbers = np.asarray(numbers, dtype=np.uint64)
+    if numbers.ndim == 1:
+        numbers = numbers.reshape(1, -1)
+    return np.bitwise_or.reduce(np.uint64(1) << numbers, axis=1, initial=np.uint64(0))
+
+
+def ticket_masks(tickets):
+    """Masks of (n x 7) tickets; every ticket needs seven different numbers from 1 to 50"""
+    tickets = np.asarray(tickets)
+    if tickets.ndim != 2 or tickets.shape[1] != BALLS:
+        raise ValueError(f"tickets must be an (n x {BALLS}) array, got shape {tickets.shape}")
+    if tickets.size and (tickets.min() < 1 or tickets.max() > NUMBERS):
+        raise ValueError(f"ticket numbers must be between 1 and {NUMBERS}")
+    masks = to_masks(tickets)
+    bad = np.flatnonzero(popcount(masks) != BALLS)
+    if len(bad):
+        raise ValueError(f"ticket {bad[0]} has repeated numbers: {tickets[bad[0]].tolist()}")
+    return masks
+
+
+class DrawHistory:
+    """Draw masks and per-draw prize tables taken from the typed dataset"""
+
+    def __init__(self, tables):
+        draws = tables["draws"]
+        tiers = tables["prize_tiers"]
+        mm = tables["max_millions"]
+        n = len(draws["date"])
+
+        # Keep the draws in date order; rank maps a dataset row to its position here
+        order = np.argsort(draws["date"], kind="stable")
+        rank = np.empty(n, dtype=np.int64)
+        rank[order] = np.arange(n)
+        self.dates = draws["date"][order]
+        self.masks = to_masks(draws["balls"][order].reshape(-1, BALLS))
+        self.bonus_masks = np.uint64(1) << draws["bonus"][order].astype(np.uint64)
+
+        # prize_cents[draw, tier] and free_play[draw, tier]; unknown or missing prizes pay 0.
+        # Tier codes index the dataset's own tier_names, which may list extra names
+        remap = np.array([TIER_NAMES.index(str(name)) if str(name) in TIER_NAMES else NO_PRIZE
+                          for name in tiers["tier_names"]], dtype=np.uint8)
+        codes = remap[tiers["tier"]]
+        known = codes < NO_PRIZE
+        rows, codes = rank[tiers["draw"][known]], codes[known]
+        self.prize_cents = np.zeros((n, NO_PRIZE + 1), dtype=np.int64)
+        self.free_play = np.zeros((n, NO_PRIZE + 1), dtype=bool)
+        self.prize_cents[rows, codes] = np.maximum(tiers["prize_cents"][known], 0)
+        self.free_play[rows, codes] = tiers["free_play"][known]
+        listed = np.zeros((n, NO_PRIZE), dtype=bool)
+        listed[rows, codes] = True
+        self.tier_map = draw_tier_maps(listed)
+
+        self.mm_draws = rank[mm["draw"]]
+        self.mm_masks = to_masks(mm["numbers"].reshape(-1, BALLS))
+
+    @property
+    def mm_lookup(self):
+        """(sorted unique Max Millions masks, how many sets had each)"""
+        if getattr(self, "_mm_lookup", None) is None:
+            self._mm_lookup = np.unique(self.mm_masks, return_counts=True)
+        return self._mm_lookup
+
+    @classmethod
+    def from_columnar(cls, directory=COLUMNAR_DIR):
+        return cls(load_columnar(directory))
+
+    @classmethod
+    def from_json(cls, json_file=JSON_FILE):
+        """Build from lottery_results_final.json, one record at a time"""
+        builder = ColumnarBuilder()
+        for record in iter_json_records(json_file):
+            builder.add(record)
+        return cls(builder.tables())
+
+    def __len__(self):
+        return len(self.masks)
+
+    def since(self, start):
+        """Copy restricted to the draws on or after start (YYYY-MM-DD)"""
+        lo = int(np.searchsorted(self.dates, np.datetime64(start, "D")))
+        history = object.__new__(DrawHistory)
+        history.dates = self.dates[lo:]
+        history.masks = self.masks[lo:]
+        history.bonus_masks = self.bonus_masks[lo:]
+        history.prize_cents = self.prize_cents[lo:]
+        history.free_play = self.free_play[lo:]
+        history.tier_map = self.tier_map[lo:]
+        keep = self.mm_draws >= lo
+        history.mm_draws = self.mm_draws[keep] - lo
+        history.mm_masks = self.mm_masks[keep]
+        history._mm_lookup = None
+        return history
+
+
+class Evaluation:
+    """Per-ticket results of evaluate()
+
+    tiers            (tickets x 10) draws won in each tier of TIER_LABELS (last column: no prize)
+    payout_cents     cash won over all draws, Max Millions included
+    free_plays       free play tickets won
+    max_millions     Max Millions sets matched exactly
+    """
+
+    def __init__(self, tiers, payout_cents, free_plays, max_millions, draws):
+        self.tiers = tiers
+        self.payout_cents = payout_cents
+        self.free_plays = free_plays
+        self.max_millions = max_millions
+        self.draws = draws
+
+    def __len__(self):
+        return len(self.payout_cents)
+
+    def summary(self, ticket_price_cents=500):
+        """Totals over all tickets"""
+        plays = len(self) * self.draws
+        return {
+            "tickets": len(self),
+            "draws": self.draws,
+            "tiers": dict(zip(TIER_LABELS, self.tiers.sum(axis=0).tolist())),
+            "max_millions": int(self.max_millions.sum()),
+            "free_plays": int(self.free_plays.sum()),
+            "payout_cents": int(self.payout_cents.sum()),
+            "cost_cents": plays * ticket_price_cents,
+        }
+
+
+def evaluate_chunk(masks, history, buffers):
+    """tiers, payout, free plays and Max Millions matches for one chunk of ticket masks"""
+    n, draws = len(masks), len(history)
+    shared, matched, winning = (buf[:n] for buf in buffers)
+
+    # Full (tickets x draws) work is limited to AND + popcount + threshold;
+    # everything else only touches the few cells with three or more numbers
+    np.bitwise_and(masks[:, None], history.masks[None, :], out=shared)
+    popcount(shared, out=matched)
+    np.greater_equal(matched, 3, out=winning)
+    cells = np.flatnonzero(winning)
+    rows, cols = np.divmod(cells, draws)
+    bonus = (masks[rows] & history.bonus_masks[cols]) != 0
+    won = history.tier_map[cols, TIER_OF[matched.ravel()[cells], bonus.view(np.uint8)]]
+
+    tiers = np.bincount(rows * (NO_PRIZE + 1) + won, minlength=n * (NO_PRIZE + 1)).reshape(n, NO_PRIZE + 1)
+    tiers[:, NO_PRIZE] = draws - tiers.sum(axis=1)
+    payout = np.bincount(rows, weights=history.prize_cents[cols, won], minlength=n).astype(np.int64)
+    free_plays = np.bincount(rows, weights=history.free_play[cols, won], minlength=n).astype(np.int64)
+
+    # Max Millions pays on an exact mask match: look each ticket up in the sorted set masks
+    max_millions = np.zeros(n, dtype=np.int64)
+    unique, counts = history.mm_lookup
+    if len(unique):
+        slot = np.minimum(np.searchsorted(unique, masks), len(unique) - 1)
+        hit = unique[slot] == masks
+        max_millions[hit] = counts[slot[hit]]
+    payout += max_millions * MAX_MILLION_CENTS
+    return tiers, payout, free_plays, max_millions
+
+
+def evaluate_masks(masks, history, chunk_size):
+    """evaluate_chunk over masks in chunks, with one set of work arrays reused by every chunk"""
+    draws = len(history)
+    rows = min(chunk_size, len(masks))
+    buffers = (np.empty((rows, draws), dtype=np.uint64),
+               np.empty((rows, draws), dtype=np.uint8),
+               np.empty((rows, draws), dtype=bool))
+    return [evaluate_chunk(masks[start:start + chunk_size], history, buffers)
+            for start in range(0, len(masks), chunk_size)]
+
+
+def evaluate(tickets, history, chunk_size=None, workers=1):
+    """Score (n x 7) tickets against every draw in history.
+
+    With workers > 1 the tickets are split into that many contiguous slices evaluated
+    on threads (NumPy releases the GIL in the array work); results keep ticket order.
+    """
+    masks = ticket_masks(tickets)
+    draws = len(history)
+    if chunk_size is None:
+        chunk_size = max(1, CHUNK_CELLS // max(1, draws))
+    if not len(masks):
+        empty = np.zeros(0, dtype=np.int64)
+        return Evaluation(np.zeros((0, NO_PRIZE + 1), dtype=np.int64), empty, empty, empty, draws)
+
+    if workers > 1:
+        slices = [part for part in np.array_split(masks, workers) if len(part)]
+        with ThreadPoolExecutor(max_workers=len(slices)) as executor:
+            parts = [chunk for chunks in executor.map(
+                lambda part: evaluate_masks(part, history, chunk_size), slices) for chunk in chunks]
+    else:
+        parts = evaluate_masks(masks, history, chunk_size)
+    return Evaluation(*(np.concatenate(columns) for columns in zip(*parts)), draws)
+
+
+def random_tickets(count, seed=None):
+    """count quick-pick tickets as a (count x 7) uint8 array"""
+    rng = np.random.default_rng(seed)
+    return (np.argsort(rng.random((count, NUMBERS)), axis=1)[:, :BALLS] + 1).astype(np.uint8)
+
+
+def read_tickets(path):
+    with open(path, newline='') as f:
+        return np.array([[int(n) for n in row if n.strip()] for row in csv.reader(f) if row], dtype=np.uint8)
+
+
+def print_summary(summary):
+    print(f"Tickets: {summary['tickets']:,} x {summary['draws']:,} draws")
+    for label, count in summary["tiers"].items():
+        print(f"  {label:<20} {count:,}")
+    print(f"  {'Max Millions':<20} {summary['max_millions']:,}")
+    print(f"Free plays won: {summary['free_plays']:,}")
+    print(f"Cash won: ${summary['payout_cents'] / 100:,.2f} for ${summary['cost_cents'] / 100:,.2f} of tickets")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score tickets against the draw history")
+    parser.add_argument("tickets", nargs="?", help="CSV file with one ticket of 7 numbers per line")
+    parser.add_argument("--random", type=int, default=0, help="score this many random tickets instead")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--columnar-dir", default=COLUMNAR_DIR)
+    parser.add_argument("--json", default=None, help="read draws from a results JSON file instead")
+    parser.add_argument("--since", default=None, help="only draws on or after this date (YYYY-MM-DD)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="threads evaluating tickets (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    if args.random:
+        tickets = random_tickets(args.random, args.seed)
+    elif args.tickets:
+        tickets = read_tickets(args.tickets)
+    else:
+        parser.error("give a tickets file or --random N")
+
+    history = DrawHistory.from_json(args.json) if args.json else DrawHistory.from_columnar(args.columnar_dir)
+    if args.since:
+        history = history.since(args.since)
+
+    start = time.perf_counter()
+    result = evaluate(tickets, history, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    print_summary(result.summary())
+    print(f"Evaluated in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+"""Ticket wheels: sets of tickets that spread a pool of numbers over as many pairs and triples as possible.
+
+Tickets picked one at a time at random repeat pairs that other tickets already hold. A
+wheel picks the whole set at once. It is built greedily, one number at a time, each
+time choosing the number that covers the most uncovered pairs and triples. Simulated
+annealing then improves it by swapping one number of one ticket at a time.
+
+Every pair and triple of the pool keeps the number of tickets covering it. A swap
+touches 6 pairs and 15 triples on each side, so its score change is computed in
+constant time, whatever the number of tickets. Pairs can be weighted by the
+historical frequency of their numbers.
+
+    python wheel.py --pool 1-50 --tickets 100
+    python wheel.py --pool 3,7,11-24,40 --tickets 30 --weighted --era rng --output tickets.csv
+"""
+import argparse
+import csv
+import json
+import math
+import random
+import time
+from itertools import combinations
+
+from draw_stats import BALLS, NUMBERS
+
+BASE = NUMBERS + 1
+
+# Score of a triple relative to a pair, before weighting
+TRIPLE_WEIGHT = 0.1
+
+STEPS = 100_000
+# Annealing temperature, relative to the mean pair weight, at the first and last step
+START_TEMPERATURE = 1.0
+END_TEMPERATURE = 0.02
+
+CHECK_DRAWS = 20_000
+
+
+def pair_id(a, b):
+    return a * BASE + b if a < b else b * BASE + a
+
+
+def triple_id(a, b, c):
+    a, b, c = sorted((a, b, c))
+    return (a * BASE + b) * BASE + c
+
+
+def parse_pool(text):
+    """Numbers of "1-20,33,41" style text, sorted"""
+    numbers = set()
+    for part in text.split(","):
+        low, _, high = part.strip().partition("-")
+        numbers.update(range(int(low), int(high or low) + 1))
+    pool = sorted(numbers)
+    if not pool or pool[0] < 1 or pool[-1] > NUMBERS:
+        raise ValueError(f"pool numbers must be between 1 and {NUMBERS}")
+    if len(pool) < BALLS:
+        raise ValueError(f"the pool needs at least {BALLS} numbers")
+    return pool
+
+
+def frequency_weights(counts, pool):
+    """{number: weight} proportional to counts (indexed by number), with mean 1 over the pool"""
+    mean = sum(counts[n] for n in pool) / len(pool)
+    return {n: (counts[n] / mean if mean else 1.0) for n in pool}
+
+
+class Wheel:
+    """Tickets over a pool with coverage counts for every pair and triple"""
+
+    def __init__(self, pool, weights=None, triple_weight=TRIPLE_WEIGHT):
+        self.pool = sorted(pool)
+        self.weights = weights or {n: 1.0 for n in self.pool}
+        self.triple_weight = triple_weight
+        self.tickets = []
+        self.score = 0.0
+
+        w = self.weights
+        # Flat tables by pair_id / triple_id; pairs[a][b] is the pair id of a and b
+        self.pair_weight = [0.0] * BASE ** 2
+        self.pair_count = [0] * BASE ** 2
+        self.pairs = [[0] * BASE for _ in range(BASE)]
+        for a, b in combinations(self.pool, 2):
+            self.pair_weight[pair_id(a, b)] = w[a] * w[b]
+            self.pairs[a][b] = self.pairs[b][a] = pair_id(a, b)
+        self.triple_count = [0] * BASE ** 3
+        self.triple_weight_of = None
+        if triple_weight:
+            # triples[pair id][c] is the triple id of the pair and c
+            self.triple_weight_of = [0.0] * BASE ** 3
+            self.triples = {}
+            for a, b in combinations(self.pool, 2):
+                self.triples[pair_id(a, b)] = row = [0] * BASE
+                for c in self.pool:
+                    if c != a and c != b:
+                        row[c] = triple_id(a, b, c)
+                        self.triple_weight_of[row[c]] = triple_weight * w[a] * w[b] * w[c]
+
+    def gain(self, ticket, number):
+        """Score added by putting number into a ticket under construction"""
+        pairs, pair_count, pair_weight = self.pairs[number], self.pair_count, self.pair_weight
+        total = 0.0
+        for m in ticket:
+            if not pair_count[pairs[m]]:
+                total += pair_weight[pairs[m]]
+        if self.triple_weight_of is not None:
+            triple_count, triple_weight = self.triple_count, self.triple_weight_of
+            for a, b in combinations(ticket, 2):
+                t = self.triples[self.pairs[a][b]][number]
+                if not triple_count[t]:
+                    total += triple_weight[t]
+        return total
+
+    def add(self, ticket):
+        self.tickets.append(list(ticket))
+        self.cover(ticket, 1)
+
+    def cover(self, ticket, step):
+        """Count a ticket's pairs and triples in (step 1) or out (step -1), updating the score"""
+        pairs = self.pairs
+        for a, b in combinations(ticket, 2):
+            p = pairs[a][b]
+            self.pair_count[p] += step
+            if self.pair_count[p] == (step > 0):
+                self.score += step * self.pair_weight[p]
+        if self.triple_weight_of is not None:
+            for a, b, c in combinations(ticket, 3):
+                t = self.triples[pairs[a][b]][c]
+                self.triple_count[t] += step
+                if self.triple_count[t] == (step > 0):
+                    self.score += step * self.triple_weight_of[t]
+
+    def swap_delta(self, ticket, old, new):
+        """Score change of replacing old with new in a ticket"""
+        pair_count, pair_weight = self.pair_count, self.pair_weight
+        old_pairs, new_pairs = self.pairs[old], self.pairs[new]
+        others = [n for n in ticket if n != old]
+        delta = 0.0
+        for n in others:
+            if pair_count[old_pairs[n]] == 1:
+                delta -= pair_weight[old_pairs[n]]
+            if not pair_count[new_pairs[n]]:
+                delta += pair_weight[new_pairs[n]]
+        if self.triple_weight_of is not None:
+            triple_count, triple_weight, triples, pairs = self.triple_count, self.triple_weight_of, self.triples, self.pairs
+            for i in range(len(others) - 1):
+                row = pairs[others[i]]
+                for b in others[i + 1:]:
+                    by_third = triples[row[b]]
+                    t = by_third[old]
+                    if triple_count[t] == 1:
+                        delta -= triple_weight[t]
+                    t = by_third[new]
+                    if not triple_count[t]:
+                        delta += triple_weight[t]
+        return delta
+
+    def swap(self, index, old, new):
+        ticket = self.tickets[index]
+        self.cover(ticket, -1)
+        ticket[ticket.index(old)] = new
+        self.cover(ticket, 1)
+
+    def fill(self, budget, rng):
+        """Add tickets greedily until there are budget of them"""
+        uses = {n: 0 for n in self.pool}
+        for ticket in self.tickets:
+            for n in ticket:
+                uses[n] += 1
+        while len(self.tickets) < budget:
+            # Start from a least used number, then add the best number each time; ties at random
+            least = min(uses.values())
+            ticket = [rng.choice([n for n in self.pool if uses[n] == least])]
+            while len(ticket) < BALLS:
+                best = max((self.gain(ticket, n), -uses[n], rng.random(), n) for n in self.pool if n not in ticket)
+                ticket.append(best[3])
+            for n in ticket:
+                uses[n] += 1
+            self.add(sorted(ticket))
+
+    def anneal(self, steps, rng, start_temperature=START_TEMPERATURE, end_temperature=END_TEMPERATURE):
+        """Random single-number swaps, accepted by the Metropolis rule on a geometric cooling schedule.
+
+        Ends with the best tickets seen.
+        """
+        if not self.tickets or len(self.pool) == BALLS or steps <= 0:
+            return
+        scale = sum(self.pair_weight) / math.comb(len(self.pool), 2)
+        temperature = start_temperature * scale
+        cooling = (end_temperature / start_temperature) ** (1 / steps)
+        best_score, best = self.score, [ticket[:] for ticket in self.tickets]
+        pool, tickets = self.pool, self.tickets
+        for _ in range(steps):
+            index = rng.randrange(len(tickets))
+            ticket = tickets[index]
+            old = ticket[rng.randrange(BALLS)]
+            new = pool[rng.randrange(len(pool))]
+            if new in ticket:
+                temperature *= cooling
+                continue
+            delta = self.swap_delta(ticket, old, new)
+            if delta >= 0 or rng.random() < math.exp(delta / temperature):
+                self.swap(index, old, new)
+                if self.score > best_score + 1e-9:
+                    best_score, best = self.score, [t[:] for t in tickets]
+            temperature *= cooling
+        if best_score > self.score + 1e-9:
+            self.reset(best)
+        self.tickets = [sorted(ticket) for ticket in self.tickets]
+
+    def reset(self, tickets):
+        for ticket in self.tickets:
+            self.cover(ticket, -1)
+        self.tickets = []
+        for ticket in tickets:
+            self.add(ticket)
+
+
+def build_wheel(pool, budget, weights=None, triple_weight=TRIPLE_WEIGHT, steps=STEPS, seed=None):
+    """A Wheel of budget tickets over pool: greedy construction, then annealing"""
+    rng = random.Random(seed)
+    wheel = Wheel(pool, weights, triple_weight)
+    wheel.fill(budget, rng)
+    wheel.anneal(steps, rng)
+    return wheel
+
+
+def coverage(tickets, pool, weights=None):
+    """Pair and triple coverage of tickets over pool, counted from scratch"""
+    weights = weights or {n: 1.0 for n in pool}
+    report = {"pool": len(pool), "tickets": len(tickets)}
+    uses = {n: 0 for n in pool}
+    for ticket in tickets:
+        for n in ticket:
+            uses[n] += 1
+    report["number_uses"] = {"min": min(uses.values()), "max": max(uses.values())}
+    for name, size in (("pairs", 2), ("triples", 3)):
+        counts = {}
+        for ticket in tickets:
+            for group in combinations(sorted(ticket), size):
+                counts[group] = counts.get(group, 0) + 1
+        total_weight = sum(math.prod(weights[n] for n in group) for group in combinations(pool, size))
+        covered_weight = sum(math.prod(weights[n] for n in group) for group in counts)
+        total = math.comb(len(pool), size)
+        report[name] = {
+            "covered": len(counts),
+            "total": total,
+            # No set of this many tickets can cover more
+            "bound": min(total, len(tickets) * math.comb(BALLS, size)),
+            "fraction": len(counts) / total,
+            "weighted_fraction": covered_weight / total_weight,
+            "max_repeats": max(counts.values(), default=0),
+        }
+    return report
+
+
+def best_match_rates(tickets, draws=CHECK_DRAWS, seed=None):
+    """Fraction of random draws whose best ticket matches at least k main numbers, for k = 2..7"""
+    import numpy as np
+
+    from ticket_eval import popcount, random_tickets, ticket_masks
+
+    masks = ticket_masks(tickets)
+    best = np.zeros(BALLS + 1, dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    chunk = max(1, (1 << 22) // len(masks))
+    for start in range(0, draws, chunk):
+        drawn = ticket_masks(random_tickets(min(chunk, draws - start), rng))
+        matches = popcount(drawn[:, None] & masks[None, :]).max(axis=1)
+        best += np.bincount(matches, minlength=BALLS + 1)
+    at_least = best[::-1].cumsum()[::-1] / draws
+    return {k: float(at_least[k]) for k in range(2, BALLS + 1)}
+
+
+def print_report(report, baseline=None):
+    print(f"\n{report['tickets']} tickets over {report['pool']} numbers, "
+          f"each number used {report['number_uses']['min']}-{report['number_uses']['max']} times")
+    header = f"{'':<10}{'covered':>16}{'of':>8}{'weighted':>10}{'max repeats':>13}"
+    print(header + (f"{'random picks':>16}" if baseline else ""))
+    for name in ("pairs", "triples"):
+        r = report[name]
+        line = (f"{name:<10}{r['covered']:>9} ({r['fraction']:>5.1%}){r['total']:>8}"
+                f"{r['weighted_fraction']:>10.1%}{r['max_repeats']:>13}")
+        if baseline:
+            line += f"{baseline[name]['covered']:>9} ({baseline[name]['fraction']:>5.1%})"
+        print(line)
+    if "match_rates" in report:
+        print("\nRandom draws where the best ticket matches at least:")
+        for k, rate in report["match_rates"].items():
+            line = f"  {k} numbers: {rate:.2%}"
+            if baseline and "match_rates" in baseline:
+                line += f"  (random picks {baseline['match_rates'][k]:.2%})"
+            print(line)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build a ticket set that covers the most pairs and triples of a pool")
+    parser.add_argument("--pool", default=f"1-{NUMBERS}", help=f"numbers to play, e.g. 1-20,33,41 (default: 1-{NUMBERS})")
+    parser.add_argument("--tickets", type=int, default=10, help="ticket budget")
+    parser.add_argument("--steps", type=int, default=STEPS, help="annealing steps (0: greedy only)")
+    parser.add_argument("--triple-weight", type=float, default=TRIPLE_WEIGHT,
+                        help=f"score of a triple relative to a pair, 0 for pairs only (default: {TRIPLE_WEIGHT})")
+    parser.add_argument("--weighted", action="store_true", help="weight numbers by their historical frequency")
+    parser.add_argument("--data", default="lottery_results_final.json",
+                        help="draws for --weighted: results JSON, .db store or typed dataset directory")
+    parser.add_argument("--era", default="rng", help="era of stats_query.ERAS counted for --weighted (default: rng)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--check-draws", type=int, default=CHECK_DRAWS,
+                        help="random draws for the best-match rates, 0 to skip")
+    parser.add_argument("--output", default=None, help="write the tickets to this CSV file")
+    parser.add_argument("--json", default=None, help="write the tickets and the coverage report to this JSON file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    pool = parse_pool(args.pool)
+    weights = None
+    if args.weighted:
+        from stats_query import StatsQuery
+        weights = frequency_weights(StatsQuery.load(args.data).frequencies(era=args.era).tolist(), pool)
+
+    start = time.perf_counter()
+    wheel = build_wheel(pool, args.tickets, weights, args.triple_weight, args.steps, args.seed)
+    elapsed = time.perf_counter() - start
+
+    rng = random.Random(args.seed)
+    quick_picks = [sorted(rng.sample(pool, BALLS)) for _ in range(args.tickets)]
+    report, baseline = coverage(wheel.tickets, pool, weights), coverage(quick_picks, pool, weights)
+    if args.check_draws:
+        report["match_rates"] = best_match_rates(wheel.tickets, args.check_draws, args.seed)
+        baseline["match_rates"] = best_match_rates(quick_picks, args.check_draws, args.seed)
+
+    for ticket in wheel.tickets:
+        print(" ".join(f"{n:2d}" for n in ticket))
+    print_report(report, baseline)
+    print(f"\nBuilt in {elapsed:.2f}s ({args.steps:,} annealing steps)")
+
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            csv.writer(f).writerows(wheel.tickets)
+        print(f"Wrote {len(wheel.tickets)} tickets to {args.output}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"tickets": wheel.tickets, "coverage": report, "random_picks": baseline}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()